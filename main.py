@@ -3,10 +3,11 @@ import pandas as pd
 import time
 from src.services.portfolio import Portfolio
 from src.services.wishlist import Wishlist
-from src.external.market_data import get_current_price, get_historical_data
+from src.external.market_data import get_current_price, get_current_prices, get_historical_data, fetch_many, get_provider_health
 from src.services.analyzer import analyze_stock
 from src.services.bibliography import Bibliography
 from src.ui.stock_charts import plot_stock_detail
+from src.ui.charts import reporting_holdings
 from src.ui.auto_refresh import (
     initialize_refresh_state,
     should_refresh,
@@ -15,12 +16,51 @@ from src.ui.auto_refresh import (
     format_last_update,
     get_interval_options,
     get_time_since_last_update,
-    clear_price_cache
+    invalidate_price_cache,
+    format_cache_stats,
+    format_refresher_status,
+    format_price_age,
+    format_provider_health,
+    format_backup_status
 )
+from src.external.quote_cache import quote_cache
+from src.external.fx import fx_rates, FX_SOURCES, RATE_LABELS
+from src.services.price_refresher import get_price_refresher
+from src.services.backup import get_backup_scheduler
+from src.services.ticker_resolver import ticker_resolver
+from src.models.database import init_db
 
 # Page Config
 st.set_page_config(page_title="Agente Financiero", layout="wide")
 
+# Create the database or apply pending schema migrations, and share quotes across
+# sessions (and app restarts) through the on-disk cache, once per server process
+@st.cache_resource
+def prepare_database():
+    applied = init_db()
+    quote_cache.configure(persistent=True)
+    return applied
+
+prepare_database()
+
+# Quotes for portfolio/wishlist tickers are kept fresh by a background thread
+# shared by all sessions, so renders only read the quote cache. It starts once per
+# server process; its interval is then a process-wide setting that a new session
+# picks up instead of overriding, and only an explicit change in the sidebar applies.
+@st.cache_resource
+def start_price_refresher():
+    """
+    Starts the shared price refresher with the default interval.
+    Inicia el refresher de precios compartido con el intervalo por defecto.
+    """
+    refresher = get_price_refresher()
+    refresher.start(60)
+    return refresher
+
+price_refresher = start_price_refresher()
+if 'refresh_interval' not in st.session_state:
+    st.session_state.refresh_interval = price_refresher.interval if price_refresher.is_running() else 0
+
 # Determine run_every for the fragment
 # We pass this to the fragment to control update frequency
 fragment_refresh_interval = st.session_state.get('refresh_interval', 60)
@@ -50,11 +90,23 @@ current_interval = st.session_state.refresh_interval
 current_label = [k for k, v in interval_options.items() if v == current_interval][0]
 current_index = interval_labels.index(current_label)
 
+def apply_refresh_interval():
+    """
+    Applies the interval picked in this session to the shared refresher ("Desactivado" stops it).
+    Aplica al refresher compartido el intervalo elegido en esta sesión ("Desactivado" lo detiene).
+    """
+    interval = interval_options[st.session_state.refresh_interval_selector]
+    if interval > 0:
+        price_refresher.start(interval)
+    else:
+        price_refresher.stop()
+
 selected_label = st.sidebar.selectbox(
     "Intervalo de actualización:",
     interval_labels,
     index=current_index,
-    key="refresh_interval_selector"
+    key="refresh_interval_selector",
+    on_change=apply_refresh_interval
 )
 
 # Update interval if changed
@@ -69,25 +121,60 @@ st.session_state.refresh_interval = interval_options[selected_label]
 
 # Manual refresh button - use a unique key to avoid conflicts
 if st.sidebar.button("🔄 Actualizar Ahora", key="manual_refresh_btn"):
-    # Set flags to force refresh
+    # Reset the timer, start a new price generation (shared by all sessions)
+    # and refetch the tracked tickers right away
     st.session_state.last_price_update = None  # Reset to force refresh
-    st.session_state.force_refresh = True  # Flag to bypass cache completely
-    clear_price_cache()
+    st.session_state.pop("portfolio", None)  # Pick up writes from other sessions
+    invalidate_price_cache()
+    price_refresher.refresh_now()
     st.rerun()
 
+st.sidebar.caption(f"Caché de precios: {format_cache_stats()}")
+st.sidebar.caption(f"Refresco en segundo plano: {format_refresher_status(price_refresher)}")
+
+# Daily online backup of finance.db (safe while sessions keep writing)
+backup_scheduler = get_backup_scheduler()
+backup_scheduler.start()
+if st.sidebar.button("💾 Respaldar Ahora", key="backup_now_btn"):
+    with st.spinner("Respaldando base de datos..."):
+        backup_scheduler.backup_now()
+st.sidebar.caption(f"Último respaldo: {format_backup_status(backup_scheduler)}")
+
+provider_health = get_provider_health()
+if provider_health["state"] == "closed":
+    st.sidebar.caption(f"Datos de mercado: {format_provider_health(provider_health)}")
+else:
+    # Prices shown are cached ones until the provider answers again
+    st.sidebar.warning(f"Datos de mercado: {format_provider_health(provider_health)}")
+
+# Reporting currency: ARS and USD holdings are converted before being added up
+st.sidebar.markdown("---")
+st.sidebar.subheader("💱 Moneda")
+st.sidebar.selectbox("Moneda de reporte", ["ARS", "USD", "Original"], key="report_currency")
+if st.session_state.report_currency != "Original":
+    st.sidebar.selectbox("Tipo de cambio", list(FX_SOURCES), format_func=RATE_LABELS.get, key="fx_rate")
+    fx_value, fx_age = fx_rates.current(st.session_state.fx_rate)
+    if fx_value:
+        st.sidebar.caption(f"1 USD = $ {fx_value:,.2f} ({format_price_age(fx_age)})")
+    else:
+        st.sidebar.warning("Tipo de cambio no disponible: se muestran las monedas originales.")
+
 # Update timestamp on page load (for auto-refresh tracking)
 # This ensures the "Última actualización" shows when auto-refresh occurred
 if st.session_state.last_price_update is None or \
    (st.session_state.refresh_interval > 0 and 
     get_time_since_last_update() >= st.session_state.refresh_interval):
     mark_updated()
-    clear_price_cache()
 
 
 # Load Portfolio
-# @st.cache_data(ttl=60) # Cache removed to prevent stale object issues during dev
+# One Portfolio per session, kept across reruns: its in-memory index is updated in
+# place by this session's writes and its valuation snapshot is reused until prices
+# or holdings change. "Actualizar Ahora" reloads it from the database.
 def load_portfolio():
-    return Portfolio()
+    if "portfolio" not in st.session_state:
+        st.session_state.portfolio = Portfolio()
+    return st.session_state.portfolio
 
 try:
     portfolio = load_portfolio()
@@ -129,8 +216,8 @@ with tab_alerts:
     st.info("Configura alertas de precio para los activos que ya posees.")
     
     # Get portfolio holdings (we need unique tickers and their targets)
-    # We can use get_holdings_with_valuations() which already fetches everything
-    df_holdings = portfolio.get_holdings_with_valuations()
+    # The shared valuation snapshot already has every price (no extra fetch)
+    df_holdings = portfolio.get_valuation_snapshot().holdings
     
     if not df_holdings.empty:
         # Group by Ticker to avoid duplicates if multiple brokers
@@ -229,10 +316,13 @@ with tab_alerts:
              wh4.markdown("**Estado**")
              st.markdown("---")
              
+             # Fetch all wishlist quotes in one batch
+             alert_prices = get_current_prices([item['ticker'] for item in alert_items])
+             
              for item in alert_items:
                  ticker = item['ticker']
                  tgt = item['target_price']
-                 price = get_current_price(ticker)
+                 price = alert_prices.get(ticker)
                  
                  with st.container():
                      wc1, wc2, wc3, wc4 = st.columns([1.5, 1.5, 1.5, 3])
@@ -301,33 +391,17 @@ with tab1:
         Renders the holdings table with partial auto-refresh support.
         Calculates and displays current portfolio valuations, gains/losses, and recent updates.
         """
-        # If this runs via auto-refresh (implicit), we might want to clear cache to get fresh prices.
-        # However, st.fragment just re-runs the function. 
-        # We need to enforce price fetching if we want updates.
-        # We can check time or just force it if we assume this runs on interval.
-        # A simple strategy: always clear cache for the relevant tickers or rely on cache expiration (TTL).
-        # auto_refresh.py has get_cached_price with TTL=30.
-        # If we just call portfolio.get_holdings_with_valuations(), it calls get_current_price.
-        # We should ensure get_current_price fetches new data if enough time passed.
-        
-        # Force clear cache if we want strictly fresh data on every partial run
-        # But this might be too aggressive if run_every is small.
-        # Let's rely on standard logic:
-        # If we are here, we want to show current state.
-        
-        # Recalculate valuations (this fetches prices)
-        # We might need to ensure 'portfolio' object is fresh or methods are stateless regarding cache.
-        # The portfolio object interacts with 'src.market_data'.
-        
-        # Little trick: to see updates, we need 'get_current_price' to return fresh values.
-        # Its internal cache might hold old values. 
-        # Let's call clear_price_cache() here to be sure, OR rely on TTL.
-        # Given the user wants "Actualizar Ahora" experience but partial.
-        clear_price_cache() 
-        
-        df_holdings = portfolio.get_holdings_with_valuations()
+        # Prices are kept fresh by the background refresher, so auto-refresh
+        # reruns only read the shared quote cache (no network in the render path).
+        snapshot = portfolio.get_valuation_snapshot()
+        df_holdings = reporting_holdings(snapshot)
         
         if not df_holdings.empty:
+            # Expired prices are shown right away and refreshed in the background;
+            # the age column tells how old each one is (as of now, not as of the snapshot).
+            elapsed = time.time() - snapshot.as_of
+            df_holdings["Price Age"] = (df_holdings["Price Age"] + elapsed).map(format_price_age)
+            
             # Fill NaN values to avoid "TypeError: unsupported format string passed to NoneType.__format__"
             df_holdings = df_holdings.fillna(0.0)
             
@@ -359,7 +433,9 @@ with tab1:
                 styled_df,
                 column_config={
                     "Ticker": "Ticker",
-                    "Category": "Categoría"
+                    "Category": "Categoría",
+                    "Currency": "Moneda",
+                    "Price Age": "Antigüedad"
                 },
                 hide_index=True,
                 use_container_width=True
@@ -376,7 +452,9 @@ with tab1:
     st.markdown("---")
     st.subheader("📊 Gráficos de Rendimiento")
     
-    from src.ui.charts import plot_portfolio_composition, plot_asset_allocation, plot_gain_loss_by_stock
+    from src.ui.charts import (
+        plot_portfolio_composition, plot_asset_allocation, plot_gain_loss_by_stock, plot_portfolio_value_history
+    )
     
     c1, c2 = st.columns(2)
     with c1:
@@ -387,6 +465,9 @@ with tab1:
     st.markdown("---")
     plot_gain_loss_by_stock(portfolio)
 
+    st.markdown("---")
+    plot_portfolio_value_history()
+
 
 with tab2:
     st.header("Registrar Operación")
@@ -420,7 +501,7 @@ with tab2:
             if market_op == "EE.UU." and ticker_op.endswith(".BA"):
                 st.warning(f"⚠️ Si seleccionas EE.UU., el ticker no debería terminar en .BA. ¿Quisiste decir '{ticker_op.replace('.BA', '')}'?")
             else:
-                fetched_price = get_current_price(ticker_op)
+                fetched_price = ticker_resolver.resolve(ticker_op)
                 if fetched_price:
                     current_price = fetched_price
         
@@ -461,10 +542,8 @@ with tab2:
                 st.session_state.tx_msg = ("error", f"❌ Error: El ticker '{ticker}' tiene sufijo .BA pero el mercado es EE.UU.")
                 return
 
-            # Validate Existence
-            # Note: get_current_price might be slow for a callback, but acceptable here.
-            valid_price = get_current_price(ticker)
-            if valid_price is None:
+            # Validate Existence (instant for known symbols and recent typos)
+            if not ticker_resolver.is_valid(ticker):
                 st.session_state.tx_msg = ("error", f"❌ Error: El ticker '{ticker}' no parece existir en el mercado seleccionado.")
                 return
             
@@ -500,6 +579,33 @@ with tab2:
         # Clear message after display so it doesn't persist forever (optional, or keep until next action)
         del st.session_state.tx_msg
 
+    with st.expander("📥 Importar transacciones desde CSV"):
+        st.caption("Columnas: fecha, ticker (con sufijo de mercado, ej. GGAL.BA), operación (Compra/Venta), "
+                   "cantidad, precio, broker y opcionalmente categoría.")
+        uploaded = st.file_uploader("Archivo CSV", type=["csv"], key="import_csv")
+        skip_invalid = st.checkbox("Importar las filas válidas aunque haya errores", key="import_skip_invalid")
+        if uploaded is not None and st.button("Importar", key="import_btn"):
+            try:
+                from src.services.importer import read_transactions_csv
+                with st.spinner("Validando e importando..."):
+                    report = portfolio.import_transactions(read_transactions_csv(uploaded), skip_invalid=skip_invalid)
+                if not report["errors"].empty:
+                    st.dataframe(report["errors"].rename(columns={"row": "Fila", "error": "Error"}), hide_index=True)
+                if report["imported"]:
+                    st.success(f"✅ {report['imported']} transacciones importadas "
+                               f"({len(report['positions'])} posiciones recalculadas).")
+                    if report["unverified"]:
+                        st.warning("⚠️ No se pudo verificar (proveedor sin respuesta), importados igual: "
+                                   f"{', '.join(report['unverified'])}")
+                elif report["errors"].empty:
+                    st.info(f"No hay transacciones nuevas ({report['duplicates']} ya estaban registradas).")
+                else:
+                    st.error("❌ No se importó nada: corrige las filas con error o marca la opción de arriba.")
+            except ValueError as e:
+                st.error(f"❌ Error: {str(e)}")
+            except Exception as e:
+                st.error(f"❌ Error inesperado: {str(e)}")
+
     st.markdown("---")
     st.subheader("📜 Historial de Transacciones")
     transactions = portfolio.get_transactions()
@@ -565,6 +671,38 @@ with tab2:
     else:
         st.info("No hay transacciones registradas.")
 
+    if transactions:
+        st.markdown("---")
+        st.subheader("🧾 Lotes y Resultado Realizado")
+        lot_method = st.radio("Método de imputación", ["FIFO", "LIFO", "AVERAGE"], horizontal=True, key="lot_method",
+                              format_func=lambda m: {"AVERAGE": "Promedio"}.get(m, m))
+        with st.spinner("Actualizando lotes..."):
+            lot_data = portfolio.get_lot_report(lot_method)
+        lot_df = lot_data["report"]
+
+        lc1, lc2 = st.columns(2)
+        lc1.metric("Resultado Realizado", f"${lot_df['realized'].sum():,.2f}")
+        lc2.metric("Resultado No Realizado", f"${lot_df['unrealized'].sum():,.2f}")
+        st.dataframe(
+            lot_df.rename(columns={
+                "ticker": "Ticker", "broker": "Broker", "quantity": "Cantidad", "cost": "Costo",
+                "market_value": "Valor Actual", "unrealized": "No Realizado", "realized": "Realizado"
+            }).style.format({
+                "Cantidad": "{:.2f}", "Costo": "${:,.2f}", "Valor Actual": "${:,.2f}",
+                "No Realizado": "${:,.2f}", "Realizado": "${:,.2f}"
+            }, na_rep="-"),
+            hide_index=True,
+        )
+        with st.expander("Ver ventas imputadas por lote"):
+            realized_df = lot_data["realized"].sort_values("date", ascending=False)
+            st.dataframe(
+                realized_df[["date", "ticker", "broker", "open_date", "quantity", "cost", "proceeds", "gain"]].rename(columns={
+                    "date": "Fecha Venta", "ticker": "Ticker", "broker": "Broker", "open_date": "Fecha Compra",
+                    "quantity": "Cantidad", "cost": "Costo", "proceeds": "Venta", "gain": "Resultado"
+                }),
+                hide_index=True,
+            )
+
 with tab_charts:
     st.header("📈 Análisis Técnico")
     
@@ -626,10 +764,11 @@ with tab_charts:
         
         with st.spinner(f"Cargando datos para {ticker_to_plot}..."):
              # Header with Price
-             from src.external.market_data import get_stock_info
+             from src.external.market_data import get_stock_fields
              
-             # Fetch minimal data for header
+             # Fetch minimal data for header (name/currency come from the fundamentals cache)
              current = get_current_price(ticker_to_plot)
+             header_fields = get_stock_fields(ticker_to_plot, ["shortName", "currency"])
              
              # Calculate change (approximate from history if real-time change not available)
              # But let's try to get it from historical data last 2 days
@@ -653,9 +792,14 @@ with tab_charts:
                  delta = f"{change:+.2f} ({pct_change:+.2f}%)"
                  delta_color = "normal" # st.metric handles color automatically based on sign
              
+             header_label = ticker_to_plot
+             if header_fields["shortName"]:
+                 header_label = f"{ticker_to_plot} · {header_fields['shortName']}"
+             currency = f" {header_fields['currency']}" if header_fields["currency"] else ""
+             
              st.metric(
-                 label=f"{ticker_to_plot}",
-                 value=f"${current:,.2f}" if current else "N/A",
+                 label=header_label,
+                 value=f"${current:,.2f}{currency}" if current else "N/A",
                  delta=delta
              )
 
@@ -756,25 +900,36 @@ with tab3:
         progress_bar = st.progress(0)
         results = []
         
-        for i, ticker in enumerate(tickers):
-            full_ticker = f"{ticker}{suffix}"
-            # Skip crypto/bonds for now if yfinance doesn't support them well without specific mapping
-            if ticker in ['BTC', 'AL30', 'AL29']: 
+        # Skip crypto/bonds for now if yfinance doesn't support them well without specific mapping
+        full_tickers = {f"{ticker}{suffix}": ticker for ticker in tickers if ticker not in ['BTC', 'AL30', 'AL29']}
+        
+        # Prices in one batch, then histories fetched concurrently
+        prices = get_current_prices(list(full_tickers))
+        priced = [t for t in full_tickers if prices.get(t)]
+        histories = fetch_many(
+            get_historical_data,
+            priced,
+            on_result=lambda key, result, done, total: progress_bar.progress(done / total)
+        )
+        
+        skipped = [full_tickers[t] for t in priced if histories.get(t) is None]
+        for full_ticker in priced:
+            history = histories.get(full_ticker)
+            if history is None:
                 continue
-                
-            price = get_current_price(full_ticker)
-            if price:
-                history = get_historical_data(full_ticker)
-                analysis = analyze_stock(full_ticker, price, history)
-                
-                if analysis["signals"]:
-                    results.append({
-                        "Ticker": ticker,
-                        "Precio": price,
-                        "Señales": ", ".join(analysis["signals"]),
-                        "Razón": " / ".join(analysis["signals"])
-                    })
-            progress_bar.progress((i + 1) / len(tickers))
+            price = prices[full_ticker]
+            analysis = analyze_stock(full_ticker, price, history)
+            
+            if analysis["signals"]:
+                results.append({
+                    "Ticker": full_tickers[full_ticker],
+                    "Precio": price,
+                    "Señales": ", ".join(analysis["signals"]),
+                    "Razón": " / ".join(analysis["signals"])
+                })
+        progress_bar.progress(1.0)
+        if skipped:
+            st.warning(f"Sin historial (error o tiempo agotado), no analizados: {', '.join(skipped)}")
             
         if results:
             st.success(f"Se encontraron {len(results)} oportunidades!")
@@ -812,10 +967,11 @@ with tab4:
                 else:
                     # Validate
                     with st.spinner(f"Validando {final_ticker}..."):
-                        price = get_current_price(final_ticker)
-                        if price:
+                        if ticker_resolver.is_valid(final_ticker):
                             wishlist.add_ticker(final_ticker)
-                            st.success(f"¡{final_ticker} agregado correctamente! (Precio actual: ${price})")
+                            price = get_current_price(final_ticker)
+                            price_text = f" (Precio actual: ${price})" if price else ""
+                            st.success(f"¡{final_ticker} agregado correctamente!{price_text}")
                             st.rerun()
                         else:
                             st.error(f"No se encontró el ticker '{final_ticker}'. Verifica el símbolo y el mercado.")
@@ -833,6 +989,9 @@ with tab4:
         h4.markdown("**Distancia / Alerta**")
         h5.markdown("") # Delete btn
         
+        # Fetch all wishlist quotes in one batch
+        wl_prices = get_current_prices([item['ticker'] for item in items])
+        
         for item in items:
             ticker = item['ticker']
             target_price = item['target_price']
@@ -847,7 +1006,7 @@ with tab4:
                     st.write(f"**{display_ticker}**")
                 
                 # 2. Current Price
-                current_price = get_current_price(ticker)
+                current_price = wl_prices.get(ticker)
                 with c2:
                     if current_price:
                         st.write(f"${current_price:,.2f}")
@@ -0,0 +1,237 @@
+import datetime
+import threading
+import pandas as pd
+from typing import Callable
+from src.models.database import PriceBar, BarCoverage
+from src.external.providers import get_provider
+
+# Re-download the current (possibly incomplete) daily bar at most this often
+TAIL_REFRESH_SECONDS = 15 * 60
+# Closed bars re-downloaded on each tail update to detect splits/adjustments
+OVERLAP_DAYS = 7
+# Relative close difference on a closed bar that invalidates the stored series
+ADJUSTMENT_TOLERANCE = 0.005
+# Fetch at least this much history the first time a ticker is requested
+MIN_INITIAL_DAYS = 366
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+def _ensure_tables():
+    """
+    Creates the bar store tables on databases created before they existed.
+    Crea las tablas del almacén de velas en bases de datos anteriores a ellas.
+    """
+    global _tables_ready
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if not _tables_ready:
+            PriceBar._meta.database.create_tables([PriceBar, BarCoverage], safe=True)
+            _tables_ready = True
+
+def period_start(period: str, today: datetime.date = None):
+    """
+    Converts a yfinance-style period into the first calendar date it covers.
+    Convierte un período estilo yfinance en la primera fecha calendario que cubre.
+
+    Args:
+        period (str): "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd" or "max".
+        today (datetime.date): Reference date (default: today).
+
+    Returns:
+        datetime.date: First date of the period, or None for "max".
+    """
+    today = today or datetime.date.today()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return datetime.date(today.year, 1, 1)
+
+    amount = int(''.join(c for c in period if c.isdigit()) or 1)
+    unit = period.lstrip('0123456789')
+    if unit == "d":
+        # Trading days: go back enough calendar days to cover weekends/holidays
+        return today - datetime.timedelta(days=amount * 2 + 7)
+    if unit == "mo":
+        return (pd.Timestamp(today) - pd.DateOffset(months=amount)).date()
+    if unit == "y":
+        return (pd.Timestamp(today) - pd.DateOffset(years=amount)).date()
+    raise ValueError(f"Unsupported period: {period}")
+
+def _fetch_history(ticker: str, start: datetime.date = None, end: datetime.date = None) -> pd.DataFrame:
+    """
+    Downloads daily bars for a date range (or the full history if start is None).
+    Descarga velas diarias para un rango de fechas (o todo el historial si start es None).
+    """
+    return get_provider().get_history(ticker, start, end)
+
+def _save_bars(ticker: str, df: pd.DataFrame):
+    """
+    Upserts downloaded bars into the PriceBar table in one transaction.
+    Inserta o reemplaza las velas descargadas en la tabla PriceBar en una transacción.
+    """
+    if df is None or df.empty:
+        return
+    df = df.dropna(subset=['Close'])
+    rows = [
+        {
+            "ticker": ticker,
+            "date": ts.date(),
+            "open": float(r.Open),
+            "high": float(r.High),
+            "low": float(r.Low),
+            "close": float(r.Close),
+            "volume": float(r.Volume) if pd.notna(r.Volume) else 0.0
+        }
+        for ts, r in zip(df.index, df[BAR_COLUMNS].itertuples(index=False))
+    ]
+    with PriceBar._meta.database.atomic():
+        for i in range(0, len(rows), 500):
+            PriceBar.insert_many(rows[i:i + 500]).on_conflict_replace().execute()
+
+def _load_bars(ticker: str, start: datetime.date = None) -> pd.DataFrame:
+    """
+    Reads stored bars for a ticker from `start` onwards as a history DataFrame.
+    Lee las velas guardadas de un ticker desde `start` como DataFrame de historial.
+    """
+    query = (PriceBar
+             .select(PriceBar.date, PriceBar.open, PriceBar.high, PriceBar.low, PriceBar.close, PriceBar.volume)
+             .where(PriceBar.ticker == ticker))
+    if start is not None:
+        query = query.where(PriceBar.date >= start)
+    rows = list(query.order_by(PriceBar.date).tuples())
+
+    df = pd.DataFrame(rows, columns=['Date'] + BAR_COLUMNS)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.set_index('Date')
+
+def _closes_changed(ticker: str, fetched: pd.DataFrame, today: datetime.date) -> bool:
+    """
+    Checks whether already-closed bars changed upstream (split or data correction).
+    Verifica si velas ya cerradas cambiaron en origen (split o corrección de datos).
+    """
+    if fetched is None or fetched.empty:
+        return False
+    stored = _load_bars(ticker, fetched.index[0].date())
+    if stored.empty:
+        return False
+
+    new_closes = pd.Series(fetched['Close'].values, index=[ts.date() for ts in fetched.index])
+    old_closes = pd.Series(stored['Close'].values, index=[ts.date() for ts in stored.index])
+    common = [d for d in old_closes.index if d in new_closes.index and d < today]
+    if not common:
+        return False
+
+    diff = (new_closes[common] - old_closes[common]).abs() / old_closes[common].abs().clip(lower=1e-9)
+    return bool((diff > ADJUSTMENT_TOLERANCE).any())
+
+def _reset_ticker(ticker: str):
+    """
+    Drops every stored bar and the coverage record of a ticker.
+    Elimina todas las velas guardadas y el registro de cobertura de un ticker.
+    """
+    with PriceBar._meta.database.atomic():
+        PriceBar.delete().where(PriceBar.ticker == ticker).execute()
+        BarCoverage.delete().where(BarCoverage.ticker == ticker).execute()
+
+def sync_bars(ticker: str, start: datetime.date = None, guard: Callable = None):
+    """
+    Makes sure the store covers [start, today], downloading only what is missing.
+    Asegura que el almacén cubra [start, hoy], descargando solo lo que falta.
+
+    Args:
+        ticker (str): Stock symbol.
+        start (datetime.date): First date needed, or None for the full history.
+        guard (Callable): Optional wrapper for the provider downloads only, called as
+            `guard(func, *args)` (e.g. a circuit breaker's `call`). Local reads and
+            writes never go through it.
+    """
+    def download(first, last):
+        if guard is None:
+            return _fetch_history(ticker, first, last)
+        return guard(_fetch_history, ticker, first, last)
+
+    _ensure_tables()
+    today = datetime.date.today()
+    now = datetime.datetime.now()
+    coverage = BarCoverage.get_or_none(BarCoverage.ticker == ticker)
+
+    if coverage is None:
+        # First request: download at least a year so short periods reuse it later
+        fetch_start = start
+        if start is not None:
+            fetch_start = min(start, today - datetime.timedelta(days=MIN_INITIAL_DAYS))
+        _save_bars(ticker, download(fetch_start, today))
+        BarCoverage.create(ticker=ticker, start_date=fetch_start or datetime.date.min,
+                           end_date=today, fetched_at=now)
+        return
+
+    # Missing head: requested range starts before what we have
+    if (start or datetime.date.min) < coverage.start_date:
+        head_end = coverage.start_date - datetime.timedelta(days=1)
+        _save_bars(ticker, download(start, head_end))
+        coverage.start_date = start or datetime.date.min
+        coverage.save()
+
+    # Missing tail: new days since the last sync, or a stale intraday bar
+    tail_fresh = (coverage.end_date >= today and
+                  (now - coverage.fetched_at).total_seconds() < TAIL_REFRESH_SECONDS)
+    if not tail_fresh:
+        tail_start = coverage.end_date - datetime.timedelta(days=OVERLAP_DAYS)
+        fetched = download(tail_start, today)
+        if _closes_changed(ticker, fetched, today):
+            # History was adjusted upstream; rebuild the whole series
+            print(f"Stored bars for {ticker} are outdated (split/adjustment). Re-downloading.")
+            original_start = coverage.start_date
+            _reset_ticker(ticker)
+            sync_bars(ticker, None if original_start == datetime.date.min else original_start, guard)
+            return
+        _save_bars(ticker, fetched)
+        coverage.end_date = today
+        coverage.fetched_at = now
+        coverage.save()
+
+def get_bars(ticker: str, period: str = "1y", sync: bool = True, guard: Callable = None) -> pd.DataFrame:
+    """
+    Returns daily bars for a period, served from the local store.
+    Devuelve velas diarias de un período, servidas desde el almacén local.
+
+    Args:
+        ticker (str): Stock symbol.
+        period (str): yfinance-style period ("5d", "1mo" ... "5y", "ytd", "max").
+        sync (bool): Download missing days first. False serves only what is stored.
+        guard (Callable): Wrapper for the provider downloads (see `sync_bars`).
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by Date with Open, High, Low, Close, Volume.
+    """
+    bars = get_bars_since(ticker, period_start(period), sync, guard)
+
+    if period.endswith("d") and not period.endswith("ytd"):
+        # "Nd" periods count trading days, not calendar days
+        bars = bars.tail(int(period[:-1]))
+    return bars
+
+def get_bars_since(ticker: str, start: datetime.date = None, sync: bool = True,
+                   guard: Callable = None) -> pd.DataFrame:
+    """
+    Returns daily bars from a date until today, served from the local store.
+    Devuelve velas diarias desde una fecha hasta hoy, servidas desde el almacén local.
+
+    Args:
+        ticker (str): Stock symbol.
+        start (datetime.date): First date needed, or None for the full history.
+        sync (bool): Download missing days first. False serves only what is stored.
+        guard (Callable): Wrapper for the provider downloads (see `sync_bars`).
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by Date with Open, High, Low, Close, Volume.
+    """
+    if sync:
+        sync_bars(ticker, start, guard)
+    else:
+        _ensure_tables()
+    return _load_bars(ticker, start)
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the provider while the circuit is open.
+    Se lanza en lugar de llamar al proveedor mientras el circuito está abierto.
+    """
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with exponential backoff.
+    Circuit breaker seguro entre hilos con backoff exponencial.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    fast for `base_delay` seconds. Then a single probe call is let through
+    (half-open): if it succeeds the circuit closes, otherwise it opens again for
+    twice as long, up to `max_delay`.
+    """
+    def __init__(self, failure_threshold: int = 5, base_delay: float = 30.0, max_delay: float = 600.0):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = CLOSED
+        self.failures = 0        # Consecutive failures
+        self.trips = 0           # Consecutive openings (drives the backoff)
+        self.last_error = None
+        self._retry_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` through the breaker, recording the outcome.
+        Ejecuta `fn(*args, **kwargs)` a través del breaker, registrando el resultado.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (the function is not called).
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def before_call(self):
+        """
+        Reserves a call slot, or raises CircuitOpenError if calls are not allowed yet.
+        Reserva un lugar para la llamada, o lanza CircuitOpenError si aún no se permiten.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() >= self._retry_at:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True  # Only one probe at a time
+                return
+            raise CircuitOpenError(f"Provider unavailable, retrying in {self.retry_in():.0f}s")
+
+    def record_success(self):
+        """
+        Closes the circuit and resets the failure counters.
+        Cierra el circuito y reinicia los contadores de fallos.
+        """
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self._probing = False
+
+    def record_failure(self, error: Exception = None):
+        """
+        Counts a failure and opens the circuit when the threshold is reached.
+        Cuenta un fallo y abre el circuito al alcanzar el umbral.
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.trips += 1
+                delay = min(self.max_delay, self.base_delay * 2 ** (self.trips - 1))
+                self.state = OPEN
+                self._retry_at = time.monotonic() + delay
+            self._probing = False
+
+    def is_closed(self) -> bool:
+        """
+        Returns True if calls go through normally.
+        Devuelve True si las llamadas pasan normalmente.
+        """
+        return self.state == CLOSED
+
+    def retry_in(self) -> float:
+        """
+        Seconds until the next probe is allowed (0 if closed or already due).
+        Segundos hasta que se permita el próximo intento (0 si está cerrado o ya corresponde).
+        """
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def status(self) -> dict:
+        """
+        Returns the breaker state for display.
+        Devuelve el estado del breaker para mostrarlo.
+        """
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": self.retry_in(),
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Sector, name, currency... change about once a quarter
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+class FundamentalsCache:
+    """
+    Long-lived cache of stock info (the `.info` dict), kept in memory and in the
+    `CachedFundamentals` table so it survives restarts.
+    Caché de larga duración de la información de acciones (el dict `.info`), en
+    memoria y en la tabla `CachedFundamentals` para que sobreviva a reinicios.
+
+    Price fields inside the info dict go stale long before the entry expires;
+    live prices must come from the quote cache, not from here.
+    """
+    def __init__(self, ttl: int = DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries = {}  # ticker -> (info, timestamp)
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    def get(self, ticker: str, ttl: int = None) -> Optional[dict]:
+        """
+        Returns the cached info of a ticker if it has not expired.
+        Devuelve la información en caché de un ticker si no ha expirado.
+
+        Args:
+            ticker (str): Stock symbol.
+            ttl (int): Optional TTL override in seconds.
+        """
+        return self.get_many([ticker], ttl).get(ticker)
+
+    def get_many(self, tickers: List[str], ttl: int = None) -> Dict[str, dict]:
+        """
+        Returns the cached, non-expired info of several tickers with one query.
+        Devuelve la información en caché no expirada de varios tickers con una consulta.
+
+        Args:
+            tickers (List[str]): Stock symbols.
+            ttl (int): Optional TTL override in seconds.
+
+        Returns:
+            Dict[str, dict]: Mapping ticker -> info. Missing or expired tickers are omitted.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            found = {t: self._entries[t] for t in tickers if t in self._entries}
+
+        missing = [t for t in tickers if t not in found]
+        if missing:
+            loaded = self._load_from_disk(missing)
+            with self._lock:
+                self._entries.update(loaded)
+            found.update(loaded)
+
+        return {t: info for t, (info, ts) in found.items() if now - ts <= ttl}
+
+    def set(self, ticker: str, info: dict, timestamp: float = None):
+        """
+        Stores the info of a ticker in memory and on disk.
+        Guarda la información de un ticker en memoria y en disco.
+        """
+        if not info:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._entries[ticker] = (info, timestamp)
+        try:
+            from src.models.database import CachedFundamentals
+            self._ensure_table()
+            CachedFundamentals.replace(ticker=ticker, data=json.dumps(info, default=str),
+                                       fetched_at=timestamp).execute()
+        except Exception as e:
+            print(f"Error saving fundamentals for {ticker}: {e}")
+
+    def clear(self):
+        """
+        Removes every cached entry (memory and disk).
+        Elimina todas las entradas en caché (memoria y disco).
+        """
+        with self._lock:
+            self._entries.clear()
+        try:
+            from src.models.database import CachedFundamentals
+            self._ensure_table()
+            CachedFundamentals.delete().execute()
+        except Exception as e:
+            print(f"Error clearing fundamentals cache: {e}")
+
+    def _ensure_table(self):
+        """
+        Creates the backing table on databases created before it was added.
+        Crea la tabla en bases de datos creadas antes de que existiera.
+        """
+        if not self._table_ready:
+            from src.models.database import CachedFundamentals
+            CachedFundamentals.create_table(safe=True)
+            self._table_ready = True
+
+    def _load_from_disk(self, tickers: List[str]) -> Dict[str, tuple]:
+        """
+        Reads (info, timestamp) tuples for several tickers from the CachedFundamentals table.
+        Lee tuplas (info, timestamp) de varios tickers de la tabla CachedFundamentals.
+        """
+        entries = {}
+        try:
+            from src.models.database import CachedFundamentals
+            self._ensure_table()
+            for i in range(0, len(tickers), 500):
+                rows = (CachedFundamentals
+                        .select(CachedFundamentals.ticker, CachedFundamentals.data, CachedFundamentals.fetched_at)
+                        .where(CachedFundamentals.ticker.in_(tickers[i:i + 500]))
+                        .tuples())
+                for ticker, data, fetched_at in rows:
+                    entries[ticker] = (json.loads(data), fetched_at)
+        except Exception as e:
+            print(f"Error reading cached fundamentals: {e}")
+        return entries
+
+
+# Shared instance used by market_data
+fundamentals_cache = FundamentalsCache()
@@ -0,0 +1,163 @@
+import datetime
+import threading
+import time
+from collections import deque
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+# ARS per USD, derived from quotes of the same asset in both currencies:
+# rate -> (ARS quote, USD quote or None, units of the ARS asset per USD asset)
+FX_SOURCES = {
+    "official": ("ARS=X", None, 1.0),       # Official (wholesale) exchange rate
+    "mep": ("AL30.BA", "AL30D.BA", 1.0),    # Dólar MEP: AL30 bond in pesos vs. in dollars (local market)
+    "ccl": ("GGAL.BA", "GGAL", 10.0),       # Contado con liquidación: GGAL local shares vs. ADR (10 shares)
+}
+RATE_LABELS = {"official": "Oficial", "mep": "MEP", "ccl": "CCL"}
+DEFAULT_RATE = "mep"
+
+# Daily series are re-read from the bar store at most this often
+HISTORY_TTL = 15 * 60
+# Intraday samples kept per rate (one per distinct quote)
+INTRADAY_SAMPLES = 500
+# Days of history loaded by default
+HISTORY_DAYS = 400
+
+class FxRates:
+    """
+    ARS/USD exchange rates (official, MEP, CCL) from locally cached data: daily
+    series come from the bar store and intraday rates from the quote cache, so
+    converting a whole portfolio costs one rate lookup, not one per row.
+    Tipos de cambio ARS/USD (oficial, MEP, CCL) a partir de datos en caché local:
+    las series diarias salen del almacén de velas y las intradiarias de la caché
+    de cotizaciones, así que convertir un portafolio cuesta una sola consulta.
+    """
+    def __init__(self, history_ttl: int = HISTORY_TTL):
+        """
+        Creates an empty rate store; `history_ttl` is how long a loaded daily series is reused.
+        Crea un almacén de tipos de cambio vacío; `history_ttl` es cuánto se reutiliza una serie diaria.
+        """
+        self.history_ttl = history_ttl
+        self._history = {}  # rate -> (loaded_at, start, Series)
+        self._intraday = {rate: deque(maxlen=INTRADAY_SAMPLES) for rate in FX_SOURCES}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check(rate: str):
+        """
+        Raises ValueError for a rate not in FX_SOURCES.
+        Lanza ValueError si el tipo de cambio no está en FX_SOURCES.
+        """
+        if rate not in FX_SOURCES:
+            raise ValueError(f"Unknown exchange rate: {rate}")
+
+    @staticmethod
+    def _combine(ars, usd, ratio: float):
+        """
+        ARS per USD from the two legs (works on floats and aligned Series alike).
+        ARS por USD a partir de las dos puntas (sirve para floats y Series alineadas).
+        """
+        return ars * ratio if usd is None else ars * ratio / usd
+
+    def history(self, rate: str = DEFAULT_RATE, start: datetime.date = None) -> pd.Series:
+        """
+        Daily closing rate (ARS per USD) from `start` (default: HISTORY_DAYS ago).
+        Tipo de cambio diario de cierre (ARS por USD) desde `start`.
+
+        Returns:
+            pd.Series: Indexed by date. Days where only one leg traded carry the previous rate.
+        """
+        self._check(rate)
+        start = start or datetime.date.today() - datetime.timedelta(days=HISTORY_DAYS)
+        with self._lock:
+            cached = self._history.get(rate)
+        if cached and time.time() - cached[0] < self.history_ttl and cached[1] <= start:
+            return cached[2].loc[pd.Timestamp(start):]
+
+        from src.external.market_data import get_history_since
+        ars_ticker, usd_ticker, ratio = FX_SOURCES[rate]
+        legs = [get_history_since(t, start) for t in (ars_ticker, usd_ticker) if t]
+        if any(leg is None or leg.empty for leg in legs):
+            closes = pd.DataFrame()
+        else:
+            closes = pd.concat([leg['Close'] for leg in legs], axis=1).sort_index().ffill().dropna()
+        if closes.empty:
+            series = pd.Series(dtype=float)
+        else:
+            series = self._combine(closes.iloc[:, 0], closes.iloc[:, 1] if usd_ticker else None, ratio)
+        series = series.rename(rate)
+        with self._lock:
+            self._history[rate] = (time.time(), start, series)
+        return series
+
+    def current(self, rate: str = DEFAULT_RATE) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Latest rate and its age in seconds, from the cached quotes of both legs
+        (falls back to the last daily close). Each new value is kept as an intraday sample.
+        Último tipo de cambio y su antigüedad, a partir de las cotizaciones en caché.
+
+        Returns:
+            Tuple[float, float]: (ARS per USD, age in seconds), or (None, None) if unknown.
+        """
+        self._check(rate)
+        from src.external.market_data import get_current_prices_with_age
+        ars_ticker, usd_ticker, ratio = FX_SOURCES[rate]
+        quotes = get_current_prices_with_age([t for t in (ars_ticker, usd_ticker) if t])
+        ars, ars_age = quotes.get(ars_ticker, (None, None))
+        usd, usd_age = quotes.get(usd_ticker, (None, None)) if usd_ticker else (None, 0.0)
+
+        if ars and (usd or not usd_ticker):
+            value = float(self._combine(ars, usd if usd_ticker else None, ratio))
+            age = max(ars_age or 0.0, usd_age or 0.0)
+            self._record(rate, value, time.time() - age)
+            return value, age
+
+        daily = self.history(rate)
+        if daily.empty:
+            return None, None
+        # Bar dates are local calendar days: the close counts as of the following local
+        # midnight, measured on the same epoch clock (time.time()) as the cached quotes
+        closed_at = datetime.datetime.combine(daily.index[-1].date() + datetime.timedelta(days=1),
+                                              datetime.time()).timestamp()
+        return float(daily.iloc[-1]), max(time.time() - closed_at, 0.0)
+
+    def _record(self, rate: str, value: float, at: float):
+        """
+        Appends an intraday sample unless it repeats the last one.
+        Agrega una muestra intradiaria salvo que repita la última.
+        """
+        with self._lock:
+            samples = self._intraday[rate]
+            if not samples or samples[-1][1] != value:
+                samples.append((at, value))
+
+    def intraday(self, rate: str = DEFAULT_RATE) -> pd.Series:
+        """
+        Intraday samples of a rate seen by this process (indexed by timestamp).
+        Muestras intradiarias de un tipo de cambio vistas por este proceso.
+        """
+        self._check(rate)
+        with self._lock:
+            samples = list(self._intraday[rate])
+        index = pd.to_datetime([at for at, _ in samples], unit='s')
+        return pd.Series([value for _, value in samples], index=index, name=rate, dtype=float)
+
+    def all_current(self) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """
+        Latest value and age of every rate.
+        Último valor y antigüedad de todos los tipos de cambio.
+        """
+        return {rate: self.current(rate) for rate in FX_SOURCES}
+
+    def clear(self):
+        """
+        Forgets the loaded daily series and the intraday samples.
+        Olvida las series diarias cargadas y las muestras intradiarias.
+        """
+        with self._lock:
+            self._history.clear()
+            for samples in self._intraday.values():
+                samples.clear()
+
+
+# Shared instance used by the UI
+fx_rates = FxRates()
@@ -1,5 +1,179 @@
-import yfinance as yf
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+import threading
+from typing import Callable, Dict, List, Tuple
+from src.external.quote_cache import quote_cache
+from src.external.fundamentals_cache import fundamentals_cache
+from src.external.bar_store import get_bars, get_bars_since
+from src.external.providers import get_provider
+from src.external.rate_limiter import TokenBucket
+from src.external.single_flight import SingleFlight
+from src.external.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Concurrent fetch settings (see configure_fetching)
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 15  # Seconds allowed per call, on top of the rate limiter wait
+REQUESTS_PER_SECOND = 5
+BURST = 10
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="market-data")
+_rate_limiter = TokenBucket(rate=REQUESTS_PER_SECOND, capacity=BURST)
+
+# Expired prices younger than this are served immediately and refreshed in the background,
+# on a thread of their own: a refresh fans out to _executor, so it must not occupy a worker
+MAX_STALE_AGE = 24 * 60 * 60
+_revalidator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote-revalidate")
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+# After this many consecutive provider failures, stop calling it and serve cached
+# data; retry after BACKOFF_BASE seconds, doubling up to BACKOFF_MAX
+FAILURE_THRESHOLD = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 600
+_breaker = CircuitBreaker(FAILURE_THRESHOLD, BACKOFF_BASE, BACKOFF_MAX)
+
+# Requests for the same key within this many seconds share one fetch
+COALESCE_WINDOW = 2.0
+_flights = SingleFlight(window=COALESCE_WINDOW)
+
+def configure_fetching(max_workers: int = None, requests_per_second: float = None,
+                       burst: int = None, timeout: float = None):
+    """
+    Configure the concurrent fetch layer. Arguments left as None keep their value.
+    Configura la capa de consultas concurrentes. Los argumentos en None no cambian.
+    
+    Args:
+        max_workers (int): Size of the worker thread pool.
+        requests_per_second (float): Sustained request rate allowed towards the provider.
+        burst (int): Requests allowed at once before throttling kicks in.
+        timeout (float): Seconds allowed per call before a batch gives up on it.
+    """
+    global _executor, _rate_limiter, MAX_WORKERS, REQUESTS_PER_SECOND, BURST, REQUEST_TIMEOUT
+    if max_workers is not None and max_workers != MAX_WORKERS:
+        MAX_WORKERS = max_workers
+        old_executor = _executor
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="market-data")
+        old_executor.shutdown(wait=False)
+    if requests_per_second is not None or burst is not None:
+        REQUESTS_PER_SECOND = requests_per_second or REQUESTS_PER_SECOND
+        BURST = burst or BURST
+        _rate_limiter = TokenBucket(rate=REQUESTS_PER_SECOND, capacity=BURST)
+    if timeout is not None:
+        REQUEST_TIMEOUT = timeout
+
+def invalidate_prices(max_age: float = None) -> int:
+    """
+    Start a new quote generation: cached prices are refetched on their next read.
+    Inicia una nueva generación de cotizaciones: se vuelven a consultar al leerlas.
+    
+    Args:
+        max_age (float): Only invalidate if the current generation is older than this.
+        
+    Returns:
+        int: The current generation number.
+    """
+    previous = quote_cache.generation
+    generation = quote_cache.invalidate(max_age)
+    if generation != previous:
+        # Don't let recently coalesced results leak into the new generation
+        _flights.forget()
+    return generation
+
+def clear_quotes():
+    """
+    Drop every cached price and any recently coalesced result, so the next read refetches.
+    Elimina todos los precios en caché y los resultados compartidos recientes, para volver a consultar.
+    """
+    quote_cache.clear()
+    _flights.forget()
+
+def get_provider_health() -> dict:
+    """
+    Return the provider circuit breaker state (closed / open / half_open).
+    Devuelve el estado del circuit breaker del proveedor (closed / open / half_open).
+    
+    Returns:
+        dict: state, consecutive failures, seconds until the next retry and last error.
+    """
+    return _breaker.status()
+
+def _last_known_price(ticker: str) -> Tuple[float, float]:
+    """
+    Any price ever cached for a ticker, with its age. Used while the provider is down.
+    Cualquier precio guardado para un ticker, con su antigüedad. Se usa si el proveedor falla.
+    """
+    return quote_cache.peek(ticker, include_invalidated=True) or (None, None)
+
+def fetch_many(func: Callable, keys: List[str], timeout: float = None,
+               on_result: Callable = None) -> Dict[str, object]:
+    """
+    Run `func(key)` for every key concurrently on the shared worker pool.
+    Ejecuta `func(key)` para cada clave en paralelo usando el pool compartido.
+    
+    Every call waits for a rate limiter token first, so bursts don't get the
+    provider to throttle us. Wall-clock time is bounded by the slowest call
+    (or the deadline), not by the sum of all calls. The default deadline grows
+    with the batch: the time the limiter needs to hand out a token per key plus
+    REQUEST_TIMEOUT for the last call, so large batches are throttled, not dropped.
+    
+    Args:
+        func (Callable): Function called with a single key (e.g. a ticker).
+        keys (List[str]): Keys to process (duplicates are ignored).
+        timeout (float): Seconds to wait for all results (default: scaled with len(keys)).
+        on_result (Callable): Optional callback `on_result(key, result, done, total)`,
+            invoked in the calling thread as results arrive (e.g. to update a progress bar).
+        
+    Returns:
+        Dict[str, object]: Mapping key -> result. Keys that failed or timed out map to
+            None (the ones dropped by the deadline are logged).
+    """
+    keys = list(dict.fromkeys(keys))
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT + max(0, len(keys) - BURST) / REQUESTS_PER_SECOND
+    deadline = time.monotonic() + timeout
+    results = {key: None for key in keys}
+    
+    def task(key):
+        # Don't wait for a token past the batch deadline
+        if not _rate_limiter.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            print(f"Dropped {key}: no rate limiter token before the {timeout:.0f}s deadline")
+            return None
+        return func(key)
+    
+    futures = {_executor.submit(task, key): key for key in keys}
+    done = 0
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"Error fetching {key}: {e}")
+            done += 1
+            if on_result:
+                on_result(key, results[key], done, len(keys))
+    except FutureTimeoutError:
+        pending = [futures[f] for f in futures if not f.done()]
+        print(f"Timed out after {timeout}s waiting for: {pending}")
+        for future in futures:
+            future.cancel()
+    return results
+
+def _read_cached_price(ticker: str) -> float:
+    """
+    Read a price from the process-wide quote cache, or None if missing/expired.
+    Lee un precio de la caché de cotizaciones del proceso, o None si no existe/expiró.
+    """
+    return quote_cache.get(ticker)
+
+def _write_cached_price(ticker: str, price: float):
+    """
+    Store a price in the process-wide quote cache.
+    Guarda un precio en la caché de cotizaciones del proceso.
+    """
+    quote_cache.set(ticker, price)
 
 def get_current_price(ticker: str) -> float:
     """
@@ -12,43 +186,254 @@ def get_current_price(ticker: str) -> float:
     Returns:
         float: The current price or None if not found.
     """
-    # Check if force refresh is enabled (manual refresh button clicked)
-    force_refresh = False
+    # Try to get from cache first
+    cached = _read_cached_price(ticker)
+    if cached is not None:
+        return cached
+    
+    price = _fetch_price(ticker)
+    if price is None and not _breaker.is_closed():
+        # Provider is down: an old price beats none
+        price = _last_known_price(ticker)[0]
+    return price
+
+def _fetch_price(ticker: str) -> float:
+    """
+    Fetch a single price from the provider (bypassing the cache) and cache it.
+    Duplicate concurrent requests for the same ticker share one fetch.
+    Obtiene un precio del proveedor (sin mirar la caché) y lo guarda en caché.
+    Pedidos concurrentes duplicados del mismo ticker comparten una consulta.
+    """
+    return _flights.do(("quote", ticker), lambda: _fetch_price_uncoalesced(ticker))
+
+def _fetch_price_uncoalesced(ticker: str) -> float:
+    """
+    Fetch a single price from the provider and cache it.
+    Obtiene un precio del proveedor y lo guarda en caché.
+    """
     try:
-        import streamlit as st
-        force_refresh = st.session_state.get('force_refresh', False)
-    except:
-        pass
+        return _fetch_quote(ticker)
+    except CircuitOpenError:
+        return None
+    except Exception as e:
+        print(f"Error fetching price for {ticker}: {e}")
+        return None
+
+def _fetch_quote(ticker: str) -> float:
+    """
+    Ask the provider for a price (through the circuit breaker) and cache it. Errors propagate.
+    Pide un precio al proveedor (a través del circuit breaker) y lo guarda. Propaga los errores.
+    """
+    price = _breaker.call(get_provider().get_quote, ticker)
+    if price:
+        _write_cached_price(ticker, price)
+    return price
+
+def lookup_price(ticker: str) -> Tuple[float, bool]:
+    """
+    Get the price of a ticker and whether the provider actually answered.
+    Obtiene el precio de un ticker y si el proveedor realmente respondió.
     
-    # Try to get from cache first (unless force refresh)
-    if not force_refresh:
-        try:
-            from src.ui.auto_refresh import get_cached_price, cache_price
-            cached = get_cached_price(ticker)
-            if cached is not None:
-                return cached
-        except ImportError:
-            pass  # If auto_refresh not available, skip caching
+    Unlike `get_current_price`, a failed request is not confused with a symbol
+    that does not exist, and no old price is served while the provider is down.
     
+    Args:
+        ticker (str): The stock symbol.
+        
+    Returns:
+        Tuple[float, bool]: (price, True) from the quote cache or the provider;
+            (None, True) if the provider answered without data for the symbol;
+            (None, False) if it could not be asked (error, timeout or open circuit breaker).
+    """
+    cached = _read_cached_price(ticker)
+    if cached is not None:
+        return cached, True
     try:
-        ticker_obj = yf.Ticker(ticker)
-        # Try to get 'currentPrice', fallback to 'regularMarketPrice' or last close
-        # Intenta obtener 'currentPrice', si no, usa 'regularMarketPrice' o el cierre anterior
-        info = ticker_obj.info
-        price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
+        price = _flights.do(("quote_checked", ticker), lambda: _fetch_quote(ticker))
+    except CircuitOpenError:
+        return None, False
+    except Exception as e:
+        print(f"Error fetching price for {ticker}: {e}")
+        return None, False
+    return price, bool(price) or _breaker.is_closed()
+
+def lookup_prices(tickers: List[str]) -> Dict[str, Tuple[float, bool]]:
+    """
+    `lookup_price` for several tickers: one batch request for all of them, and the
+    single-ticker endpoint (concurrently) only for symbols the batch left out.
+    `lookup_price` para varios tickers: una consulta en bloque para todos y el
+    endpoint individual (en paralelo) solo para los que el bloque no trajo.
+    
+    Args:
+        tickers (List[str]): Stock symbols (duplicates are ignored).
         
-        # Cache the price if available
-        if price:
-            try:
-                from src.ui.auto_refresh import cache_price
-                cache_price(ticker, price)
-            except ImportError:
-                pass
+    Returns:
+        Dict[str, Tuple[float, bool]]: Ticker -> (price, provider answered), as in
+            `lookup_price`. Tickers dropped by the batch deadline map to (None, False).
+    """
+    results = {}
+    missing = []
+    for ticker in dict.fromkeys(t for t in tickers if t):
+        cached = _read_cached_price(ticker)
+        if cached is not None:
+            results[ticker] = (cached, True)
+        else:
+            missing.append(ticker)
+    if not missing:
+        return results
+    
+    try:
+        fetched = _breaker.call(get_provider().get_quotes, missing)
+    except CircuitOpenError:
+        fetched = None
+    except Exception as e:
+        print(f"Error fetching batch prices for {missing}: {e}")
+        fetched = None
+    if fetched is None:
+        results.update({t: (None, False) for t in missing})
+        return results
+    
+    fetched = {t: p for t, p in fetched.items() if p}
+    quote_cache.set_many(fetched)
+    results.update({t: (p, True) for t, p in fetched.items()})
+    # Absent from the batch is not proof the symbol doesn't exist (bonds, mixed markets...)
+    leftovers = [t for t in missing if t not in fetched]
+    for ticker, found in fetch_many(lookup_price, leftovers).items():
+        results[ticker] = found or (None, False)
+    return results
+
+def get_current_prices(tickers: List[str]) -> Dict[str, float]:
+    """
+    Get the current price of several stocks with batched requests.
+    Obtiene el precio actual de varias acciones con peticiones agrupadas.
+    
+    See `get_current_prices_with_age` for the caching semantics.
+    
+    Args:
+        tickers (List[str]): Stock symbols (duplicates are ignored).
         
-        return price
+    Returns:
+        Dict[str, float]: Mapping ticker -> price (None if not found).
+    """
+    return {ticker: quote[0] for ticker, quote in get_current_prices_with_age(tickers).items()}
+
+def get_current_prices_with_age(tickers: List[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Get prices for several stocks together with how old each price is.
+    Obtiene precios de varias acciones junto con la antigüedad de cada uno.
+    
+    Stale-while-revalidate: fresh cached prices are returned as is; expired ones
+    (up to MAX_STALE_AGE old) are returned immediately and refreshed in the
+    background. Only tickers never seen before block on the network: they are
+    downloaded together in a single request, and symbols the batch endpoint
+    cannot resolve (some bonds, funds, etc.) fall back to the single-ticker
+    endpoint, fetched concurrently.
+    
+    Args:
+        tickers (List[str]): Stock symbols (duplicates are ignored).
+        
+    Returns:
+        Dict[str, Tuple[float, float]]: Mapping ticker -> (price, age in seconds).
+            Tickers not found map to (None, None).
+    """
+    unique_tickers = list(dict.fromkeys(t for t in tickers if t))
+    quotes = {}
+    missing = []
+    stale = []
+    
+    for ticker in unique_tickers:
+        cached = _read_cached_price(ticker)
+        last_known = quote_cache.peek(ticker)
+        if cached is not None and last_known is not None:
+            quotes[ticker] = (cached, last_known[1])
+        elif last_known is not None and last_known[1] <= MAX_STALE_AGE:
+            quotes[ticker] = last_known
+            stale.append(ticker)
+        else:
+            missing.append(ticker)
+    
+    if stale:
+        _revalidate_in_background(stale)
+    
+    if missing:
+        for ticker, price in refresh_prices(missing).items():
+            if price:
+                quotes[ticker] = (price, 0.0)
+            elif not _breaker.is_closed():
+                # Provider is down: serve whatever we had, with its real age
+                quotes[ticker] = _last_known_price(ticker)
+            else:
+                quotes[ticker] = (None, None)
+    
+    return quotes
+
+def _revalidate_in_background(tickers: List[str]):
+    """
+    Refresh expired tickers on the revalidation thread without blocking the caller.
+    Actualiza tickers expirados en el hilo de revalidación sin bloquear al llamador.
+    
+    Tickers that already have a revalidation queued are skipped, so repeated
+    renders don't pile up duplicate refreshes.
+    """
+    with _revalidating_lock:
+        pending = [t for t in tickers if t not in _revalidating]
+        _revalidating.update(pending)
+    if not pending:
+        return
+    
+    def task():
+        try:
+            refresh_prices(pending)
+        except Exception as e:
+            print(f"Error revalidating prices for {pending}: {e}")
+        finally:
+            with _revalidating_lock:
+                _revalidating.difference_update(pending)
+    
+    _revalidator.submit(task)
+
+def refresh_prices(tickers: List[str]) -> Dict[str, float]:
+    """
+    Fetch fresh prices for several tickers (ignoring the cache) and store them in it.
+    Obtiene precios frescos de varios tickers (sin mirar la caché) y los guarda en ella.
+    
+    Tickers are downloaded in one batch; those the batch cannot resolve are
+    fetched one by one, concurrently.
+    
+    Args:
+        tickers (List[str]): Stock symbols.
+        
+    Returns:
+        Dict[str, float]: Mapping ticker -> price (None if not found).
+    """
+    tickers = list(dict.fromkeys(t for t in tickers if t))
+    prices = {}
+    if not tickers:
+        return prices
+    
+    try:
+        # Identical batches requested at the same time (e.g. two tabs) share one download
+        fetched = _flights.do(("quotes", tuple(sorted(tickers))),
+                              lambda: _breaker.call(get_provider().get_quotes, tickers))
+    except CircuitOpenError:
+        fetched = {}
     except Exception as e:
-        print(f"Error fetching price for {ticker}: {e}")
-        return None
+        print(f"Error fetching batch prices for {tickers}: {e}")
+        fetched = {}
+    
+    fetched = {t: p for t, p in fetched.items() if p}
+    quote_cache.set_many(fetched)
+    prices.update(fetched)
+    
+    # Not available in the batch (mixed markets, bonds...): single-ticker
+    # endpoint for each of them, concurrently
+    leftovers = [t for t in tickers if not prices.get(t)]
+    if leftovers and _breaker.is_closed():
+        prices.update(fetch_many(_fetch_price, leftovers))
+    else:
+        prices.update({t: None for t in leftovers})
+    
+    return prices
 
 def get_historical_data(ticker: str, period: str = "1y") -> pd.DataFrame:
     """
@@ -59,31 +444,121 @@ def get_historical_data(ticker: str, period: str = "1y") -> pd.DataFrame:
         ticker (str): The stock symbol.
         period (str): The time period to download (default: "1y").
         
+    Bars are served from the local store (src/external/bar_store.py), which only
+    downloads the days missing since the last sync. If the provider is down,
+    the stored bars are returned as they are. Only those downloads go through
+    the circuit breaker: a local database error is not a provider failure.
+    
     Returns:
         pd.DataFrame: DataFrame with historical data (Open, High, Low, Close, Volume).
     """
     try:
-        ticker_obj = yf.Ticker(ticker)
-        history = ticker_obj.history(period=period)
-        return history
+        return _flights.do(("history", ticker, period),
+                           lambda: get_bars(ticker, period, guard=_breaker.call))
+    except CircuitOpenError:
+        pass
     except Exception as e:
         print(f"Error fetching history for {ticker}: {e}")
+    
+    try:
+        return get_bars(ticker, period, sync=False)
+    except Exception as e:
+        print(f"Error reading stored history for {ticker}: {e}")
         return pd.DataFrame()
 
-def get_stock_info(ticker: str) -> dict:
+def get_history_since(ticker: str, start) -> pd.DataFrame:
+    """
+    Get daily bars of a stock from a date until today.
+    Obtiene velas diarias de una acción desde una fecha hasta hoy.
+    
+    Same store and degraded-mode behavior as `get_historical_data`.
+    
+    Args:
+        ticker (str): The stock symbol.
+        start (datetime.date): First date needed (None = full history).
+        
+    Returns:
+        pd.DataFrame: DataFrame with historical data (Open, High, Low, Close, Volume).
+    """
+    try:
+        return _flights.do(("history_since", ticker, start),
+                           lambda: get_bars_since(ticker, start, guard=_breaker.call))
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        print(f"Error fetching history for {ticker}: {e}")
+    
+    try:
+        return get_bars_since(ticker, start, sync=False)
+    except Exception as e:
+        print(f"Error reading stored history for {ticker}: {e}")
+        return pd.DataFrame()
+
+def get_stock_info(ticker: str, refresh: bool = False) -> dict:
     """
     Get detailed info for a stock.
     Obtiene información detallada de una acción.
     
+    Served from the long-lived fundamentals cache (memory + disk) when possible,
+    since sector, name, currency and the like rarely change.
+    
     Args:
         ticker (str): The stock symbol.
+        refresh (bool): Ignore the cache and download the info again.
         
     Returns:
         dict: Dictionary with stock information.
     """
+    if not refresh:
+        cached = fundamentals_cache.get(ticker)
+        if cached is not None:
+            return cached
+    
     try:
-        ticker_obj = yf.Ticker(ticker)
-        return ticker_obj.info
+        info = _flights.do(("info", ticker), lambda: _breaker.call(get_provider().get_info, ticker))
+    except CircuitOpenError:
+        info = None
     except Exception as e:
         print(f"Error fetching info for {ticker}: {e}")
-        return {}
+        info = None
+    
+    if info:
+        fundamentals_cache.set(ticker, info)
+        return info
+    # Provider down or failing: an expired entry beats nothing
+    return fundamentals_cache.get(ticker, ttl=float('inf')) or {}
+
+def get_stock_fields(ticker: str, fields: List[str]) -> dict:
+    """
+    Get only some info fields of a stock (e.g. ["longName", "sector", "currency"]).
+    Obtiene solo algunos campos de información de una acción.
+    
+    Args:
+        ticker (str): The stock symbol.
+        fields (List[str]): Info keys to return.
+        
+    Returns:
+        dict: Mapping field -> value (None if the provider doesn't report it).
+    """
+    return get_many_stock_fields([ticker], fields)[ticker]
+
+def get_many_stock_fields(tickers: List[str], fields: List[str]) -> Dict[str, dict]:
+    """
+    Get some info fields for several stocks: cached tickers are read with a single
+    query, the rest are downloaded concurrently.
+    Obtiene algunos campos de información de varias acciones: los tickers en caché
+    se leen con una sola consulta y el resto se descarga en paralelo.
+    
+    Args:
+        tickers (List[str]): Stock symbols (duplicates are ignored).
+        fields (List[str]): Info keys to return.
+        
+    Returns:
+        Dict[str, dict]: Mapping ticker -> {field: value}.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    infos = fundamentals_cache.get_many(tickers)
+    missing = [t for t in tickers if t not in infos]
+    if missing:
+        infos.update(fetch_many(get_stock_info, missing))
+    return {t: {f: (infos.get(t) or {}).get(f) for f in fields} for t in tickers}
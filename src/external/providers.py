@@ -0,0 +1,300 @@
+import datetime
+import json
+import os
+import zlib
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class MarketDataProvider:
+    """
+    Base interface for market data sources (quotes, daily history and stock info).
+    Interfaz base para fuentes de datos de mercado (cotizaciones, historial diario e info).
+    """
+    name = "base"
+
+    def get_quote(self, ticker: str) -> float:
+        """
+        Returns the current price of a ticker, or None if not found.
+        Devuelve el precio actual de un ticker, o None si no se encuentra.
+        """
+        raise NotImplementedError
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Returns current prices for several tickers. Tickers without a price are omitted.
+        Devuelve los precios actuales de varios tickers. Se omiten los que no tienen precio.
+        """
+        prices = {}
+        for ticker in tickers:
+            price = self.get_quote(ticker)
+            if price:
+                prices[ticker] = price
+        return prices
+
+    def get_history(self, ticker: str, start: datetime.date = None, end: datetime.date = None) -> pd.DataFrame:
+        """
+        Returns daily bars between two dates (inclusive), or the full history if start is None.
+        Devuelve velas diarias entre dos fechas (inclusive), o todo el historial si start es None.
+        """
+        raise NotImplementedError
+
+    def get_info(self, ticker: str) -> dict:
+        """
+        Returns descriptive information about a ticker (name, sector, currency...).
+        Devuelve información descriptiva de un ticker (nombre, sector, moneda...).
+        """
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Default provider backed by Yahoo Finance through `yfinance`.
+    Proveedor por defecto basado en Yahoo Finance mediante `yfinance`.
+    """
+    name = "yfinance"
+
+    def get_quote(self, ticker: str) -> float:
+        # Fast path first: a few KB from the chart endpoint instead of the full .info payload
+        price = self.get_fast_quote(ticker)
+        if price:
+            return price
+        return self.get_info_quote(ticker)
+
+    def get_fast_quote(self, ticker: str) -> float:
+        """
+        Reads the price from the lightweight chart endpoint (5 daily bars + metadata).
+        Lee el precio desde el endpoint liviano de gráficos (5 velas diarias + metadatos).
+        """
+        ticker_obj = yf.Ticker(ticker)
+        bars = ticker_obj.history(period="5d", interval="1d", auto_adjust=False)
+        if bars.empty:
+            return None
+        # Same request already returned the metadata with the live market price
+        metadata = ticker_obj.get_history_metadata() or {}
+        price = metadata.get('regularMarketPrice')
+        if not price:
+            closes = bars['Close'].dropna()
+            price = float(closes.iloc[-1]) if not closes.empty else None
+        return price
+
+    def get_info_quote(self, ticker: str) -> float:
+        """
+        Reads the price from the (slow, heavy) .info endpoint. Used as a fallback.
+        Lee el precio desde el endpoint .info (lento y pesado). Se usa como respaldo.
+        """
+        # Try to get 'currentPrice', fallback to 'regularMarketPrice' or last close
+        # Intenta obtener 'currentPrice', si no, usa 'regularMarketPrice' o el cierre anterior
+        info = yf.Ticker(ticker).info
+        return info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, float]:
+        # One batched download of the latest daily bars
+        data = yf.download(
+            tickers,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True
+        )
+        prices = {}
+        if data is None or data.empty:
+            return prices
+
+        for ticker in tickers:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    closes = data[ticker]['Close']
+                else:
+                    # Single ticker without multi-level columns
+                    closes = data['Close']
+            except KeyError:
+                continue
+            closes = closes.dropna()
+            if not closes.empty:
+                prices[ticker] = float(closes.iloc[-1])
+        return prices
+
+    def get_history(self, ticker: str, start: datetime.date = None, end: datetime.date = None) -> pd.DataFrame:
+        ticker_obj = yf.Ticker(ticker)
+        if start is None:
+            return ticker_obj.history(period="max", auto_adjust=False)
+        # yfinance's end date is exclusive
+        end = (end or datetime.date.today()) + datetime.timedelta(days=1)
+        return ticker_obj.history(start=start, end=end, auto_adjust=False)
+
+    def get_info(self, ticker: str) -> dict:
+        return yf.Ticker(ticker).info
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Deterministic offline provider that replays recorded or synthetic market data.
+    Proveedor offline determinístico que reproduce datos de mercado grabados o sintéticos.
+
+    Recorded data is read from `data_dir`:
+        quotes.json        {"AAPL": 187.3, ...}
+        info.json          {"AAPL": {"longName": ..., "sector": ...}, ...}
+        bars/<TICKER>.csv  Date,Open,High,Low,Close,Volume
+
+    Tickers that were not recorded get a synthetic random walk seeded by the ticker
+    name (when `synthetic` is True), so the same ticker always yields the same
+    prices. Useful for tests, benchmarks and running the app without network.
+    """
+    name = "replay"
+
+    def __init__(self, data_dir: str = None, synthetic: bool = True, history_days: int = 5 * 365,
+                 end_date: datetime.date = None):
+        self.data_dir = data_dir
+        self.synthetic = synthetic
+        self.history_days = history_days
+        self.end_date = end_date or datetime.date.today()
+        self._quotes = self._read_json("quotes.json")
+        self._info = self._read_json("info.json")
+        self._bars = {}
+
+    def _read_json(self, filename: str) -> dict:
+        """
+        Loads a JSON file from the data directory, or an empty dict if missing.
+        Carga un archivo JSON del directorio de datos, o un dict vacío si no existe.
+        """
+        if not self.data_dir:
+            return {}
+        path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _synthetic_bars(self, ticker: str) -> pd.DataFrame:
+        """
+        Generates a reproducible daily random walk for a ticker.
+        Genera una caminata aleatoria diaria reproducible para un ticker.
+        """
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        start = self.end_date - datetime.timedelta(days=self.history_days)
+        index = pd.bdate_range(start, self.end_date, name='Date')
+        base = rng.uniform(5, 500)
+        closes = base * np.exp(np.cumsum(rng.normal(0, 0.015, len(index))))
+        opens = closes * (1 + rng.normal(0, 0.005, len(index)))
+        spread = np.abs(rng.normal(0, 0.01, len(index))) * closes
+        return pd.DataFrame({
+            'Open': opens,
+            'High': np.maximum(opens, closes) + spread,
+            'Low': np.minimum(opens, closes) - spread,
+            'Close': closes,
+            'Volume': rng.integers(1_000, 1_000_000, len(index)).astype(float)
+        }, index=index)
+
+    def _all_bars(self, ticker: str) -> pd.DataFrame:
+        """
+        Returns the recorded bars of a ticker, falling back to synthetic ones.
+        Devuelve las velas grabadas de un ticker, o sintéticas si no hay grabación.
+        """
+        if ticker not in self._bars:
+            bars = pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+            path = os.path.join(self.data_dir, "bars", f"{ticker}.csv") if self.data_dir else None
+            if path and os.path.exists(path):
+                bars = pd.read_csv(path, index_col='Date', parse_dates=True)[BAR_COLUMNS]
+            elif self.synthetic:
+                bars = self._synthetic_bars(ticker)
+            self._bars[ticker] = bars
+        return self._bars[ticker]
+
+    def get_quote(self, ticker: str) -> float:
+        if ticker in self._quotes:
+            return self._quotes[ticker]
+        bars = self._all_bars(ticker)
+        if bars.empty:
+            return None
+        return float(bars['Close'].iloc[-1])
+
+    def get_history(self, ticker: str, start: datetime.date = None, end: datetime.date = None) -> pd.DataFrame:
+        bars = self._all_bars(ticker)
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start)]
+        if end is not None:
+            bars = bars[bars.index <= pd.Timestamp(end)]
+        return bars.copy()
+
+    def get_info(self, ticker: str) -> dict:
+        if ticker in self._info:
+            return dict(self._info[ticker])
+        if not self.synthetic:
+            return {}
+        price = self.get_quote(ticker)
+        return {
+            "symbol": ticker,
+            "shortName": ticker,
+            "longName": ticker,
+            "currency": "ARS" if ticker.endswith(".BA") else "USD",
+            "currentPrice": price,
+            "regularMarketPrice": price
+        }
+
+
+def record_provider_data(source: MarketDataProvider, tickers: List[str], data_dir: str,
+                         start: datetime.date = None):
+    """
+    Records quotes, info and daily bars from a provider into a replay directory.
+    Graba cotizaciones, info y velas diarias de un proveedor en un directorio de replay.
+
+    Args:
+        source (MarketDataProvider): Provider to record from (usually YFinanceProvider).
+        tickers (List[str]): Symbols to record.
+        data_dir (str): Output directory readable by ReplayProvider.
+        start (datetime.date): First date of the recorded history (None = full history).
+    """
+    os.makedirs(os.path.join(data_dir, "bars"), exist_ok=True)
+    quotes, info = {}, {}
+    for ticker in tickers:
+        try:
+            quotes[ticker] = source.get_quote(ticker)
+            info[ticker] = source.get_info(ticker)
+            bars = source.get_history(ticker, start)
+            if not bars.empty:
+                bars = bars[BAR_COLUMNS].copy()
+                bars.index = pd.DatetimeIndex([ts.date() for ts in bars.index], name='Date')
+                bars.to_csv(os.path.join(data_dir, "bars", f"{ticker}.csv"))
+        except Exception as e:
+            print(f"Error recording {ticker}: {e}")
+
+    with open(os.path.join(data_dir, "quotes.json"), 'w') as f:
+        json.dump(quotes, f, indent=2)
+    with open(os.path.join(data_dir, "info.json"), 'w') as f:
+        json.dump(info, f, indent=2, default=str)
+
+
+def _provider_from_env() -> MarketDataProvider:
+    """
+    Builds the default provider. Set MARKET_DATA_PROVIDER=replay (and optionally
+    MARKET_DATA_REPLAY_DIR) to run offline.
+    Construye el proveedor por defecto. Usa MARKET_DATA_PROVIDER=replay (y opcionalmente
+    MARKET_DATA_REPLAY_DIR) para trabajar sin conexión.
+    """
+    if os.environ.get("MARKET_DATA_PROVIDER", "yfinance").lower() == "replay":
+        return ReplayProvider(os.environ.get("MARKET_DATA_REPLAY_DIR"))
+    return YFinanceProvider()
+
+
+_provider = _provider_from_env()
+
+def get_provider() -> MarketDataProvider:
+    """
+    Returns the active market data provider.
+    Devuelve el proveedor de datos de mercado activo.
+    """
+    return _provider
+
+def set_provider(provider: MarketDataProvider):
+    """
+    Replaces the active market data provider (e.g. ReplayProvider for tests).
+    Reemplaza el proveedor de datos de mercado activo (ej. ReplayProvider para tests).
+    """
+    global _provider
+    _provider = provider
@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class QuoteCache:
+    """
+    Process-wide price cache shared by every Streamlit session.
+    Caché de precios a nivel de proceso compartida por todas las sesiones de Streamlit.
+
+    Entries expire after `ttl` seconds and the least recently used ticker is evicted
+    once `maxsize` entries are stored. A refresh calls `invalidate()`, which starts a
+    new generation: prices fetched before it are treated as expired, but nothing is
+    deleted, so the first reader of the new generation refetches once for everyone.
+
+    When `persistent` is enabled, quotes are also written to the `CachedQuote` table
+    so other processes (or a restarted app) can reuse them within the same TTL window.
+    """
+    def __init__(self, maxsize: int = 512, ttl: int = 30, persistent: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persistent = persistent
+        self._entries = OrderedDict()  # ticker -> (price, timestamp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._generation_started = 0.0
+        self.version = 0  # Bumped on every write/invalidation, lets consumers detect price changes
+
+    def configure(self, maxsize: int = None, ttl: int = None, persistent: bool = None):
+        """
+        Updates the cache settings. Arguments left as None keep their current value.
+        Actualiza la configuración de la caché. Los argumentos en None no se modifican.
+        """
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            if persistent is not None:
+                self.persistent = persistent
+            self._evict_overflow()
+
+        if persistent:
+            # Make sure the backing table exists on databases created before it was added
+            try:
+                from src.models.database import CachedQuote
+                CachedQuote.create_table(safe=True)
+            except Exception as e:
+                print(f"Error creating quote cache table: {e}")
+                self.persistent = False
+
+    def get(self, ticker: str, ttl: int = None) -> Optional[float]:
+        """
+        Returns the cached price for a ticker if it has not expired.
+        Devuelve el precio en caché de un ticker si no ha expirado.
+
+        Args:
+            ticker (str): Stock symbol.
+            ttl (int): Optional TTL override in seconds.
+
+        Returns:
+            float: Cached price or None if missing/expired.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and self._is_fresh(entry[1], now, ttl):
+                self._entries.move_to_end(ticker)
+                self.hits += 1
+                return entry[0]
+
+        # Not in memory: try the on-disk cache shared with other processes
+        if self.persistent:
+            stored = self._load_from_disk(ticker)
+            if stored is not None and self._is_fresh(stored[1], now, ttl):
+                with self._lock:
+                    self._store(ticker, stored[0], stored[1])
+                    self.hits += 1
+                return stored[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek(self, ticker: str, include_invalidated: bool = False) -> Optional[Tuple[float, float]]:
+        """
+        Returns the last known price and its age, even past its TTL (no hit/miss counted).
+        Devuelve el último precio conocido y su antigüedad, aunque haya vencido su TTL.
+
+        Entries from before the last `invalidate()` are not returned: an explicit
+        invalidation means the caller wants fresh data, not a stale fallback.
+        Pass `include_invalidated=True` when any known price beats none (e.g. the
+        provider is down).
+
+        Returns:
+            Tuple[float, float]: (price, age in seconds), or None if there is no
+                entry for the current generation.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+        if entry is None and self.persistent:
+            entry = self._load_from_disk(ticker)
+        if entry is None or (entry[1] < self._generation_started and not include_invalidated):
+            return None
+        return entry[0], max(0.0, time.time() - entry[1])
+
+    def set(self, ticker: str, price: float, timestamp: float = None):
+        """
+        Stores a price for a ticker.
+        Almacena el precio de un ticker.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._store(ticker, price, timestamp)
+            self.version += 1
+        if self.persistent:
+            self._save_to_disk(ticker, price, timestamp)
+
+    def set_many(self, prices: Dict[str, float], timestamp: float = None):
+        """
+        Stores several prices at once (one transaction on the disk cache).
+        Almacena varios precios a la vez (una transacción en la caché en disco).
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        prices = {t: p for t, p in prices.items() if p}
+        with self._lock:
+            for ticker, price in prices.items():
+                self._store(ticker, price, timestamp)
+            if prices:
+                self.version += 1
+        if self.persistent and prices:
+            try:
+                from src.models.database import CachedQuote
+                rows = [{"ticker": t, "price": p, "fetched_at": timestamp} for t, p in prices.items()]
+                with CachedQuote._meta.database.atomic():
+                    for i in range(0, len(rows), 300):
+                        CachedQuote.replace_many(rows[i:i + 300]).execute()
+            except Exception as e:
+                print(f"Error saving cached quotes: {e}")
+
+    def invalidate(self, max_age: float = None) -> int:
+        """
+        Starts a new generation so every price fetched before now is refetched on
+        its next read. Entries are kept (not wiped).
+        Inicia una nueva generación para que todo precio obtenido antes de ahora se
+        vuelva a consultar en su próxima lectura. Las entradas se conservan.
+
+        Args:
+            max_age (float): Only start a new generation if the current one is older
+                than this many seconds. Lets several sessions request a refresh on the
+                same interval without each of them triggering its own refetch.
+
+        Returns:
+            int: The current generation number.
+        """
+        now = time.time()
+        with self._lock:
+            if max_age is None or now - self._generation_started >= max_age:
+                self.generation += 1
+                self._generation_started = now
+                self.version += 1
+            return self.generation
+
+    def clear(self):
+        """
+        Removes every cached price (memory and disk).
+        Elimina todos los precios en caché (memoria y disco).
+        """
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+        if self.persistent:
+            try:
+                from src.models.database import CachedQuote
+                CachedQuote.delete().execute()
+            except Exception as e:
+                print(f"Error clearing quote cache table: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns hit/miss counters and current size.
+        Devuelve los contadores de aciertos/fallos y el tamaño actual.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "generation": self.generation
+            }
+
+    def _is_fresh(self, timestamp: float, now: float, ttl: float) -> bool:
+        """
+        Checks that an entry is within its TTL and belongs to the current generation.
+        Verifica que una entrada esté dentro de su TTL y pertenezca a la generación actual.
+        """
+        return now - timestamp <= ttl and timestamp >= self._generation_started
+
+    def _store(self, ticker: str, price: float, timestamp: float):
+        """
+        Inserts an entry and evicts the LRU ones. Caller must hold the lock.
+        Inserta una entrada y expulsa las menos usadas. Requiere tener el lock.
+        """
+        self._entries[ticker] = (price, timestamp)
+        self._entries.move_to_end(ticker)
+        self._evict_overflow()
+
+    def _evict_overflow(self):
+        """
+        Evicts least recently used entries above `maxsize`. Caller must hold the lock.
+        Expulsa las entradas menos usadas por encima de `maxsize`. Requiere tener el lock.
+        """
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_from_disk(self, ticker: str):
+        """
+        Reads a (price, timestamp) tuple from the CachedQuote table.
+        Lee una tupla (precio, timestamp) de la tabla CachedQuote.
+        """
+        try:
+            from src.models.database import CachedQuote
+            row = CachedQuote.get_or_none(CachedQuote.ticker == ticker)
+            if row:
+                return row.price, row.fetched_at
+        except Exception as e:
+            print(f"Error reading cached quote for {ticker}: {e}")
+        return None
+
+    def _save_to_disk(self, ticker: str, price: float, timestamp: float):
+        """
+        Upserts a quote into the CachedQuote table.
+        Inserta o actualiza una cotización en la tabla CachedQuote.
+        """
+        try:
+            from src.models.database import CachedQuote
+            CachedQuote.replace(ticker=ticker, price=price, fetched_at=timestamp).execute()
+        except Exception as e:
+            print(f"Error saving cached quote for {ticker}: {e}")
+
+
+# Shared instance used by market_data and the UI
+quote_cache = QuoteCache()
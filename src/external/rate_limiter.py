@@ -0,0 +1,54 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Limitador de tasa tipo token bucket, seguro entre hilos.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short bursts
+    of `capacity` requests go through immediately and sustained traffic is capped at
+    `rate` requests per second.
+    """
+    def __init__(self, rate: float = 5.0, capacity: int = 10):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """
+        Adds the tokens accumulated since the last refill. Caller must hold the lock.
+        Suma los tokens acumulados desde la última recarga. Requiere tener el lock.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Waits until a token is available and consumes it.
+        Espera hasta que haya un token disponible y lo consume.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None = wait forever).
+
+        Returns:
+            bool: True if a token was acquired, False if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
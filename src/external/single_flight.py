@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Callable, Hashable
+
+class _Call:
+    """
+    A fetch in progress (or recently finished) that callers can wait on.
+    Una consulta en curso (o recién terminada) que los llamadores pueden esperar.
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    """
+    Coalesces duplicate calls: concurrent (or repeated within `window` seconds)
+    requests for the same key share a single execution.
+    Agrupa llamadas duplicadas: pedidos concurrentes (o repetidos dentro de `window`
+    segundos) para la misma clave comparten una única ejecución.
+    """
+    def __init__(self, window: float = 0.0):
+        self.window = window
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable):
+        """
+        Runs `fn()` for a key, or waits for and returns the result of the call
+        already in flight for it.
+        Ejecuta `fn()` para una clave, o espera y devuelve el resultado de la
+        llamada que ya está en curso para ella.
+
+        Args:
+            key (Hashable): Identifies equivalent calls (e.g. ("quote", "AAPL")).
+            fn (Callable): Function without arguments that performs the fetch.
+
+        Returns:
+            The result of `fn()`. Exceptions are re-raised to every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None and \
+                    time.monotonic() - call.finished_at > self.window:
+                call = None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                owner = True
+                self.executions += 1
+            else:
+                owner = False
+                self.shared += 1
+
+        if not owner:
+            call.event.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    call.finished_at = time.monotonic()
+                    if self.window <= 0:
+                        self._calls.pop(key, None)
+                    else:
+                        self._purge_expired()
+                call.event.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def forget(self, key: Hashable = None):
+        """
+        Drops finished results so the next call runs again (all keys if None).
+        Descarta resultados terminados para que la próxima llamada se ejecute de nuevo.
+        """
+        with self._lock:
+            keys = list(self._calls) if key is None else [key]
+            for k in keys:
+                call = self._calls.get(k)
+                if call is not None and call.finished_at is not None:
+                    del self._calls[k]
+
+    def _purge_expired(self):
+        """
+        Removes finished calls older than the window. Caller must hold the lock.
+        Elimina llamadas terminadas más viejas que la ventana. Requiere tener el lock.
+        """
+        now = time.monotonic()
+        expired = [k for k, c in self._calls.items()
+                   if c.finished_at is not None and now - c.finished_at > self.window]
+        for k in expired:
+            del self._calls[k]
@@ -1,7 +1,35 @@
 from peewee import *
 import datetime
 
-db = SqliteDatabase('finance.db')
+# Settings of every connection to the app database. Streamlit serves each session (and
+# the background refreshers run) on its own thread, and peewee keeps one connection per
+# thread: WAL lets readers run while a writer commits, write transactions take the write
+# lock up front (BEGIN IMMEDIATE) and a busy connection waits instead of failing.
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'wal'),
+    ('synchronous', 'normal'),          # Safe with WAL: only the last commits can be lost on power failure
+    ('cache_size', -64 * 1024),         # 64 MB page cache (negative = KiB)
+    ('mmap_size', 256 * 1024 * 1024),   # Read pages through a 256 MB memory map
+    ('temp_store', 'memory'),
+)
+BUSY_TIMEOUT = 15 # Seconds a connection waits for a lock before "database is locked"
+
+class FinanceDatabase(SqliteDatabase):
+    """
+    SqliteDatabase whose transactions start with BEGIN IMMEDIATE unless told otherwise.
+    SqliteDatabase cuyas transacciones empiezan con BEGIN IMMEDIATE salvo indicación contraria.
+    """
+    def begin(self, lock_type=None):
+        super().begin(lock_type or 'IMMEDIATE')
+
+def open_database(path: str) -> SqliteDatabase:
+    """
+    SQLite database with the app's connection settings (one connection per thread).
+    Base SQLite con la configuración de conexión de la app (una conexión por hilo).
+    """
+    return FinanceDatabase(path, pragmas=SQLITE_PRAGMAS, timeout=BUSY_TIMEOUT, thread_safe=True)
+
+db = open_database('finance.db')
 
 class BaseModel(Model):
     class Meta:
@@ -17,6 +45,11 @@ class PortfolioItem(BaseModel):
     target_price = FloatField(null=True)
     updated_at = DateTimeField(default=datetime.datetime.now)
 
+    class Meta:
+        indexes = (
+            (('ticker', 'broker'), True), # One position per ticker and broker
+        )
+
 class WishlistItem(BaseModel):
     ticker = CharField(unique=True)
     target_price = FloatField(null=True)
@@ -31,6 +64,11 @@ class Transaction(BaseModel):
     broker = CharField()
     category = CharField()
 
+    class Meta:
+        indexes = (
+            (('ticker', 'broker', 'date'), False), # Per-position ledger in date order (and ticker lookups)
+        )
+
 class BibliographyItem(BaseModel):
     title = CharField()
     author = CharField()
@@ -40,6 +78,176 @@ class BibliographyItem(BaseModel):
     description = TextField(null=True)
     added_at = DateTimeField(default=datetime.datetime.now)
 
-def init_db():
-    db.connect()
-    db.create_tables([PortfolioItem, WishlistItem, Transaction, BibliographyItem])
+class CachedQuote(BaseModel):
+    ticker = CharField(unique=True)
+    price = FloatField()
+    fetched_at = FloatField() # Unix timestamp
+
+class CachedFundamentals(BaseModel):
+    ticker = CharField(unique=True)
+    data = TextField() # JSON-encoded info dict
+    fetched_at = FloatField() # Unix timestamp
+
+class PriceBar(BaseModel):
+    ticker = CharField()
+    date = DateField()
+    open = FloatField()
+    high = FloatField()
+    low = FloatField()
+    close = FloatField()
+    volume = FloatField(default=0.0)
+
+    class Meta:
+        indexes = (
+            (('ticker', 'date'), True), # One daily bar per ticker
+        )
+
+class BarCoverage(BaseModel):
+    ticker = CharField(unique=True)
+    start_date = DateField() # First date requested from the provider
+    end_date = DateField() # Last date synced
+    fetched_at = DateTimeField(default=datetime.datetime.now)
+
+class KnownTicker(BaseModel):
+    ticker = CharField(unique=True)
+    last_price = FloatField(null=True)
+    validated_at = DateTimeField(default=datetime.datetime.now)
+
+class PortfolioValue(BaseModel):
+    date = DateField()
+    currency = CharField() # Currency of the holdings in this row (ARS for .BA tickers, else USD)
+    value = FloatField() # Market value of the ledger positions at that day's close
+    invested = FloatField() # Net cash put in (buys - sells) up to that day
+    complete = BooleanField(default=True) # False if a held ticker had no close (valued at its last trade)
+
+    class Meta:
+        indexes = (
+            (('date', 'currency'), True), # One value per day and currency
+        )
+
+class TaxLot(BaseModel):
+    ticker = CharField()
+    broker = CharField()
+    method = CharField() # FIFO / LIFO / AVERAGE
+    transaction_id = IntegerField() # Buy that opened the lot
+    open_date = DateTimeField()
+    quantity = FloatField() # Still open
+    price = FloatField() # Unit cost
+
+    class Meta:
+        indexes = (
+            (('ticker', 'broker', 'method'), False),
+        )
+
+class RealizedLot(BaseModel):
+    ticker = CharField()
+    broker = CharField()
+    method = CharField()
+    transaction_id = IntegerField() # Sell that closed (part of) the lot
+    open_date = DateTimeField()
+    date = DateTimeField()
+    quantity = FloatField()
+    cost = FloatField() # Cost basis of the quantity sold
+    proceeds = FloatField()
+
+    class Meta:
+        indexes = (
+            (('ticker', 'broker', 'method'), False),
+        )
+
+class LotState(BaseModel):
+    ticker = CharField()
+    broker = CharField()
+    method = CharField()
+    last_date = DateTimeField() # Last transaction applied (ledger order is date, id)
+    last_id = IntegerField()
+    max_id = IntegerField() # Highest transaction id applied
+    count = IntegerField() # Transactions applied
+
+    class Meta:
+        indexes = (
+            (('ticker', 'broker', 'method'), True),
+        )
+
+class SchemaVersion(BaseModel):
+    version = IntegerField(primary_key=True) # Migration number (see src/models/migrations.py)
+    description = CharField()
+    applied_at = DateTimeField(default=datetime.datetime.now)
+
+    class Meta:
+        table_name = 'schema_version'
+
+ALL_MODELS = [PortfolioItem, WishlistItem, Transaction, BibliographyItem, CachedQuote, CachedFundamentals,
+              PriceBar, BarCoverage, KnownTicker, PortfolioValue, TaxLot, RealizedLot, LotState, SchemaVersion]
+
+def insert_rows(model, columns, rows):
+    """
+    Inserts many rows (tuples in `columns` order) with one prepared statement.
+    For large batches this is much faster than insert_many, whose SQL generation dominates.
+    Inserta muchas filas (tuplas en el orden de `columns`) con una sola sentencia preparada.
+    """
+    fields = model._meta.fields
+    sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+        model._meta.table_name,
+        ", ".join(f'"{fields[c].column_name}"' for c in columns),
+        ", ".join("?" for _ in columns))
+    model._meta.database.cursor().executemany(sql, rows)
+
+def merge_duplicate_positions(dry_run: bool = False):
+    """
+    Merges PortfolioItem rows that share ticker and broker into the oldest one (quantities
+    summed, avg_price weighted by quantity), so the unique (ticker, broker) index can be built.
+    Fusiona las posiciones repetidas por ticker y broker en la más antigua.
+
+    Returns:
+        list: (ticker, broker, rows merged, quantity, avg_price) per merged position.
+    """
+    if not PortfolioItem.table_exists():
+        return []
+    duplicates = (PortfolioItem
+                  .select(PortfolioItem.ticker, PortfolioItem.broker)
+                  .group_by(PortfolioItem.ticker, PortfolioItem.broker)
+                  .having(fn.COUNT(PortfolioItem.id) > 1)
+                  .tuples())
+    merged = []
+    with PortfolioItem._meta.database.atomic():
+        for ticker, broker in list(duplicates):
+            items = list(PortfolioItem.select()
+                         .where((PortfolioItem.ticker == ticker) & (PortfolioItem.broker == broker))
+                         .order_by(PortfolioItem.id))
+            keep = items[0]
+            quantity = sum(item.quantity for item in items)
+            cost = sum(item.quantity * item.avg_price for item in items)
+            avg_price = cost / quantity if quantity else keep.avg_price
+            merged.append((ticker, broker, len(items), quantity, avg_price))
+            if dry_run:
+                continue
+            keep.quantity = quantity
+            keep.avg_price = avg_price
+            keep.target_price = next((i.target_price for i in items if i.target_price is not None), None)
+            keep.save()
+            PortfolioItem.delete().where(PortfolioItem.id.in_([item.id for item in items[1:]])).execute()
+    return merged
+
+def ensure_indexes(dry_run: bool = False):
+    """
+    Brings an existing database up to the indexes declared on the models: merges duplicate
+    positions and creates any missing index (CREATE INDEX IF NOT EXISTS).
+    Crea los índices declarados en los modelos en una base existente.
+    """
+    merged = merge_duplicate_positions(dry_run)
+    if not dry_run:
+        for model in (PortfolioItem, Transaction):
+            if model.table_exists():
+                model._schema.create_indexes(safe=True)
+    return merged
+
+def init_db(dry_run: bool = False):
+    """
+    Connects and brings the schema up to date (creates a new database or applies the
+    pending migrations). With dry_run, only lists the pending migrations.
+    Conecta y actualiza el esquema (crea la base o aplica las migraciones pendientes).
+    """
+    from src.models.migrations import migrate_schema
+    db.connect(reuse_if_open=True)
+    return migrate_schema(dry_run=dry_run)
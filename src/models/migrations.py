@@ -0,0 +1,145 @@
+"""
+Versioned schema migrations, applied by init_db.
+Migraciones versionadas del esquema, aplicadas por init_db.
+
+Each migration has a number, a description and a function that changes the schema
+of an existing database. Applied numbers are stored in the schema_version table, so
+every pending migration runs once, in order, and all of them in one transaction (a
+failure leaves the database as it was). A new database is created straight from the
+models and stamped with every version.
+
+To change the schema: update the model in database.py and append a migration here
+(it must also work on databases where the change was already made by hand).
+"""
+from typing import List, Tuple
+from peewee import CharField, FloatField
+from playhouse.migrate import SqliteMigrator, migrate
+
+from src.models.database import (ALL_MODELS, PortfolioItem, WishlistItem, Transaction, PortfolioValue,
+                                 SchemaVersion, ensure_indexes)
+
+def _add_column(model, name: str, field):
+    """
+    Adds a column unless the table is missing (it will be created whole) or already has it.
+    Agrega una columna salvo que falte la tabla (se creará completa) o ya la tenga.
+    """
+    database = model._meta.database
+    table = model._meta.table_name
+    if not model.table_exists() or name in {column.name for column in database.get_columns(table)}:
+        return
+    migrate(SqliteMigrator(database).add_column(table, name, field))
+
+def _position_broker_and_avg_price():
+    """
+    1: positions gain a broker and an average purchase price.
+    1: las posiciones suman broker y precio promedio de compra.
+    """
+    _add_column(PortfolioItem, 'broker', CharField(default='Unknown'))
+    _add_column(PortfolioItem, 'avg_price', FloatField(default=0.0))
+
+def _position_target_price():
+    """
+    2: positions gain an optional target price.
+    2: las posiciones suman un precio objetivo opcional.
+    """
+    _add_column(PortfolioItem, 'target_price', FloatField(null=True))
+
+def _wishlist_target_price():
+    """
+    3: wishlist items gain an optional target price.
+    3: los items de la wishlist suman un precio objetivo opcional.
+    """
+    _add_column(WishlistItem, 'target_price', FloatField(null=True))
+
+def _transaction_table():
+    """
+    4: creates the transaction ledger.
+    4: crea el libro de operaciones.
+    """
+    Transaction.create_table(safe=True)
+
+def _position_and_ledger_indexes():
+    """
+    5: indexes positions and the ledger, merging duplicate positions first (see ensure_indexes).
+    5: indexa posiciones y libro, fusionando antes las posiciones repetidas (ver ensure_indexes).
+    """
+    ensure_indexes()
+
+def _value_series_per_currency():
+    """
+    6: recreates the value series table keyed by (date, currency). Its rows are derived
+    from the ledger and the bar store, so they are rebuilt on the next read.
+    6: recrea la tabla de la serie de valor por (fecha, moneda); se reconstruye al leerla.
+    """
+    PortfolioValue.drop_table(safe=True)
+    PortfolioValue.create_table()
+
+# (version, description, function), in the order they must run. Never renumber.
+MIGRATIONS = [
+    (1, "PortfolioItem broker and avg_price", _position_broker_and_avg_price),
+    (2, "PortfolioItem target_price", _position_target_price),
+    (3, "WishlistItem target_price", _wishlist_target_price),
+    (4, "Transaction table", _transaction_table),
+    (5, "Position and ledger indexes (merges duplicate positions)", _position_and_ledger_indexes),
+    (6, "PortfolioValue per currency with completeness flag (rebuilt)", _value_series_per_currency),
+]
+
+def _applied_versions() -> set:
+    """
+    Migration numbers recorded in schema_version (empty before versioning).
+    Números de migración registrados en schema_version (vacío antes del versionado).
+    """
+    if not SchemaVersion.table_exists():
+        return set()
+    return {version for version, in SchemaVersion.select(SchemaVersion.version).tuples()}
+
+def pending_migrations() -> List[Tuple[int, str]]:
+    """
+    Migrations not yet applied, as (version, description).
+    Migraciones todavía no aplicadas, como (versión, descripción).
+    """
+    applied = _applied_versions()
+    return [(version, description) for version, description, _ in MIGRATIONS if version not in applied]
+
+def migrate_schema(dry_run: bool = False) -> List[Tuple[int, str]]:
+    """
+    Brings the database up to the latest version: a new database is created from the
+    models, an existing one gets its pending migrations (one transaction). Up to date,
+    this costs a single query.
+    Lleva la base a la última versión: una base nueva se crea desde los modelos y una
+    existente recibe sus migraciones pendientes (en una sola transacción).
+
+    Args:
+        dry_run (bool): Only report what would be applied.
+
+    Returns:
+        List[Tuple[int, str]]: (version, description) applied (or pending, with dry_run).
+    """
+    pending = pending_migrations()
+    if dry_run or not pending:
+        return pending
+
+    database = SchemaVersion._meta.database
+    with database.atomic():
+        # Re-read under the write lock: another process may have migrated meanwhile
+        pending = pending_migrations()
+        if not pending:
+            return pending
+        if not PortfolioItem.table_exists():
+            database.create_tables(ALL_MODELS)
+        else:
+            steps = {version: function for version, _, function in MIGRATIONS}
+            for version, _ in pending:
+                steps[version]()
+            SchemaVersion.create_table(safe=True)
+            database.create_tables(ALL_MODELS)  # Tables added since the database was created
+        SchemaVersion.insert_many([{"version": version, "description": description}
+                                   for version, description in pending]).execute()
+    return pending
+
+def current_version() -> int:
+    """
+    Highest applied migration (0 for a database that predates versioning).
+    Migración aplicada más alta (0 para una base anterior al versionado).
+    """
+    return max(_applied_versions(), default=0)
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+# Ensure the project root is in sys.path so we can import the 'src' package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.backup import BACKUP_DIR, KEEP_BACKUPS, backup_database, restore_backup, list_backups, check_integrity
+
+def main():
+    """Online backup and verified restore of finance.db (safe while the app is running).
+    backup: copy the database to backups/ and keep the newest --keep copies.
+    restore: check a backup's integrity, save the current database and replace it.
+    list: show the backups and whether each one passes the integrity check.
+    """
+    parser = argparse.ArgumentParser(description="Back up or restore finance.db.")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="Backup directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backup = commands.add_parser("backup", help="Back up the database now.")
+    backup.add_argument("--keep", type=int, default=KEEP_BACKUPS, help="Backups to keep.")
+    restore = commands.add_parser("restore", help="Restore a backup (verified).")
+    restore.add_argument("backup_path")
+    commands.add_parser("list", help="List backups and check their integrity.")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "backup":
+            report = backup_database(args.dir, keep=args.keep)
+            print(f"[SUCCESS] {report['path']}: {report['size'] / 1e6:.1f} MB, {report['pages']} pages in "
+                  f"{report['steps']} steps ({report['restarts']} restarts), {report['duration']:.2f}s.")
+            for path in report["removed"]:
+                print(f"[INFO] Removed old backup {path}")
+        elif args.command == "restore":
+            report = restore_backup(args.backup_path, backup_dir=args.dir)
+            if report["previous"]:
+                print(f"[INFO] Previous database saved to {report['previous']}")
+            print(f"[SUCCESS] Restored {args.backup_path} ({report['size'] / 1e6:.1f} MB, "
+                  f"{report['duration']:.2f}s). Integrity check passed. Restart the app to reload its caches.")
+        else:
+            for path in list_backups(args.dir):
+                problems = check_integrity(path)
+                print(f"{path}  {os.path.getsize(path) / 1e6:8.1f} MB  {'ok' if not problems else problems[0]}")
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
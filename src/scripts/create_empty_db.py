@@ -1,12 +1,12 @@
 import os
-from peewee import SqliteDatabase
 import sys
 # Ensure the project root is in sys.path so we can import the 'src' package
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.models.database import PortfolioItem, WishlistItem, Transaction, BibliographyItem
+from src.models.database import open_database, ALL_MODELS
+from src.models.migrations import migrate_schema
 
 def create_empty_db(db_path: str = "finance.db"):
     """Create an empty SQLite database (finance.db) with the required tables but no data.
@@ -18,15 +18,19 @@ def create_empty_db(db_path: str = "finance.db"):
     if os.path.exists(db_path):
         print(f"[INFO] Database file '{db_path}' already exists. It will be overwritten.")
         os.remove(db_path)
+    # WAL mode keeps the last writes of the old file in side files
+    for side_file in (db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(side_file):
+            os.remove(side_file)
 
-    empty_db = SqliteDatabase(db_path)
+    empty_db = open_database(db_path)
 
     # Rebind models to the new database instance
-    for model in [PortfolioItem, WishlistItem, Transaction, BibliographyItem]:
+    for model in ALL_MODELS:
         model._meta.database = empty_db
 
     empty_db.connect()
-    empty_db.create_tables([PortfolioItem, WishlistItem, Transaction, BibliographyItem])
+    migrate_schema() # Creates every table at the latest schema version
     empty_db.close()
     print(f"[SUCCESS] Empty database created at '{db_path}'.")
 
@@ -0,0 +1,37 @@
+import argparse
+import os
+import sys
+# Ensure the project root is in sys.path so we can import the 'src' package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import init_db
+from src.services.importer import read_transactions_csv, import_transactions
+
+def main():
+    """Bulk-import transactions from a CSV (e.g. a broker statement export) into finance.db.
+    Columns: date, ticker, operation_type (Compra/Venta), quantity, price, broker[, category].
+    """
+    parser = argparse.ArgumentParser(description="Import transactions from a CSV file.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--skip-invalid", action="store_true", help="Import valid rows even if some rows fail.")
+    parser.add_argument("--dry-run", action="store_true", help="Only validate the file.")
+    args = parser.parse_args()
+
+    init_db()
+    report = import_transactions(read_transactions_csv(args.csv_path),
+                                 skip_invalid=args.skip_invalid, dry_run=args.dry_run)
+
+    for row, error in report["errors"].itertuples(index=False):
+        print(f"[ERROR] Row {row}: {error}")
+    if not report["errors"].empty and not args.skip_invalid:
+        print("[INFO] Nothing imported. Fix the rows above or use --skip-invalid.")
+        sys.exit(1)
+    action = "Would import" if args.dry_run else "Imported"
+    print(f"[SUCCESS] {action} {report['imported']} transactions "
+          f"({report['duplicates']} already stored, {len(report['positions'])} positions).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+# Ensure the project root is in sys.path so we can import the 'src' package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import db, init_db
+from src.models.migrations import current_version, MIGRATIONS
+
+def main():
+    """Brings finance.db up to the latest schema version (the app also does this at startup).
+    With --dry-run, only lists the pending migrations.
+    """
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the pending migrations.")
+    args = parser.parse_args()
+
+    try:
+        pending = init_db(dry_run=args.dry_run)
+        print(f"[INFO] Schema version {current_version()} (latest {MIGRATIONS[-1][0]}).")
+        for version, description in pending:
+            print(f"[{'PENDING' if args.dry_run else 'APPLIED'}] {version}: {description}")
+        if not pending:
+            print("Schema is up to date.")
+    except Exception as e:
+        print(f"Migration failed (nothing was changed): {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+# Where scheduled and manual backups go, and how many are kept
+BACKUP_DIR = "backups"
+KEEP_BACKUPS = 7
+# Subdirectory of the backup directory holding the database replaced by each restore;
+# list_backups and prune_backups only look at files directly in the backup directory
+PRE_RESTORE_DIR = "pre-restore"
+# Seconds between scheduled backups
+BACKUP_INTERVAL = 24 * 60 * 60
+# Pages copied per step (4 MB with the default 4 KB page) and pause between steps,
+# so a large copy does not hog the disk while the app is writing
+PAGES_PER_STEP = 1024
+STEP_PAUSE = 0.005
+# Without WAL, writes from other connections restart a stepped copy; after this many
+# restarts the rest is copied in one step
+MAX_RESTARTS = 3
+BUSY_TIMEOUT = 15
+
+class _Restarted(Exception):
+    """
+    Raised from the backup progress callback to abandon a stepped copy that keeps restarting.
+    Se lanza desde el callback de progreso para abandonar una copia por pasos que se reinicia.
+    """
+    pass
+
+def _database_path() -> str:
+    """
+    Path of the app database file.
+    Ruta del archivo de la base de la app.
+    """
+    from src.models.database import db
+    return db.database
+
+def list_backups(backup_dir: str = BACKUP_DIR) -> List[str]:
+    """
+    Backup files in a directory, oldest first (names carry the timestamp).
+    Archivos de respaldo de un directorio, del más antiguo al más nuevo.
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(name for name in os.listdir(backup_dir) if name.endswith(".db"))
+    return [os.path.join(backup_dir, name) for name in names]
+
+def prune_backups(backup_dir: str = BACKUP_DIR, keep: int = KEEP_BACKUPS) -> List[str]:
+    """
+    Deletes all but the newest `keep` backups.
+    Borra todos los respaldos salvo los `keep` más recientes.
+
+    Returns:
+        List[str]: Paths removed.
+    """
+    backups = list_backups(backup_dir)
+    removed = backups[:-keep] if keep > 0 else backups
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def check_integrity(path: str) -> List[str]:
+    """
+    Runs PRAGMA integrity_check on a database file (read-only).
+    Ejecuta PRAGMA integrity_check sobre un archivo de base de datos (solo lectura).
+
+    Returns:
+        List[str]: Problems found (empty if the file is a sound SQLite database).
+    """
+    if not os.path.isfile(path):
+        return [f"File not found: {path}"]
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    return [] if rows == ["ok"] else rows
+
+def backup_database(backup_dir: str = BACKUP_DIR, source: str = None, keep: int = KEEP_BACKUPS,
+                    pages: int = PAGES_PER_STEP, pause: float = STEP_PAUSE) -> Dict:
+    """
+    Copies the live database with SQLite's online backup API, `pages` pages per step,
+    to a timestamped file in `backup_dir`, then keeps only the newest `keep` backups.
+    Copia la base en uso con la API de respaldo en línea de SQLite, de a `pages`
+    páginas por paso, a un archivo con fecha en `backup_dir` y conserva los `keep` más nuevos.
+
+    In WAL mode the whole copy reads from one snapshot held open on the source
+    connection: writers keep committing (readers never block them) and the steps
+    never restart. The copy is written next to its final name and renamed when
+    complete, so a crash never leaves a torn backup behind.
+
+    Args:
+        backup_dir (str): Destination directory (created if missing).
+        source (str): Database file (default: the app database).
+        keep (int): Backups to keep (None = no pruning).
+        pages (int): Pages per step (-1 = everything in one step).
+        pause (float): Seconds to wait between steps.
+
+    Returns:
+        Dict: path, size (bytes), pages, steps, restarts, duration (seconds), removed (paths).
+    """
+    source = source or _database_path()
+    os.makedirs(backup_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(source))[0]
+    path = os.path.join(backup_dir, f"{base}-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}.db")
+    partial = path + ".partial"
+
+    stats = {"pages": 0, "steps": 0, "restarts": 0, "remaining": None}
+    def progress(status, remaining, total):
+        stats["steps"] += 1
+        stats["pages"] = total
+        if stats["remaining"] is not None and remaining > stats["remaining"]:
+            stats["restarts"] += 1
+            if stats["restarts"] > MAX_RESTARTS:
+                raise _Restarted()
+        stats["remaining"] = remaining
+        if remaining and pause:
+            time.sleep(pause)
+
+    start = time.perf_counter()
+    src = sqlite3.connect(source, timeout=BUSY_TIMEOUT, isolation_level=None)
+    dst = sqlite3.connect(partial)
+    try:
+        if src.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # Pins the snapshot
+        try:
+            src.backup(dst, pages=pages, progress=progress)
+        except _Restarted:
+            src.backup(dst, pages=-1)
+            stats["steps"] += 1
+        # A backup is one self-contained file
+        dst.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        dst.close()
+        os.remove(partial)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    os.replace(partial, path)
+
+    return {
+        "path": path,
+        "size": os.path.getsize(path),
+        "pages": stats["pages"],
+        "steps": stats["steps"],
+        "restarts": stats["restarts"],
+        "duration": time.perf_counter() - start,
+        "removed": prune_backups(backup_dir, keep) if keep is not None else [],
+    }
+
+def restore_backup(backup_path: str, target: str = None, backup_dir: str = BACKUP_DIR) -> Dict:
+    """
+    Replaces the contents of the database with a backup. The backup must pass an
+    integrity check first; the current database is backed up to the `pre-restore`
+    subdirectory (which retention never prunes) before being overwritten, and the
+    result is checked again.
+    Reemplaza el contenido de la base con un respaldo verificado, guardando antes
+    la base actual en el subdirectorio `pre-restore`, que la retención no borra.
+
+    The copy goes through the backup API into the live file (in one step, under the
+    write lock), so open connections see the restored data instead of a swapped file.
+
+    Returns:
+        Dict: path, size, duration and previous (backup of the replaced database, or None).
+
+    Raises:
+        ValueError: If the backup or the restored database fails the integrity check.
+    """
+    target = target or _database_path()
+    problems = check_integrity(backup_path)
+    if problems:
+        raise ValueError(f"Backup failed the integrity check: {'; '.join(problems[:5])}")
+
+    start = time.perf_counter()
+    previous = None
+    if os.path.exists(target):
+        previous = backup_database(os.path.join(backup_dir, PRE_RESTORE_DIR), source=target, keep=None)["path"]
+    src = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(target, timeout=BUSY_TIMEOUT)
+    try:
+        src.backup(dst, pages=-1)
+    finally:
+        src.close()
+        dst.close()
+
+    problems = check_integrity(target)
+    if problems:
+        raise ValueError(f"Restored database failed the integrity check: {'; '.join(problems[:5])}")
+    return {
+        "path": target,
+        "size": os.path.getsize(target),
+        "duration": time.perf_counter() - start,
+        "previous": previous,
+    }
+
+
+class BackupScheduler:
+    """
+    Background thread that backs up the database every `interval` seconds (counted
+    from the newest file in the backup directory, so restarts do not add copies).
+    Hilo en segundo plano que respalda la base cada `interval` segundos (contados
+    desde el respaldo más reciente, así reiniciar la app no agrega copias).
+    """
+    def __init__(self, interval: int = BACKUP_INTERVAL, keep: int = KEEP_BACKUPS, backup_dir: str = BACKUP_DIR):
+        self.interval = interval
+        self.keep = keep
+        self.backup_dir = backup_dir
+        self.last_report = None
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        """
+        Returns True if the background thread is alive.
+        Devuelve True si el hilo en segundo plano está activo.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the background thread (no-op if already running).
+        Inicia el hilo en segundo plano (si no está activo).
+        """
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread.
+        Detiene el hilo en segundo plano.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def last_backup_time(self) -> float:
+        """
+        Modification time of the newest backup (None if there is none).
+        Fecha de modificación del respaldo más reciente (None si no hay).
+        """
+        backups = list_backups(self.backup_dir)
+        return os.path.getmtime(backups[-1]) if backups else None
+
+    def seconds_until_due(self) -> float:
+        """
+        Seconds until the next scheduled backup (0 if one is due now).
+        Segundos hasta el próximo respaldo programado (0 si ya corresponde).
+        """
+        last = self.last_backup_time()
+        return 0.0 if last is None else max(0.0, last + self.interval - time.time())
+
+    def backup_now(self) -> Dict:
+        """
+        Runs a backup synchronously (errors are kept in last_error).
+        Ejecuta un respaldo de forma sincrónica (los errores quedan en last_error).
+        """
+        with self._run_lock:
+            try:
+                self.last_report = backup_database(self.backup_dir, keep=self.keep)
+                self.last_error = None
+            except Exception as e:
+                print(f"Error backing up the database: {e}")
+                self.last_error = str(e)
+            return self.last_report
+
+    def _run(self):
+        """
+        Thread loop: back up when due, then sleep until the next one.
+        Bucle del hilo: respalda cuando corresponde y espera hasta el próximo.
+        """
+        while not self._stop.is_set():
+            if self.seconds_until_due() <= 0:
+                self.backup_now()
+            # Retry a failed backup within the hour instead of waiting a full interval
+            wait = min(self.interval, 3600) if self.last_error else self.seconds_until_due()
+            self._stop.wait(timeout=max(wait, 1.0))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_backup_scheduler() -> BackupScheduler:
+    """
+    Returns the process-wide backup scheduler shared by every Streamlit session.
+    Devuelve el programador de respaldos del proceso compartido por todas las sesiones.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BackupScheduler()
+        return _scheduler
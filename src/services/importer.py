@@ -0,0 +1,229 @@
+import pandas as pd
+from typing import Callable, Dict
+from src.models.database import Transaction, insert_rows
+from src.services.ledger import load_ledger, opening_balances, rebuild_positions
+from src.services.lots import sync_lots
+from src.services.performance import invalidate_value_series
+
+IMPORT_COLUMNS = ['date', 'ticker', 'operation_type', 'quantity', 'price', 'broker', 'category']
+DEFAULT_CATEGORY = "Acciones"
+
+# Accepted header names (lowercase) for each column, e.g. from a broker statement export
+COLUMN_ALIASES = {
+    'fecha': 'date',
+    'operacion': 'operation_type', 'operación': 'operation_type', 'tipo': 'operation_type', 'type': 'operation_type',
+    'cantidad': 'quantity', 'qty': 'quantity',
+    'precio': 'price',
+    'categoria': 'category', 'categoría': 'category',
+}
+OPERATION_ALIASES = {
+    'compra': "Compra", 'buy': "Compra", 'c': "Compra",
+    'venta': "Venta", 'sell': "Venta", 'v': "Venta",
+}
+
+def read_transactions_csv(source) -> pd.DataFrame:
+    """
+    Reads a CSV of transactions (path or file-like object) and normalizes its headers.
+    Lee un CSV de transacciones (ruta u objeto archivo) y normaliza sus encabezados.
+
+    Expected columns: date, ticker, operation_type (Compra/Venta or Buy/Sell),
+    quantity, price, broker and optionally category. Spanish headers are accepted.
+    """
+    df = pd.read_csv(source, sep=None, engine='python', dtype=str, skipinitialspace=True)
+    df.columns = [COLUMN_ALIASES.get(c.strip().lower(), c.strip().lower()) for c in df.columns]
+    return df
+
+def _decimal_mark(text: str):
+    """
+    Decimal separator a number shows by itself: ',' or '.', '' if it has none, or
+    None when a single separator is followed by exactly three digits (1,000 / 1.000).
+    Separador decimal que muestra un número: ',' o '.', '' si no tiene, o None si es ambiguo.
+    """
+    commas, dots = text.count(','), text.count('.')
+    if commas and dots:
+        return ',' if text.rfind(',') > text.rfind('.') else '.'
+    if not commas and not dots:
+        return ''
+    mark = ',' if commas else '.'
+    if commas + dots > 1:
+        return '.' if mark == ',' else ','  # Repeated: thousands separator (1,234,567 / 1.234.567)
+    if len(text) - text.rfind(mark) - 1 == 3 and text[-3:].isdigit():
+        return None
+    return mark
+
+def _normalize_number(text: str, decimal: str) -> str:
+    """
+    Rewrites a number with '.' as the only (decimal) separator. Ambiguous values use
+    the column's decimal mark `decimal` (see `_decimal_mark`).
+    Reescribe un número con '.' como único separador (decimal); los ambiguos usan el de la columna.
+    """
+    mark = _decimal_mark(text)
+    if mark is None:
+        # One separator before three digits: decimal only if the column uses it as such
+        mark = decimal if decimal and decimal in text else ''
+    for separator in ',.':
+        if separator != mark:
+            text = text.replace(separator, '')
+    return text.replace(mark, '.') if mark else text
+
+def _parse_number(values: pd.Series, column: str) -> pd.Series:
+    """
+    Parses numbers written as 1234.5, 1,234.56 or with a decimal comma (1.234,56).
+    The decimal separator is decided for the whole column: the last separator of
+    numbers with both, or a separator not followed by three digits (12,5). Otherwise
+    a lone separator before three digits is a thousands separator (1,000 = 1000).
+    Interpreta números como 1234.5, 1,234.56 o con coma decimal (1.234,56),
+    decidiendo el separador decimal para toda la columna.
+
+    Raises:
+        ValueError: If some numbers of the column use ',' and others '.' as decimal separator.
+    """
+    text = values.astype(str).str.strip().str.replace('$', '', regex=False).str.replace(' ', '', regex=False)
+    unique = text.unique()
+    marks = {mark for mark in map(_decimal_mark, unique) if mark}
+    if len(marks) > 1:
+        raise ValueError(f"Columna {column}: mezcla ',' y '.' como separador decimal")
+    decimal = marks.pop() if marks else ''
+    normalized = {value: _normalize_number(value, decimal) for value in unique}
+    return pd.to_numeric(text.map(normalized), errors='coerce')
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Parses ISO dates in one vectorized pass; only the rest (e.g. 31/01/2024) are
+    parsed element by element, day first.
+    Interpreta fechas ISO de una vez; solo las demás (p. ej. 31/01/2024) se
+    interpretan elemento por elemento, con el día primero.
+    """
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    other = dates.isna() & values.notna()
+    if other.any():
+        dates[other] = pd.to_datetime(values[other], format='mixed', dayfirst=True, errors='coerce')
+    return dates
+
+def validate_transactions(df: pd.DataFrame, validate_tickers: Callable = None):
+    """
+    Validates and normalizes imported rows column by column.
+    Valida y normaliza las filas importadas columna por columna.
+
+    All distinct tickers are checked in a single batch (`validate_tickers`). A ticker
+    the provider says does not exist is an error; one that could not be checked
+    (provider down or timed out) is kept and listed as unverified.
+
+    Args:
+        df (DataFrame): Rows as read by `read_transactions_csv` (or any frame with IMPORT_COLUMNS).
+        validate_tickers (Callable): `validate(tickers) -> {ticker: True / False / None}`,
+            None meaning "could not verify" (default: `ticker_resolver.validate_many`).
+
+    Returns:
+        Tuple[DataFrame, DataFrame, List[str]]: Valid rows (IMPORT_COLUMNS, typed),
+            errors (columns row and error, row being the 1-based line of the data)
+            and the unverified tickers.
+    """
+    missing = [c for c in IMPORT_COLUMNS if c != 'category' and c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+
+    rows = pd.DataFrame(index=df.index)
+    rows['date'] = _parse_dates(df['date'])
+    rows['ticker'] = df['ticker'].fillna('').astype(str).str.upper().str.strip()
+    rows['operation_type'] = df['operation_type'].fillna('').astype(str).str.strip().str.lower().map(OPERATION_ALIASES)
+    rows['quantity'] = _parse_number(df['quantity'], 'quantity')
+    rows['price'] = _parse_number(df['price'], 'price')
+    rows['broker'] = df['broker'].fillna('').astype(str).str.strip()
+    category = df['category'] if 'category' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    rows['category'] = category.fillna('').astype(str).str.strip().replace('', DEFAULT_CATEGORY)
+
+    checks = [
+        (rows['date'].isna(), "Fecha inválida"),
+        (rows['ticker'] == '', "Ticker vacío"),
+        (rows['operation_type'].isna(), "Operación inválida (Compra/Venta)"),
+        (~(rows['quantity'] > 0), "Cantidad inválida"),
+        (~(rows['price'] > 0), "Precio inválido"),
+        (rows['broker'] == '', "Broker vacío"),
+    ]
+    errors = [pd.DataFrame({'row': rows.index[mask] + 1, 'error': message}) for mask, message in checks]
+
+    # One batch for every distinct ticker among the otherwise valid rows
+    invalid = pd.concat([mask for mask, _ in checks], axis=1).any(axis=1)
+    tickers = rows.loc[~invalid, 'ticker'].unique().tolist()
+    unverified = []
+    if tickers:
+        if validate_tickers is None:
+            from src.services.ticker_resolver import ticker_resolver
+            validate_tickers = ticker_resolver.validate_many
+        valid = validate_tickers(tickers)
+        unverified = [t for t in tickers if valid.get(t) is None]
+        unknown = ~invalid & rows['ticker'].map(lambda t: valid.get(t) is False).astype(bool)
+        errors.append(pd.DataFrame({'row': rows.index[unknown] + 1,
+                                    'error': "Ticker inexistente: " + rows.loc[unknown, 'ticker']}))
+        invalid |= unknown
+
+    errors = pd.concat(errors, ignore_index=True).sort_values('row', kind='mergesort').reset_index(drop=True)
+    return rows[~invalid][IMPORT_COLUMNS].reset_index(drop=True), errors, unverified
+
+def _drop_existing(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drops rows already in the ledger, so re-importing the same statement is a no-op.
+    Identical rows within the file are kept (one per occurrence not yet stored).
+    Descarta las filas que ya están en el libro, para que reimportar sea inocuo.
+    """
+    key_columns = ['date', 'ticker', 'broker', 'operation_type', 'quantity', 'price']
+    keys = list(dict.fromkeys(zip(rows['ticker'], rows['broker'])))
+    existing = load_ledger(keys)[key_columns]
+    if existing.empty:
+        return rows
+
+    existing = existing.assign(occurrence=existing.groupby(key_columns).cumcount())
+    numbered = rows.assign(occurrence=rows.groupby(key_columns).cumcount())
+    merged = numbered.merge(existing.assign(stored=True), on=key_columns + ['occurrence'], how='left')
+    return rows[merged['stored'].isna().to_numpy()].reset_index(drop=True)
+
+def import_transactions(df: pd.DataFrame, validate_tickers: Callable = None,
+                        skip_invalid: bool = False, dry_run: bool = False) -> Dict[str, object]:
+    """
+    Bulk-imports transactions: validates every row, inserts them in one DB
+    transaction, rebuilds the affected positions once from the ledger and brings
+    their tax lots up to date.
+    Importa transacciones en bloque: valida todas las filas, las inserta en una
+    única transacción, reconstruye una sola vez las posiciones afectadas y
+    actualiza sus lotes.
+
+    Args:
+        df (DataFrame): Rows to import (see `read_transactions_csv`).
+        validate_tickers (Callable): Batch ticker validator (see `validate_transactions`).
+        skip_invalid (bool): Import the valid rows even if some rows are invalid
+            (by default nothing is imported when any row fails).
+        dry_run (bool): Only validate, don't write.
+
+    Returns:
+        dict: {"imported": n (or that would be, on a dry run), "duplicates": n already
+               stored, "errors": DataFrame, "positions": affected (ticker, broker) pairs,
+               "unverified": tickers imported without confirming they exist}.
+    """
+    rows, errors, unverified = validate_transactions(df, validate_tickers)
+    report = {"imported": 0, "duplicates": 0, "errors": errors, "positions": [], "unverified": unverified}
+    if rows.empty or (not errors.empty and not skip_invalid):
+        return report
+
+    new_rows = _drop_existing(rows)
+    report["duplicates"] = len(rows) - len(new_rows)
+    keys = list(dict.fromkeys(zip(new_rows['ticker'], new_rows['broker'])))
+    report["positions"] = keys
+    report["imported"] = len(new_rows)
+    if dry_run or new_rows.empty:
+        return report
+
+    params = list(new_rows.assign(date=new_rows['date'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+                  .itertuples(index=False, name=None))
+    with Transaction._meta.database.atomic():
+        # Holdings without a ledger (e.g. migrated from Excel) are kept as opening balances
+        opening = opening_balances(keys)
+        insert_rows(Transaction, IMPORT_COLUMNS, params)
+        rebuild_positions(keys, opening=opening)
+    invalidate_value_series(new_rows['date'].min().date())
+    try:
+        sync_lots(keys=keys)
+    except Exception as e:
+        print(f"Error updating tax lots: {e}")
+    print(f"Imported {len(new_rows)} transactions ({len(keys)} positions rebuilt).")
+    return report
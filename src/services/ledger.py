@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+from src.models.database import PortfolioItem, Transaction
+
+# Quantities at or below this are treated as a closed position (same as update_position)
+EPSILON = 1e-9
+
+LEDGER_COLUMNS = ['id', 'date', 'ticker', 'broker', 'operation_type', 'quantity', 'price', 'category']
+POSITION_COLUMNS = ['ticker', 'broker', 'quantity', 'avg_price', 'category']
+
+def load_ledger(keys: Iterable[Tuple[str, str]] = None, after_id: int = None) -> pd.DataFrame:
+    """
+    Reads the Transaction table (optionally only some ticker/broker pairs) as a DataFrame.
+    Lee la tabla Transaction (opcionalmente solo algunos pares ticker/broker) como DataFrame.
+
+    Rows come straight from the cursor and dates are parsed in one vectorized
+    call, instead of peewee converting every value row by row.
+
+    Args:
+        keys (Iterable[Tuple[str, str]]): (ticker, broker) pairs to read (None = all).
+        after_id (int): Only transactions with a higher id (i.e. inserted later).
+    """
+    query = Transaction.select(Transaction.id, Transaction.date, Transaction.ticker, Transaction.broker,
+                               Transaction.operation_type, Transaction.quantity, Transaction.price,
+                               Transaction.category)
+    if after_id is not None:
+        query = query.where(Transaction.id > after_id)
+    database = Transaction._meta.database
+
+    if keys is None:
+        rows = database.execute_sql(*query.sql()).fetchall()
+    else:
+        keys = list(dict.fromkeys(keys))
+        wanted = set(keys)
+        tickers = list({ticker for ticker, _ in keys})
+        rows = []
+        for i in range(0, len(tickers), 500):
+            chunk = query.where(Transaction.ticker.in_(tickers[i:i + 500]))
+            rows.extend(r for r in database.execute_sql(*chunk.sql()).fetchall() if (r[2], r[3]) in wanted)
+
+    df = pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601')
+    return df
+
+def replay_position_loop(transactions: List[tuple]) -> Tuple[float, float]:
+    """
+    Replays one ticker/broker ledger row by row (the reference algorithm).
+    Reproduce el libro de un ticker/broker fila por fila (el algoritmo de referencia).
+
+    Buys add to quantity and cost (weighted average); sells reduce cost
+    proportionally, so the average price is unchanged. Sells against an empty
+    position are ignored.
+
+    Args:
+        transactions (List[tuple]): (operation_type, quantity, price) sorted by date.
+
+    Returns:
+        Tuple[float, float]: Final (quantity, total cost).
+    """
+    total_quantity = 0.0
+    total_cost = 0.0
+    for operation_type, quantity, price in transactions:
+        if operation_type == "Compra":
+            total_cost += quantity * price
+            total_quantity += quantity
+        elif total_quantity > EPSILON:
+            avg_price = total_cost / total_quantity
+            total_cost -= quantity * avg_price
+            total_quantity -= quantity
+    return total_quantity, total_cost
+
+def replay_ledger(ledger: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuilds every ticker/broker position from the ledger in one grouped, sorted pass.
+    Reconstruye todas las posiciones ticker/broker desde el libro en una pasada agrupada.
+
+    Cost follows c_k = a_k * c_(k-1) + b_k (buys: a=1, b=qty*price; sells:
+    a=(Q_(k-1)-qty)/Q_(k-1), b=0), which is solved with cumulative products.
+    A sell that closes the position (a=0) starts a new segment, so cumulative
+    products are taken within segments. Groups that sell more than they hold
+    (where the row-by-row rules diverge from plain sums) fall back to
+    `replay_position_loop`.
+
+    Args:
+        ledger (DataFrame): LEDGER_COLUMNS rows (any order).
+
+    Returns:
+        pd.DataFrame: POSITION_COLUMNS, one row per ticker/broker with transactions.
+            Closed positions have quantity 0.
+    """
+    if ledger.empty:
+        return pd.DataFrame(columns=POSITION_COLUMNS)
+
+    df = ledger.sort_values(['ticker', 'broker', 'date', 'id'], kind='mergesort').reset_index(drop=True)
+    is_buy = (df['operation_type'] == "Compra").to_numpy()
+    qty = df['quantity'].to_numpy(dtype=float)
+    price = df['price'].to_numpy(dtype=float)
+    group = df.groupby(['ticker', 'broker'], sort=False).ngroup().to_numpy()
+
+    signed = np.where(is_buy, qty, -qty)
+    held_after = pd.Series(signed).groupby(group).cumsum().to_numpy()
+    held_before = held_after - signed
+
+    # Oversold groups: a sell against an empty position or below zero
+    bad_rows = ~is_buy & ((held_before <= EPSILON) | (held_after < -EPSILON))
+    bad_groups = np.unique(group[bad_rows])
+    clean = ~np.isin(group, bad_groups)
+
+    # Rows after a closing sell start a new segment
+    closes = ~is_buy & (held_after <= EPSILON)
+    prev_closes = pd.Series(closes).groupby(group).shift(1, fill_value=False).to_numpy(dtype=bool)
+    segment = pd.Series(prev_closes.astype(int)).groupby(group).cumsum().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(is_buy, 1.0, (held_before - qty) / held_before)
+        log_factor = np.log(np.where(closes | ~clean, 1.0, factor))
+    added = np.where(is_buy, qty * price, 0.0)
+
+    # Cost at the end of the segment: sum_i b_i * prod_(j>i) a_j, in log space
+    segment_keys = pd.MultiIndex.from_arrays([group, segment])
+    log_cum = pd.Series(log_factor).groupby(segment_keys).cumsum().to_numpy()
+    log_last = pd.Series(log_cum).groupby(segment_keys).transform('last').to_numpy()
+    contribution = added * np.exp(log_last - log_cum)
+
+    last_rows = df.groupby(group, sort=False).tail(1).index.to_numpy()
+    last_segment_mask = segment == segment[last_rows][group]
+    cost = pd.Series(np.where(last_segment_mask, contribution, 0.0)).groupby(group).sum().to_numpy()
+    quantity = held_after[last_rows]
+    # A closed position has no cost left
+    cost = np.where(closes[last_rows], 0.0, cost)
+
+    result = pd.DataFrame({
+        'ticker': df['ticker'].to_numpy()[last_rows],
+        'broker': df['broker'].to_numpy()[last_rows],
+        'quantity': quantity,
+        'cost': cost,
+        'category': df['category'].to_numpy()[last_rows],
+    })
+
+    # Exact row-by-row replay for the oversold groups (rows of a group are contiguous)
+    first_rows = np.r_[0, last_rows[:-1] + 1]
+    operations = df['operation_type'].to_numpy()
+    for g in bad_groups:
+        rows = slice(first_rows[g], last_rows[g] + 1)
+        final_qty, final_cost = replay_position_loop(zip(operations[rows], qty[rows], price[rows]))
+        result.at[g, 'quantity'] = final_qty
+        result.at[g, 'cost'] = final_cost
+
+    open_mask = result['quantity'] > EPSILON
+    result['avg_price'] = np.where(open_mask, result['cost'] / result['quantity'].where(open_mask, 1.0), 0.0)
+    result['quantity'] = np.where(open_mask, result['quantity'], 0.0)
+    return result[POSITION_COLUMNS]
+
+def _stored_positions(tickers: List[str]) -> Dict[Tuple[str, str], tuple]:
+    """
+    Stored PortfolioItem rows of some tickers as (ticker, broker) -> (id, quantity, avg_price).
+    Filas de PortfolioItem guardadas de algunos tickers como (ticker, broker) -> (id, cantidad, precio promedio).
+    """
+    stored = {}
+    for i in range(0, len(tickers), 500):
+        query = (PortfolioItem
+                 .select(PortfolioItem.id, PortfolioItem.ticker, PortfolioItem.broker,
+                         PortfolioItem.quantity, PortfolioItem.avg_price)
+                 .where(PortfolioItem.ticker.in_(tickers[i:i + 500]))
+                 .tuples())
+        for item_id, ticker, broker, quantity, avg_price in query:
+            stored[(ticker, broker)] = (item_id, quantity, avg_price)
+    return stored
+
+def opening_balances(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """
+    Quantity and cost of stored positions that their ledger does not explain, e.g.
+    holdings migrated from Excel with no transactions. Read them before changing the
+    ledger of a pair and pass them to `rebuild_positions` so they are carried over.
+    Cantidad y costo de las posiciones guardadas que su libro no explica (p. ej.
+    tenencias migradas desde Excel sin transacciones). Se leen antes de modificar el
+    libro de un par y se pasan a `rebuild_positions` para conservarlas.
+
+    Args:
+        keys (Iterable[Tuple[str, str]]): (ticker, broker) pairs to check.
+
+    Returns:
+        Dict[Tuple[str, str], Tuple[float, float]]: Pair -> (quantity, total cost) not in the ledger.
+    """
+    keys = list(dict.fromkeys(keys))
+    replayed = replay_ledger(load_ledger(keys))
+    explained = {(t, b): (q, q * a) for t, b, q, a, _ in replayed.itertuples(index=False)}
+    stored = _stored_positions(list({ticker for ticker, _ in keys}))
+
+    balances = {}
+    for key in keys:
+        if key not in stored:
+            continue
+        _, quantity, avg_price = stored[key]
+        ledger_quantity, ledger_cost = explained.get(key, (0.0, 0.0))
+        extra = quantity - ledger_quantity
+        if extra > EPSILON:
+            balances[key] = (extra, max(quantity * (avg_price or 0.0) - ledger_cost, 0.0))
+    return balances
+
+def rebuild_positions(keys: Iterable[Tuple[str, str]] = None, dry_run: bool = False,
+                      opening: Dict[Tuple[str, str], Tuple[float, float]] = None) -> Dict[str, object]:
+    """
+    Recomputes PortfolioItem rows from the Transaction ledger and rewrites them in
+    a single DB transaction. Also works as a consistency checker (dry_run=True).
+    Recalcula las filas de PortfolioItem desde el libro de transacciones y las
+    reescribe en una única transacción. También sirve para verificar consistencia.
+
+    On a full rebuild only ticker/broker pairs with transactions are touched:
+    positions imported without a ledger (e.g. from Excel) are left as they are.
+    Explicitly requested pairs without transactions are closed, so a keyed rebuild
+    must get the holdings their ledger does not explain as `opening` balances
+    (see `opening_balances`), which are replayed as a buy before the first
+    transaction. Existing rows keep their category, source sheet and target price.
+
+    Args:
+        keys (Iterable[Tuple[str, str]]): (ticker, broker) pairs to rebuild (None = all).
+        dry_run (bool): Only compare, don't write.
+        opening (Dict): (ticker, broker) -> (quantity, total cost) held before the ledger.
+
+    Returns:
+        dict: {"positions": rebuilt pairs, "updated": n, "created": n, "deleted": n,
+               "mismatches": DataFrame of pairs whose stored row differed}.
+    """
+    if keys is not None:
+        keys = list(dict.fromkeys(keys))
+    ledger = load_ledger(keys)
+    if opening:
+        start = (ledger['date'].min() if not ledger.empty else pd.Timestamp.now()) - pd.Timedelta(days=1)
+        balances = pd.DataFrame([(-1 - i, start, ticker, broker, "Compra", quantity, cost / quantity, None)
+                                 for i, ((ticker, broker), (quantity, cost)) in enumerate(opening.items())],
+                                columns=LEDGER_COLUMNS)
+        ledger = balances if ledger.empty else pd.concat([balances, ledger], ignore_index=True)
+    rebuilt = replay_ledger(ledger)
+    if keys is not None:
+        # Explicitly requested pairs with no transactions left are closed positions
+        seen = set(zip(rebuilt['ticker'], rebuilt['broker']))
+        empty = [(t, b, 0.0, 0.0, None) for t, b in keys if (t, b) not in seen]
+        if empty:
+            rebuilt = pd.concat([rebuilt, pd.DataFrame(empty, columns=POSITION_COLUMNS)], ignore_index=True)
+    stored = _stored_positions(rebuilt['ticker'].unique().tolist())
+
+    to_update, to_create, to_delete, mismatches = [], [], [], []
+    for ticker, broker, quantity, avg_price, category in rebuilt.itertuples(index=False):
+        current = stored.get((ticker, broker))
+        if current is None:
+            if quantity > 0:
+                to_create.append({"ticker": ticker, "broker": broker, "quantity": quantity,
+                                  "avg_price": avg_price, "category": category, "source_sheet": "Manual"})
+                mismatches.append((ticker, broker, None, None, quantity, avg_price))
+            continue
+        item_id, stored_qty, stored_avg = current
+        if quantity <= 0:
+            to_delete.append(item_id)
+            mismatches.append((ticker, broker, stored_qty, stored_avg, 0.0, 0.0))
+        elif not (np.isclose(stored_qty, quantity) and np.isclose(stored_avg or 0.0, avg_price)):
+            to_update.append((item_id, quantity, avg_price))
+            mismatches.append((ticker, broker, stored_qty, stored_avg, quantity, avg_price))
+
+    if not dry_run:
+        with PortfolioItem._meta.database.atomic():
+            for item_id, quantity, avg_price in to_update:
+                PortfolioItem.update(quantity=quantity, avg_price=avg_price).where(PortfolioItem.id == item_id).execute()
+            for i in range(0, len(to_create), 300):
+                PortfolioItem.insert_many(to_create[i:i + 300]).execute()
+            for i in range(0, len(to_delete), 500):
+                PortfolioItem.delete().where(PortfolioItem.id.in_(to_delete[i:i + 500])).execute()
+
+    return {
+        "positions": len(rebuilt),
+        "updated": len(to_update),
+        "created": len(to_create),
+        "deleted": len(to_delete),
+        "mismatches": pd.DataFrame(mismatches, columns=['ticker', 'broker', 'stored_quantity', 'stored_avg_price',
+                                                        'ledger_quantity', 'ledger_avg_price']),
+    }
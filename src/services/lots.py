@@ -0,0 +1,300 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+from peewee import fn
+from src.models.database import Transaction, TaxLot, RealizedLot, LotState, insert_rows
+from src.services.ledger import EPSILON, load_ledger
+
+METHODS = ("FIFO", "LIFO", "AVERAGE")
+DEFAULT_METHOD = "FIFO"
+
+LOT_COLUMNS = ['ticker', 'broker', 'transaction_id', 'open_date', 'quantity', 'price']
+REALIZED_COLUMNS = ['ticker', 'broker', 'transaction_id', 'open_date', 'date', 'quantity', 'cost', 'proceeds']
+REPORT_COLUMNS = ['ticker', 'broker', 'quantity', 'cost', 'market_value', 'unrealized', 'realized']
+
+def match_lots(transactions: Iterable[tuple], method: str = DEFAULT_METHOD,
+               lots: List[list] = None) -> Tuple[List[list], List[tuple]]:
+    """
+    Matches the sells of one ticker/broker against its open lots.
+    Asigna las ventas de un ticker/broker contra sus lotes abiertos.
+
+    Buys open a lot; sells consume the oldest lots (FIFO), the newest (LIFO) or
+    a single pooled lot at the weighted-average cost (AVERAGE, the same average
+    price `update_position` keeps). Quantity sold beyond the open lots is ignored,
+    as a sell against an empty position is.
+
+    Args:
+        transactions (Iterable[tuple]): (id, date, operation_type, quantity, price) in ledger order (date, id).
+        method (str): One of METHODS.
+        lots (List[list]): Open lots to continue from, [transaction_id, open_date, quantity, price]
+            oldest first (the output of a previous call).
+
+    Returns:
+        Tuple[List[list], List[tuple]]: Open lots (same layout as `lots`) and realized
+            matches (sell_id, open_date, date, quantity, cost, proceeds).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown lot method: {method}")
+    queue = deque(list(lot) for lot in (lots or []))
+    lifo = method == "LIFO"
+    realized = []
+
+    for tx_id, date, operation_type, quantity, price in transactions:
+        if operation_type == "Compra":
+            if method == "AVERAGE" and queue:
+                pool = queue[0]
+                total = pool[2] + quantity
+                pool[3] = (pool[2] * pool[3] + quantity * price) / total
+                pool[2] = total
+            else:
+                queue.append([tx_id, date, quantity, price])
+            continue
+
+        remaining = quantity
+        while remaining > EPSILON and queue:
+            lot = queue[-1] if lifo else queue[0]
+            used = min(remaining, lot[2])
+            realized.append((tx_id, lot[1], date, used, used * lot[3], used * price))
+            lot[2] -= used
+            remaining -= used
+            if lot[2] <= EPSILON:
+                if lifo:
+                    queue.pop()
+                else:
+                    queue.popleft()
+    return list(queue), realized
+
+def _ensure_tables():
+    """
+    Creates the lot tables on databases created before they existed.
+    Crea las tablas de lotes en bases de datos anteriores a ellas.
+    """
+    Transaction._meta.database.create_tables([TaxLot, RealizedLot, LotState], safe=True)
+
+def _raw_rows(query) -> List[tuple]:
+    """
+    Runs a query straight on the cursor: dates stay as the text stored in the DB,
+    which sorts chronologically and is written back unchanged.
+    Ejecuta una consulta directo en el cursor: las fechas quedan como el texto guardado.
+    """
+    return Transaction._meta.database.execute_sql(*query.sql()).fetchall()
+
+def _db_datetimes(dates: pd.Series) -> List[str]:
+    """
+    Formats datetimes as peewee stores DateTimeFields (str(datetime)), vectorized.
+    Formatea fechas como peewee guarda los DateTimeField (str(datetime)), vectorizado.
+    """
+    text = dates.dt.strftime('%Y-%m-%d %H:%M:%S')
+    fractional = dates.dt.microsecond != 0
+    if fractional.any():
+        text[fractional] = text[fractional] + dates[fractional].dt.strftime('.%f')
+    return text.tolist()
+
+def _split_pairs(ledger: pd.DataFrame) -> Dict[Tuple[str, str], List[tuple]]:
+    """
+    Splits a ledger into per ticker/broker lists of (id, date, operation_type,
+    quantity, price) in ledger order, with one sort and no per-group pandas work.
+    Divide el libro en listas por ticker/broker, en orden, con un solo ordenamiento.
+    """
+    if ledger.empty:
+        return {}
+    df = ledger.sort_values(['ticker', 'broker', 'date', 'id'], kind='mergesort').reset_index(drop=True)
+    records = list(zip(df['id'].tolist(), _db_datetimes(df['date']), df['operation_type'].tolist(),
+                       df['quantity'].tolist(), df['price'].tolist()))
+    tickers = df['ticker'].to_numpy()
+    brokers = df['broker'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, (tickers[1:] != tickers[:-1]) | (brokers[1:] != brokers[:-1])])
+    ends = np.r_[starts[1:], len(df)]
+    return {(tickers[a], brokers[a]): records[a:b] for a, b in zip(starts, ends)}
+
+def _delete_pairs(model, method: str, keys: List[Tuple[str, str]]):
+    """
+    Deletes the rows of some ticker/broker pairs for one method with one prepared statement.
+    Borra las filas de algunos pares ticker/broker de un método con una sentencia preparada.
+    """
+    sql = f'DELETE FROM "{model._meta.table_name}" WHERE "ticker" = ? AND "broker" = ? AND "method" = ?'
+    model._meta.database.cursor().executemany(sql, [(ticker, broker, method) for ticker, broker in keys])
+
+def _ledger_counts(keys: List[Tuple[str, str]] = None) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """
+    (ticker, broker) -> (transaction count, max transaction id), in one GROUP BY query.
+    (ticker, broker) -> (cantidad de operaciones, id máximo), en una consulta GROUP BY.
+    """
+    query = (Transaction
+             .select(Transaction.ticker, Transaction.broker, fn.COUNT(Transaction.id), fn.MAX(Transaction.id))
+             .group_by(Transaction.ticker, Transaction.broker))
+    if keys is None:
+        return {(t, b): (count, max_id) for t, b, count, max_id in query.tuples()}
+    wanted = set(keys)
+    tickers = list({ticker for ticker, _ in keys})
+    counts = {}
+    for i in range(0, len(tickers), 500):
+        for t, b, count, max_id in query.where(Transaction.ticker.in_(tickers[i:i + 500])).tuples():
+            if (t, b) in wanted:
+                counts[(t, b)] = (count, max_id)
+    return counts
+
+def _load_open_lots(keys: List[Tuple[str, str]], method: str) -> Dict[Tuple[str, str], List[list]]:
+    """
+    Stored open lots of some pairs, in queue order (oldest first).
+    Lotes abiertos guardados de algunos pares, en orden de cola (el más antiguo primero).
+    """
+    wanted = set(keys)
+    tickers = list({ticker for ticker, _ in keys})
+    lots = {key: [] for key in keys}
+    for i in range(0, len(tickers), 500):
+        query = (TaxLot
+                 .select(TaxLot.ticker, TaxLot.broker, TaxLot.transaction_id, TaxLot.open_date,
+                         TaxLot.quantity, TaxLot.price)
+                 .where((TaxLot.method == method) & TaxLot.ticker.in_(tickers[i:i + 500]))
+                 .order_by(TaxLot.id))
+        for t, b, tx_id, open_date, quantity, price in _raw_rows(query):
+            if (t, b) in wanted:
+                lots[(t, b)].append([tx_id, open_date, quantity, price])
+    return lots
+
+def sync_lots(method: str = DEFAULT_METHOD, keys: Iterable[Tuple[str, str]] = None) -> Dict[str, int]:
+    """
+    Brings the persisted lots of a method up to date with the Transaction ledger.
+    Actualiza los lotes persistidos de un método según el libro de transacciones.
+
+    Each ticker/broker pair remembers the last transaction applied. Transactions
+    appended after it are matched against the stored open lots (incremental);
+    only pairs where a transaction was back-dated or deleted are replayed from
+    their full history.
+
+    Args:
+        method (str): One of METHODS.
+        keys (Iterable[Tuple[str, str]]): (ticker, broker) pairs to sync (None = all).
+
+    Returns:
+        dict: {"incremental": pairs updated incrementally, "rebuilt": pairs replayed,
+               "transactions": transactions applied}.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown lot method: {method}")
+    _ensure_tables()
+    if keys is not None:
+        keys = list(dict.fromkeys(keys))
+
+    counts = _ledger_counts(keys)
+    wanted = None if keys is None else set(keys)
+    states = {}
+    query = (LotState
+             .select(LotState.ticker, LotState.broker, LotState.last_date, LotState.last_id,
+                     LotState.max_id, LotState.count)
+             .where(LotState.method == method))
+    for t, b, last_date, last_id, max_id, count in _raw_rows(query):
+        if wanted is None or (t, b) in wanted:
+            states[(t, b)] = (last_date, last_id, max_id, count)
+
+    rebuild = [key for key in counts if key not in states]
+    rebuild += [key for key in states if key not in counts]  # Every transaction deleted
+    candidates = [key for key, state in states.items()
+                  if key in counts and counts[key] != (state[3], state[2])]
+
+    # Transactions appended since each candidate's last sync, in one query
+    new_rows = {}
+    if candidates:
+        after_id = min(states[key][2] for key in candidates)
+        for key, rows in _split_pairs(load_ledger(candidates, after_id=after_id)).items():
+            new_rows[key] = [row for row in rows if row[0] > states[key][2]]
+
+    incremental = []
+    for key in candidates:
+        last_date, last_id, max_id, count = states[key]
+        rows = new_rows.get(key)
+        if not rows or len(rows) + count != counts[key][0]:
+            rebuild.append(key)  # Something was deleted (and maybe re-added)
+        elif (rows[0][1], rows[0][0]) < (last_date, last_id):
+            rebuild.append(key)  # Back-dated: lots after it must be re-matched
+        else:
+            incremental.append(key)
+
+    lots = _load_open_lots(incremental, method) if incremental else {}
+    history = {}
+    if rebuild:
+        history = _split_pairs(load_ledger([key for key in rebuild if key in counts]))
+
+    lot_rows, realized_rows, state_rows = [], [], []
+    applied = 0
+    for key in incremental + rebuild:
+        rows = new_rows[key] if key in lots else history.get(key)
+        if rows is None:
+            continue  # No transactions left: only the stored rows are cleared
+        open_lots, realized = match_lots(rows, method, lots.get(key))
+        applied += len(rows)
+        ticker, broker = key
+        lot_rows.extend((ticker, broker, method, *lot) for lot in open_lots)
+        realized_rows.extend((ticker, broker, method, *match) for match in realized)
+        state_rows.append((ticker, broker, method, rows[-1][1], rows[-1][0], counts[key][1], counts[key][0]))
+
+    with Transaction._meta.database.atomic():
+        _delete_pairs(TaxLot, method, incremental + rebuild)
+        _delete_pairs(LotState, method, incremental + rebuild)
+        _delete_pairs(RealizedLot, method, rebuild)
+        insert_rows(TaxLot, ['ticker', 'broker', 'method'] + LOT_COLUMNS[2:], lot_rows)
+        insert_rows(RealizedLot, ['ticker', 'broker', 'method'] + REALIZED_COLUMNS[2:], realized_rows)
+        insert_rows(LotState, ['ticker', 'broker', 'method', 'last_date', 'last_id', 'max_id', 'count'], state_rows)
+
+    return {"incremental": len(incremental), "rebuilt": len(rebuild), "transactions": applied}
+
+def _read_frame(model, columns: List[str], method: str, date_columns: List[str]) -> pd.DataFrame:
+    """
+    Reads the rows of a lot table for one method straight from the cursor.
+    Lee las filas de una tabla de lotes para un método directo desde el cursor.
+    """
+    query = (model.select(*[getattr(model, c) for c in columns])
+             .where(model.method == method)
+             .order_by(model.ticker, model.broker, model.id))
+    df = pd.DataFrame(model._meta.database.execute_sql(*query.sql()).fetchall(), columns=columns)
+    for column in date_columns:
+        df[column] = pd.to_datetime(df[column], format='ISO8601')
+    return df
+
+def get_open_lots(method: str = DEFAULT_METHOD, sync: bool = True) -> pd.DataFrame:
+    """
+    Returns the open lots (LOT_COLUMNS), oldest first within each ticker/broker.
+    Devuelve los lotes abiertos, del más antiguo al más nuevo en cada ticker/broker.
+    """
+    if sync:
+        sync_lots(method)
+    _ensure_tables()
+    return _read_frame(TaxLot, LOT_COLUMNS, method, ['open_date'])
+
+def get_realized(method: str = DEFAULT_METHOD, sync: bool = True) -> pd.DataFrame:
+    """
+    Returns every realized match (REALIZED_COLUMNS) plus its gain.
+    Devuelve cada asignación realizada junto con su resultado.
+    """
+    if sync:
+        sync_lots(method)
+    _ensure_tables()
+    df = _read_frame(RealizedLot, REALIZED_COLUMNS, method, ['open_date', 'date'])
+    df['gain'] = df['proceeds'] - df['cost']
+    return df
+
+def lot_report(open_lots: pd.DataFrame, realized: pd.DataFrame, prices: Dict[str, float]) -> pd.DataFrame:
+    """
+    Realized and unrealized P&L per ticker/broker.
+    Resultado realizado y no realizado por ticker/broker.
+
+    Args:
+        open_lots (DataFrame): Output of `get_open_lots`.
+        realized (DataFrame): Output of `get_realized`.
+        prices (Dict[str, float]): Ticker -> current price (missing tickers have no market value).
+
+    Returns:
+        pd.DataFrame: REPORT_COLUMNS, one row per pair with open lots or realized results.
+    """
+    lots = open_lots.assign(cost=open_lots['quantity'] * open_lots['price'])
+    lots['market_value'] = lots['quantity'] * lots['ticker'].map(prices).astype(float)
+    held = lots.groupby(['ticker', 'broker'])[['quantity', 'cost', 'market_value']].sum(min_count=1)
+    gains = (realized['proceeds'] - realized['cost']).groupby([realized['ticker'], realized['broker']]).sum()
+
+    report = held.join(gains.rename('realized'), how='outer')
+    report[['quantity', 'cost']] = report[['quantity', 'cost']].fillna(0.0)
+    report['realized'] = report['realized'].fillna(0.0)
+    report['unrealized'] = report['market_value'] - report['cost']
+    return report.reset_index()[REPORT_COLUMNS]
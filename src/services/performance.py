@@ -0,0 +1,226 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+from peewee import fn
+from src.models.database import PortfolioValue
+from src.services.ledger import load_ledger
+from src.services.valuation import holding_currencies
+
+SERIES_COLUMNS = ['currency', 'value', 'invested', 'complete']
+
+# Extra days of closes loaded before the first recomputed day, so it has a close to carry forward
+CLOSE_LOOKBACK_DAYS = 10
+
+def _ensure_table():
+    """
+    Creates the PortfolioValue table on databases created before it existed.
+    Crea la tabla PortfolioValue en bases de datos anteriores a ella.
+    """
+    PortfolioValue.create_table(safe=True)
+
+def _load_closes(tickers: List[str], start: datetime.date) -> Dict[str, pd.Series]:
+    """
+    Daily closes from `start` for several tickers, read through the bar store concurrently.
+    Cierres diarios desde `start` de varios tickers, leídos del almacén de velas en paralelo.
+    """
+    from src.external.market_data import fetch_many, get_history_since
+    bars = fetch_many(lambda ticker: get_history_since(ticker, start), tickers)
+    return {t: df['Close'] for t, df in bars.items() if df is not None and not df.empty}
+
+def compute_value_series(ledger: pd.DataFrame, closes: Dict[str, pd.Series],
+                         start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    """
+    Computes the daily portfolio value between two dates from the ledger and closes,
+    one row per day and currency (ARS and USD holdings are never added together).
+    Calcula el valor diario del portafolio entre dos fechas a partir del libro y los
+    cierres, una fila por día y moneda (las tenencias en ARS y USD no se suman).
+
+    Quantities held each day are cumulative sums of the signed transaction
+    quantities (all brokers together); each day is valued at the last known
+    close. A held ticker without any close yet is valued at its last traded
+    price and its row is flagged incomplete, so it gets recomputed later.
+
+    Args:
+        ledger (DataFrame): Transactions (see `src.services.ledger.load_ledger`), full history.
+        closes (Dict[str, Series]): Ticker -> daily closes covering `start` (with some lookback).
+        start (datetime.date): First day to compute.
+        end (datetime.date): Last day to compute.
+
+    Returns:
+        pd.DataFrame: Indexed by date with columns currency, value, invested and complete.
+    """
+    df = ledger.assign(day=pd.to_datetime(ledger['date']).dt.normalize(),
+                       currency=holding_currencies(ledger['ticker'].to_numpy()))
+    signed = df['quantity'].where(df['operation_type'] == "Compra", -df['quantity'])
+    df = df.assign(signed=signed, cash=signed * df['price'])
+
+    days = pd.date_range(min(df['day'].min(), pd.Timestamp(start)), pd.Timestamp(end), freq='D')
+    held = (df.pivot_table(index='day', columns='ticker', values='signed', aggfunc='sum')
+            .reindex(days, fill_value=0.0).fillna(0.0).cumsum().clip(lower=0.0))
+    last_trade = (df.sort_values(['date', 'id'])
+                  .pivot_table(index='day', columns='ticker', values='price', aggfunc='last')
+                  .reindex(days).ffill())
+
+    close_matrix = pd.DataFrame({t: s[~s.index.duplicated(keep='last')] for t, s in closes.items()})
+    close_matrix = close_matrix.reindex(close_matrix.index.union(days)).ffill().reindex(days)
+    known = close_matrix.reindex(columns=held.columns)
+    prices = known.fillna(last_trade)
+    estimated = (held > 0) & known.isna()
+
+    invested = (df.pivot_table(index='day', columns='currency', values='cash', aggfunc='sum')
+                .reindex(days, fill_value=0.0).fillna(0.0).cumsum())
+    ticker_currency = pd.Series(holding_currencies(held.columns.to_numpy()), index=held.columns)
+    frames = []
+    for currency in sorted(ticker_currency.unique()):
+        tickers = ticker_currency.index[ticker_currency == currency]
+        frame = pd.DataFrame({
+            'currency': currency,
+            'value': (held[tickers] * prices[tickers]).sum(axis=1),
+            'invested': invested[currency],
+            'complete': ~estimated[tickers].any(axis=1),
+        }, index=days, columns=SERIES_COLUMNS)
+        # No row for a currency before it is first traded
+        active = (held[tickers] > 0).any(axis=1) | (frame['invested'] != 0)
+        frames.append(frame[active])
+    series = pd.concat(frames).sort_index(kind='stable')
+    return series.loc[pd.Timestamp(start):]
+
+def value_series_in(series: pd.DataFrame, currency: str, ars_per_usd: pd.Series) -> pd.DataFrame:
+    """
+    Adds up the per-currency series in one reporting currency, converting each day
+    at that day's rate (the last known one on days without a quote).
+    Suma la serie por moneda en una moneda de reporte, convirtiendo cada día al
+    tipo de cambio de ese día (el último conocido si no hubo cotización).
+
+    Days that need a conversion but have no rate yet are left out.
+
+    Args:
+        series (DataFrame): Output of `get_value_series`.
+        currency (str): "ARS" or "USD".
+        ars_per_usd (Series): Daily rate indexed by date (see `FxRates.history`).
+
+    Returns:
+        pd.DataFrame: Indexed by date with columns value, invested and complete.
+    """
+    if currency not in ("ARS", "USD"):
+        raise ValueError(f"Unsupported currency: {currency}")
+    if series.empty:
+        return pd.DataFrame(columns=['value', 'invested', 'complete'])
+
+    rates = ars_per_usd[~ars_per_usd.index.duplicated(keep='last')]
+    rates = rates.reindex(rates.index.union(series.index.unique())).ffill().reindex(series.index)
+    rate = rates.to_numpy(dtype=float)
+    needs_rate = series['currency'].to_numpy() != currency
+    # ARS -> USD divides by the rate, USD -> ARS multiplies
+    factor = np.where(needs_rate, 1.0 / rate if currency == "USD" else rate, 1.0)
+
+    converted = series[['value', 'invested']].mul(factor, axis=0).assign(complete=series['complete'])
+    unconvertible = series.index[needs_rate & np.isnan(rate)]
+    converted = converted[~converted.index.isin(unconvertible)]
+    return converted.groupby(level=0).agg({'value': 'sum', 'invested': 'sum', 'complete': 'all'})
+
+def _as_date(value) -> datetime.date:
+    """
+    Converts a date read from SQLite to datetime.date (aggregates return it as text).
+    Convierte a datetime.date una fecha leída de SQLite (los agregados la devuelven como texto).
+    """
+    return datetime.date.fromisoformat(value) if isinstance(value, str) else value
+
+def invalidate_value_series(since: datetime.date):
+    """
+    Drops stored values from a date onwards (e.g. a transaction dated `since` changed).
+    Elimina los valores guardados desde una fecha (p. ej. cambió una transacción de esa fecha).
+    """
+    if since is None:
+        return
+    if isinstance(since, datetime.datetime):
+        since = since.date()
+    elif isinstance(since, str):
+        since = pd.Timestamp(since).date()
+    try:
+        _ensure_table()
+        PortfolioValue.delete().where(PortfolioValue.date >= since).execute()
+    except Exception as e:
+        print(f"Error invalidating portfolio value series: {e}")
+
+def update_value_series(today: datetime.date = None, closes_loader: Callable = None) -> int:
+    """
+    Brings the stored series up to date, recomputing only the days that need it:
+    the last stored day (its close may have been intraday), the first day flagged
+    incomplete (a held ticker had no close yet), and every day after them.
+    Actualiza la serie guardada recalculando solo los días necesarios: el último
+    día guardado (su cierre pudo ser intradiario), el primero marcado incompleto
+    (un ticker en cartera no tenía cierre) y todos los posteriores.
+
+    Args:
+        today (datetime.date): Last day to compute (default: today).
+        closes_loader (Callable): `loader(tickers, start) -> {ticker: closes}` (default: bar store).
+
+    Returns:
+        int: Number of days recomputed.
+    """
+    _ensure_table()
+    today = today or datetime.date.today()
+    closes_loader = closes_loader or _load_closes
+
+    ledger = load_ledger()
+    if ledger.empty:
+        PortfolioValue.delete().execute()
+        return 0
+
+    first_day = ledger['date'].min().date()
+    last_stored = _as_date(PortfolioValue.select(fn.MAX(PortfolioValue.date)).scalar())
+    first_incomplete = _as_date(PortfolioValue.select(fn.MIN(PortfolioValue.date))
+                                .where(PortfolioValue.complete == False).scalar())
+    resume = min((d for d in (last_stored, first_incomplete) if d is not None), default=None)
+    start = first_day if resume is None else max(first_day, resume)
+    if start > today:
+        return 0
+
+    # Only tickers held when the range starts or traded within it need closes
+    signed = ledger['quantity'].where(ledger['operation_type'] == "Compra", -ledger['quantity'])
+    before = ledger['date'] < pd.Timestamp(start)
+    held_at_start = signed[before].groupby(ledger.loc[before, 'ticker']).sum()
+    tickers = sorted(set(held_at_start[held_at_start > 0].index) | set(ledger.loc[~before, 'ticker']))
+    closes = closes_loader(tickers, start - datetime.timedelta(days=CLOSE_LOOKBACK_DAYS))
+
+    series = compute_value_series(ledger, closes, start, today)
+    rows = [{"date": day.date(), "currency": currency, "value": float(value),
+             "invested": float(invested), "complete": bool(complete)}
+            for day, currency, value, invested, complete in series.itertuples()]
+    with PortfolioValue._meta.database.atomic():
+        PortfolioValue.delete().where(PortfolioValue.date >= start).execute()
+        for i in range(0, len(rows), 300):
+            PortfolioValue.insert_many(rows[i:i + 300]).execute()
+    return len(rows)
+
+def get_value_series(start: datetime.date = None, update: bool = True) -> pd.DataFrame:
+    """
+    Returns the materialized daily portfolio value series.
+    Devuelve la serie diaria materializada del valor del portafolio.
+
+    Args:
+        start (datetime.date): First day to return (None = all).
+        update (bool): Bring the series up to date first (only missing days are computed).
+
+    Returns:
+        pd.DataFrame: Indexed by date with columns currency, value, invested and complete
+            (one row per currency held that day; see `value_series_in` to add them up).
+    """
+    if update:
+        try:
+            update_value_series()
+        except Exception as e:
+            print(f"Error updating portfolio value series: {e}")
+
+    _ensure_table()
+    query = PortfolioValue.select(PortfolioValue.date, PortfolioValue.currency, PortfolioValue.value,
+                                  PortfolioValue.invested, PortfolioValue.complete)
+    if start is not None:
+        query = query.where(PortfolioValue.date >= start)
+    rows = list(query.order_by(PortfolioValue.date, PortfolioValue.currency).tuples())
+    df = pd.DataFrame(rows, columns=['date'] + SERIES_COLUMNS)
+    df['date'] = pd.to_datetime(df['date'])
+    df['complete'] = df['complete'].astype(bool)
+    return df.set_index('date')
@@ -1,6 +1,13 @@
+import time
 import pandas as pd
 from typing import List, Dict
+from peewee import fn
 from src.models.database import PortfolioItem
+from src.services.valuation import quotes_frame, value_holdings, ValuationSnapshot
+from src.services.performance import invalidate_value_series
+from src.services.lots import sync_lots
+
+POSITION_COLUMNS = ['ticker', 'broker', 'category', 'quantity', 'avg_price', 'target_price']
 
 class Portfolio:
     """
@@ -8,55 +15,121 @@ class Portfolio:
     Gestiona los datos del portafolio desde la base de datos SQLite.
     """
     def __init__(self):
-        self.holdings = {} # Dict[Category, DataFrame]
+        # In-memory index: ticker -> broker -> position fields. Writes update it in
+        # place; the per-category DataFrames are rebuilt lazily from it on access.
+        self._positions = {}
+        self._holdings = None
+        self._frame = None
+        self.version = 0 # Bumped on every change to holdings (invalidates the valuation snapshot)
+        self._snapshot = None
         self.load_data()
 
+    @property
+    def holdings(self) -> Dict[str, pd.DataFrame]:
+        """
+        Holdings per category: Dict[Category, DataFrame indexed by ticker with
+        quantity, avg_price and target_price].
+        Tenencias por categoría, construidas desde el índice en memoria.
+        """
+        if self._holdings is None:
+            df = self._positions_frame()
+            self._holdings = {
+                category: group.set_index('ticker')[['quantity', 'avg_price', 'target_price']]
+                for category, group in df.groupby('category', sort=False)
+            }
+        return self._holdings
+
     def load_data(self):
         """
-        Loads data from the Database.
-        Carga datos desde la base de datos.
+        Loads data from the Database (full reload of the in-memory index).
+        Carga datos desde la base de datos (recarga completa del índice en memoria).
+        
+        Rows are read as plain tuples (no model instances) straight into a DataFrame.
         """
         try:
-            items = PortfolioItem.select()
-            data = []
-            for item in items:
-                data.append({
-                    "ticker": item.ticker,
-                    "quantity": item.quantity,
-                    "category": item.category,
-                    "source_sheet": item.source_sheet,
-                    "avg_price": item.avg_price,
-                    "target_price": item.target_price
-                })
-            
-            if data:
-                df = pd.DataFrame(data)
-                # Group by category to match previous structure
-                for category in df['category'].unique():
-                    # Include avg_price and target_price in the DataFrame
-                    self.holdings[category] = df[df['category'] == category].set_index('ticker')[['quantity', 'avg_price', 'target_price']]
-            
+            rows = list(PortfolioItem
+                        .select(PortfolioItem.ticker, PortfolioItem.broker, PortfolioItem.category,
+                                PortfolioItem.quantity, PortfolioItem.avg_price, PortfolioItem.target_price)
+                        .tuples())
         except Exception as e:
             print(f"Error loading portfolio from DB: {e}")
+            rows = []
+        
+        positions = {}
+        for ticker, broker, category, quantity, avg_price, target_price in rows:
+            positions.setdefault(ticker, {})[broker] = {
+                "category": category,
+                "quantity": quantity,
+                "avg_price": avg_price,
+                "target_price": target_price
+            }
+        self._positions = positions
+        self._mark_changed()
+        # Same row the index kept if a ticker/broker pair is duplicated
+        self._frame = (pd.DataFrame(rows, columns=POSITION_COLUMNS)
+                       .drop_duplicates(subset=['ticker', 'broker'], keep='last')
+                       .reset_index(drop=True))
+
+    def _set_position(self, item: PortfolioItem):
+        """
+        Applies a saved PortfolioItem to the in-memory index (O(1)).
+        Aplica un PortfolioItem guardado al índice en memoria (O(1)).
+        """
+        self._positions.setdefault(item.ticker, {})[item.broker] = {
+            "category": item.category,
+            "quantity": item.quantity,
+            "avg_price": item.avg_price,
+            "target_price": item.target_price
+        }
+        self._mark_changed()
+
+    def _remove_position(self, ticker: str, broker: str = None):
+        """
+        Removes one position (or every broker's position if broker is None) from the index.
+        Elimina una posición (o la de todos los brokers si broker es None) del índice.
+        """
+        if broker is None:
+            self._positions.pop(ticker, None)
+        else:
+            brokers = self._positions.get(ticker, {})
+            brokers.pop(broker, None)
+            if not brokers:
+                self._positions.pop(ticker, None)
+        self._mark_changed()
+
+    def _mark_changed(self):
+        """
+        Drops the materialized per-category frames and invalidates the valuation snapshot.
+        Descarta los frames por categoría materializados e invalida el snapshot de valuación.
+        """
+        self._holdings = None
+        self._frame = None
+        self.version += 1
+
+    def _positions_frame(self) -> pd.DataFrame:
+        """
+        Flat frame of the in-memory index (one row per ticker/broker position).
+        Frame plano del índice en memoria (una fila por posición ticker/broker).
+        """
+        if self._frame is None:
+            rows = [(ticker, broker, p["category"], p["quantity"], p["avg_price"], p["target_price"])
+                    for ticker, brokers in self._positions.items() for broker, p in brokers.items()]
+            self._frame = pd.DataFrame(rows, columns=POSITION_COLUMNS)
+        return self._frame
 
     def get_portfolio_summary(self) -> Dict[str, float]:
         """
         Returns a summary of the portfolio (Total Invested per Category).
         Devuelve un resumen del portafolio (Total Invertido por Categoría).
         """
-        summary = {}
         try:
-            # We need to query the DB to get avg_price, as self.holdings only has quantities
-            items = PortfolioItem.select()
-            for item in items:
-                if item.category not in summary:
-                    summary[item.category] = 0.0
-                
-                # Calculate estimated invested amount
-                invested = item.quantity * item.avg_price
-                summary[item.category] += invested
-            
-            return summary
+            # Aggregated by SQLite: SUM(quantity * avg_price) GROUP BY category
+            query = (PortfolioItem
+                     .select(PortfolioItem.category,
+                             fn.SUM(PortfolioItem.quantity * PortfolioItem.avg_price))
+                     .group_by(PortfolioItem.category)
+                     .tuples())
+            return {category: invested or 0.0 for category, invested in query}
         except Exception as e:
             print(f"Error calculating summary: {e}")
             return {}
@@ -64,43 +137,42 @@ class Portfolio:
     def get_holdings_with_valuations(self) -> pd.DataFrame:
         """
         Returns a DataFrame with all holdings including current price and valuations.
+        
+        Expired prices are served right away (and refreshed in the background);
+        the "Price Age" column holds how many seconds old each price was when the
+        snapshot was taken. See `get_valuation_snapshot`.
+        """
+        return self.get_valuation_snapshot().holdings
+
+    def get_valuation_snapshot(self):
         """
-        from src.external.market_data import get_current_price
+        Returns the current valuation of the portfolio, reusing the last one unless
+        prices were refreshed or the portfolio changed since.
+        Devuelve la valuación actual del portafolio, reutilizando la última salvo que
+        los precios se hayan actualizado o el portafolio haya cambiado desde entonces.
         
-        all_data = []
+        Returns:
+            ValuationSnapshot: Immutable snapshot shared by every tab and chart.
+        """
+        from src.external.market_data import get_current_prices_with_age
+        from src.external.quote_cache import quote_cache
         
-        for category, df_holdings in self.holdings.items():
-            for ticker, row in df_holdings.iterrows():
-                qty = row['quantity']
-                avg_price = row['avg_price']
-                
-                # Fetch current price
-                current_price = get_current_price(ticker)
-                if current_price is None:
-                    current_price = 0.0
-                
-                total_value = qty * current_price
-                invested_capital = qty * avg_price
-                
-                gain_loss_amount = total_value - invested_capital
-                gain_loss_pct = ((current_price - avg_price) / avg_price * 100) if avg_price > 0 else 0.0
-                
-                all_data.append({
-                    "Ticker": ticker,
-                    "Category": category,
-                    "Quantity": qty,
-                    "Avg Price": avg_price,
-                    "Current Price": current_price,
-                    "Target Price": row.get('target_price', 0.0), # Add Target
-                    "Total Value": total_value,
-                    "Gain/Loss $": gain_loss_amount,
-                    "Gain/Loss %": gain_loss_pct
-                })
+        quote_version = quote_cache.version
+        if self._snapshot is not None and self._snapshot.is_current(quote_version, self.version):
+            return self._snapshot
         
-        if not all_data:
-            return pd.DataFrame()
-            
-        return pd.DataFrame(all_data)
+        holdings = self._positions_frame()
+        if holdings.empty:
+            valued = pd.DataFrame()
+        else:
+            # Fetch all quotes in one batch instead of one request per holding
+            quotes = get_current_prices_with_age(holdings["ticker"].tolist())
+            valued = value_holdings(holdings, quotes_frame(quotes))
+        
+        # Keyed on the version read *before* valuing: prices fetched meanwhile
+        # make the next call rebuild once with them
+        self._snapshot = ValuationSnapshot(valued, time.time(), quote_version, self.version)
+        return self._snapshot
 
     def get_all_tickers(self) -> List[str]:
         """
@@ -123,48 +195,49 @@ class Portfolio:
         abs_quantity = abs(quantity_change)
         
         try:
-            # Log Transaction
             from src.models.database import Transaction
-            Transaction.create(
-                date=date,
-                ticker=ticker,
-                operation_type=operation_type,
-                quantity=abs_quantity,
-                price=price,
-                broker=broker,
-                category=category
-            )
-            print(f"Logged transaction: {operation_type} {ticker}")
-
-            # Check if exists (Ticker AND Broker)
+            # Validate before writing anything: a rejected sell must leave no trace
             item = PortfolioItem.get_or_none((PortfolioItem.ticker == ticker) & (PortfolioItem.broker == broker))
+            if item is None and quantity_change <= 0:
+                raise ValueError(f"No puedes vender {ticker} en {broker} porque no lo tienes en cartera.")
             
-            if item:
-                new_quantity = item.quantity + quantity_change
+            # Ledger row, position and tax lots are written together or not at all
+            with Transaction._meta.database.atomic():
+                Transaction.create(
+                    date=date,
+                    ticker=ticker,
+                    operation_type=operation_type,
+                    quantity=abs_quantity,
+                    price=price,
+                    broker=broker,
+                    category=category
+                )
                 
-                if quantity_change > 0: # Buy - Weighted Average
-                    total_cost = (item.quantity * item.avg_price) + (quantity_change * price)
-                    item.avg_price = total_cost / new_quantity
-                
-                else: # Sell
-                    # Selling shares does NOT change the average price of the remaining shares.
-                    # It only reduces the quantity.
-                    # El precio promedio se mantiene igual al vender, solo cambia la cantidad.
-                    pass
-
-                # Use tolerance for float comparison
-                if new_quantity <= 1e-9:
-                    # If sold all, delete
-                    item.delete_instance()
-                    print(f"Sold all {ticker} ({broker}). Removed from DB.")
+                if item:
+                    new_quantity = item.quantity + quantity_change
+                    
+                    if quantity_change > 0: # Buy - Weighted Average
+                        total_cost = (item.quantity * item.avg_price) + (quantity_change * price)
+                        item.avg_price = total_cost / new_quantity
+                    
+                    else: # Sell
+                        # Selling shares does NOT change the average price of the remaining shares.
+                        # It only reduces the quantity.
+                        # El precio promedio se mantiene igual al vender, solo cambia la cantidad.
+                        pass
+                    
+                    # Use tolerance for float comparison
+                    sold_all = new_quantity <= 1e-9
+                    if sold_all:
+                        # If sold all, delete
+                        item.delete_instance()
+                    else:
+                        item.quantity = new_quantity
+                        item.save()
                 else:
-                    item.quantity = new_quantity
-                    item.save()
-                    print(f"Updated {ticker} ({broker}): {new_quantity} | New Avg Price: {item.avg_price:.2f}")
-            else:
-                # If buying new
-                if quantity_change > 0:
-                    PortfolioItem.create(
+                    # Buying new
+                    sold_all = False
+                    item = PortfolioItem.create(
                         ticker=ticker,
                         quantity=quantity_change,
                         category=category,
@@ -172,14 +245,23 @@ class Portfolio:
                         broker=broker,
                         avg_price=price
                     )
-                    print(f"Created new position {ticker} ({broker}): {quantity_change}")
-                else:
-                    # print(f"Cannot sell {ticker}: Not in portfolio.")
-                    raise ValueError(f"No puedes vender {ticker} en {broker} porque no lo tienes en cartera.")
+                
+                # Tax lots only need this transaction matched against the open ones
+                sync_lots(keys=[(ticker, broker)])
             
-            # Reload data to reflect changes
-            self.load_data()
+            # Committed: update the in-memory index and the derived value series
+            print(f"Logged transaction: {operation_type} {ticker}")
+            if sold_all:
+                self._remove_position(ticker, broker)
+                print(f"Sold all {ticker} ({broker}). Removed from DB.")
+            else:
+                self._set_position(item)
+                print(f"Updated {ticker} ({broker}): {item.quantity} | Avg Price: {item.avg_price:.2f}")
+            # Portfolio value series must be recomputed from this day on
+            invalidate_value_series(date)
             
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Error updating position: {e}")
 
@@ -204,12 +286,14 @@ class Portfolio:
             q1 = PortfolioItem.delete().where(PortfolioItem.ticker == ticker)
             count1 = q1.execute()
             
-            # Delete from Transactions
+            # Delete from Transactions (value series recomputed from its first trade)
+            invalidate_value_series(Transaction.select(fn.MIN(Transaction.date))
+                                    .where(Transaction.ticker == ticker).scalar())
             q2 = Transaction.delete().where(Transaction.ticker == ticker)
             count2 = q2.execute()
             
             print(f"Deleted {ticker}: {count1} portfolio items, {count2} transactions.")
-            self.load_data()
+            self._remove_position(ticker)
             return count1 + count2
         except Exception as e:
             print(f"Error deleting ticker {ticker}: {e}")
@@ -242,62 +326,85 @@ class Portfolio:
             operation_type = transaction.operation_type
             broker = transaction.broker
             
-            # Delete the transaction
-            transaction.delete_instance()
+            # Delete the transaction and recalculate the position from its remaining
+            # ledger (plus any holdings the ledger never explained)
+            from src.services.ledger import opening_balances, rebuild_positions
+            with Transaction._meta.database.atomic():
+                opening = opening_balances([(ticker, broker)])
+                transaction.delete_instance()
+                rebuild_positions([(ticker, broker)], opening=opening)
+            invalidate_value_series(transaction.date)
             print(f"Deleted transaction {transaction_id}: {operation_type} {quantity} {ticker}")
             
-            # Recalculate portfolio position for this ticker/broker
-            # Get all remaining transactions for this ticker/broker
-            remaining_txs = Transaction.select().where(
-                (Transaction.ticker == ticker) & 
-                (Transaction.broker == broker)
-            ).order_by(Transaction.date)
-            
-            # Recalculate from scratch
-            total_quantity = 0
-            total_cost = 0
-            
-            for tx in remaining_txs:
-                if tx.operation_type == "Compra":
-                    total_cost += tx.quantity * tx.price
-                    total_quantity += tx.quantity
-                else:  # Venta
-                    # Reduce cost proportionally
-                    if total_quantity > 0:
-                        avg_price = total_cost / total_quantity
-                        total_cost -= tx.quantity * avg_price
-                        total_quantity -= tx.quantity
-            
-            # Update or delete portfolio item
             item = PortfolioItem.get_or_none(
                 (PortfolioItem.ticker == ticker) & 
                 (PortfolioItem.broker == broker)
             )
-            
-            if total_quantity > 0:
-                avg_price = total_cost / total_quantity if total_quantity > 0 else 0
-                if item:
-                    item.quantity = total_quantity
-                    item.avg_price = avg_price
-                    item.save()
-                    print(f"Updated {ticker} ({broker}): {total_quantity} @ ${avg_price:.2f}")
-                else:
-                    # This shouldn't happen, but handle it
-                    print(f"Warning: Portfolio item not found for {ticker} ({broker})")
+            if item:
+                self._set_position(item)
+                print(f"Updated {ticker} ({broker}): {item.quantity} @ ${item.avg_price:.2f}")
             else:
-                # No more holdings, delete portfolio item
-                if item:
-                    item.delete_instance()
-                    print(f"Removed {ticker} ({broker}) from portfolio (no holdings left)")
+                self._remove_position(ticker, broker)
+                print(f"Removed {ticker} ({broker}) from portfolio (no holdings left)")
             
-            # Reload data
-            self.load_data()
             return True
             
         except Exception as e:
             print(f"Error deleting transaction {transaction_id}: {e}")
             return False
 
+    def rebuild_positions(self, dry_run: bool = False) -> dict:
+        """
+        Rebuilds every position from the transaction ledger (e.g. after a data fix).
+        Reconstruye todas las posiciones desde el libro de transacciones.
+        
+        Args:
+            dry_run (bool): Only report positions that differ from the ledger.
+            
+        Returns:
+            dict: Report from `src.services.ledger.rebuild_positions`.
+        """
+        from src.services.ledger import rebuild_positions
+        report = rebuild_positions(dry_run=dry_run)
+        if not dry_run:
+            self.load_data()
+        return report
+
+    def import_transactions(self, df: pd.DataFrame, skip_invalid: bool = False, dry_run: bool = False) -> dict:
+        """
+        Bulk-imports transactions (e.g. a broker statement) and reloads the index once.
+        Importa transacciones en bloque (p. ej. un resumen del broker) y recarga el índice una vez.
+        
+        Args:
+            df (DataFrame): Rows to import (see `src.services.importer.read_transactions_csv`).
+            skip_invalid (bool): Import the valid rows even if some rows are invalid.
+            dry_run (bool): Only validate, don't write.
+            
+        Returns:
+            dict: Report from `src.services.importer.import_transactions`.
+        """
+        from src.services.importer import import_transactions
+        report = import_transactions(df, skip_invalid=skip_invalid, dry_run=dry_run)
+        if report["imported"] and not dry_run:
+            self.load_data()
+        return report
+
+    def get_lot_report(self, method: str = "FIFO") -> Dict[str, pd.DataFrame]:
+        """
+        Realized and unrealized P&L from the tax lots (FIFO, LIFO or AVERAGE).
+        Resultado realizado y no realizado a partir de los lotes (FIFO, LIFO o PROMEDIO).
+        
+        Returns:
+            dict: {"report": per ticker/broker P&L, "lots": open lots, "realized": realized matches}.
+        """
+        from src.external.market_data import get_current_prices
+        from src.services.lots import get_open_lots, get_realized, lot_report
+        sync_lots(method)
+        lots = get_open_lots(method, sync=False)
+        realized = get_realized(method, sync=False)
+        prices = get_current_prices(lots['ticker'].unique().tolist()) if not lots.empty else {}
+        return {"report": lot_report(lots, realized, prices), "lots": lots, "realized": realized}
+
     def update_target(self, ticker: str, target_price: float):
         """
         Updates the target price for all portfolio items with the given ticker.
@@ -309,7 +416,9 @@ class Portfolio:
             q = PortfolioItem.update(target_price=target_price).where(PortfolioItem.ticker == ticker)
             count = q.execute()
             print(f"Updated target for {ticker} to {target_price} ({count} items updated)")
-            self.load_data()
+            for position in self._positions.get(ticker, {}).values():
+                position["target_price"] = target_price
+            self._mark_changed()
             return count > 0
         except Exception as e:
             print(f"Error updating target for {ticker}: {e}")
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import List
+from src.models.database import PortfolioItem, WishlistItem
+from src.external.quote_cache import quote_cache
+
+class PriceRefresher:
+    """
+    Background thread that keeps the quotes of every portfolio and wishlist ticker
+    up to date in the shared quote cache/table, independently of Streamlit reruns.
+    Hilo en segundo plano que mantiene actualizadas en la caché/tabla compartida las
+    cotizaciones de todos los tickers del portafolio y la wishlist, sin depender de
+    las re-ejecuciones de Streamlit.
+
+    While it runs, the quote cache TTL is stretched to cover two refresh intervals,
+    so renders read prices written by the refresher instead of hitting the network;
+    stop() puts the previous TTL back. The interval is shared by every session.
+    Mientras corre, el TTL de la caché cubre dos intervalos; stop() restaura el anterior.
+    """
+    def __init__(self, interval: int = 60):
+        self.interval = interval
+        self.last_run = None
+        self.last_duration = None
+        self.last_count = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._base_ttl = None
+
+    def is_running(self) -> bool:
+        """
+        Returns True if the background thread is alive.
+        Devuelve True si el hilo en segundo plano está activo.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: int = None):
+        """
+        Starts the background thread (no-op if already running) and applies the interval.
+        Inicia el hilo en segundo plano (si no está activo) y aplica el intervalo.
+
+        Args:
+            interval (int): Seconds between refreshes. Values <= 0 keep the current one.
+        """
+        with self._state_lock:
+            if not self.is_running():
+                self._base_ttl = quote_cache.ttl
+                self._stop.clear()
+                self._wake.clear()
+                self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+                self._thread.start()
+            self._apply_interval(interval)
+
+    def stop(self):
+        """
+        Stops the background thread and restores the quote cache TTL it replaced.
+        Detiene el hilo en segundo plano y restaura el TTL de la caché que reemplazó.
+        """
+        with self._state_lock:
+            self._stop.set()
+            self._wake.set()
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            self._thread = None
+            if self._base_ttl is not None:
+                quote_cache.configure(ttl=self._base_ttl)
+                self._base_ttl = None
+
+    def set_interval(self, interval: int = None):
+        """
+        Changes the refresh interval; while running, the quote cache TTL follows it.
+        Cambia el intervalo de actualización; mientras corre, el TTL de la caché lo sigue.
+        """
+        with self._state_lock:
+            self._apply_interval(interval)
+
+    def _apply_interval(self, interval: int = None):
+        """
+        Stores a new interval and, if the thread runs, stretches the TTL to two intervals.
+        Guarda un nuevo intervalo y, si el hilo corre, lleva el TTL a dos intervalos.
+        """
+        if interval and interval > 0 and interval != self.interval:
+            self.interval = interval
+            self._wake.set()  # Re-schedule with the new interval right away
+        if self._base_ttl is not None:
+            quote_cache.configure(ttl=max(self._base_ttl, self.interval * 2))
+
+    def tracked_tickers(self) -> List[str]:
+        """
+        Returns every ticker in the portfolio and the wishlist.
+        Devuelve todos los tickers del portafolio y la wishlist.
+        """
+        portfolio = [row[0] for row in PortfolioItem.select(PortfolioItem.ticker).distinct().tuples()]
+        wishlist = [row[0] for row in WishlistItem.select(WishlistItem.ticker).tuples()]
+        return list(dict.fromkeys(portfolio + wishlist))
+
+    def refresh_now(self) -> int:
+        """
+        Fetches fresh quotes for all tracked tickers synchronously.
+        Obtiene cotizaciones frescas de todos los tickers seguidos de forma sincrónica.
+
+        Returns:
+            int: Number of tickers with a price.
+        """
+        from src.external.market_data import refresh_prices
+
+        with self._run_lock:
+            start = time.time()
+            try:
+                prices = refresh_prices(self.tracked_tickers())
+            except Exception as e:
+                print(f"Error refreshing prices in background: {e}")
+                return 0
+            self.last_count = sum(1 for p in prices.values() if p)
+            self.last_run = time.time()
+            self.last_duration = self.last_run - start
+            return self.last_count
+
+    def _run(self):
+        """
+        Thread loop: refresh, then sleep until the next interval (or a wake-up).
+        Bucle del hilo: actualiza y espera hasta el próximo intervalo (o un aviso).
+        """
+        while not self._stop.is_set():
+            self.refresh_now()
+            self._wake.wait(timeout=self.interval)
+            self._wake.clear()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+def get_price_refresher() -> PriceRefresher:
+    """
+    Returns the process-wide refresher shared by every Streamlit session.
+    Devuelve el refresher del proceso compartido por todas las sesiones de Streamlit.
+    """
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = PriceRefresher()
+        return _refresher
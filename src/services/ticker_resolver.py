@@ -0,0 +1,180 @@
+import datetime
+import threading
+import time
+from typing import Dict, List, Optional
+from src.models.database import KnownTicker, PortfolioItem, WishlistItem, Transaction
+
+class TickerResolver:
+    """
+    Validates ticker symbols with a local index of known-valid symbols and a
+    TTL-bounded negative cache, so only never-seen symbols hit the network.
+    Valida símbolos con un índice local de tickers válidos conocidos y una caché
+    negativa con TTL, de modo que solo los símbolos nunca vistos consultan la red.
+    """
+    def __init__(self, negative_ttl: int = 15 * 60):
+        self.negative_ttl = negative_ttl
+        self._invalid = {}  # ticker -> expiration timestamp
+        self._lock = threading.Lock()
+        self._index_ready = False
+
+    def resolve(self, ticker: str) -> Optional[float]:
+        """
+        Returns the current price of a valid ticker, or None if it does not exist or
+        its price cannot be obtained right now.
+        Devuelve el precio actual de un ticker válido, o None si no existe o si su
+        precio no se puede obtener en este momento.
+
+        The price always comes from the quote cache or the provider; the index only
+        records which symbols exist. A symbol is remembered as invalid only when the
+        provider answered without data, never after an error, timeout or open breaker.
+
+        Args:
+            ticker (str): Stock symbol (with market suffix, e.g. 'GGAL.BA').
+
+        Returns:
+            float: Current price, or None.
+        """
+        ticker = ticker.upper().strip()
+        if not ticker or self._is_known_invalid(ticker):
+            return None
+
+        from src.external.market_data import lookup_price
+        price, answered = lookup_price(ticker)
+        self._record_lookup(ticker, price, answered)
+        return price
+
+    def is_valid(self, ticker: str) -> bool:
+        """
+        Returns True if the ticker exists in the market. Instant for symbols seen before.
+        Devuelve True si el ticker existe en el mercado. Instantáneo para símbolos ya vistos.
+        """
+        ticker = ticker.upper().strip()
+        if not ticker or self._is_known_invalid(ticker):
+            return False
+        if self._lookup_index(ticker) is not None:
+            return True
+        return self.resolve(ticker) is not None
+
+    def validate_many(self, tickers: List[str]) -> Dict[str, Optional[bool]]:
+        """
+        Validates several tickers at once: known symbols are answered with one
+        index query and the unknown ones with one batch quote request.
+        Valida varios tickers a la vez: los conocidos se responden con una sola
+        consulta al índice y los desconocidos con una consulta de cotizaciones en bloque.
+
+        Returns:
+            Dict[str, Optional[bool]]: Ticker -> True if it exists, False if the provider
+                says it doesn't, None if it could not be verified (provider error or down).
+        """
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+        result = {t: False for t in tickers}
+        pending = [t for t in tickers if not self._is_known_invalid(t)]
+
+        known = set()
+        try:
+            self._ensure_index()
+            for i in range(0, len(pending), 500):
+                query = KnownTicker.select(KnownTicker.ticker).where(KnownTicker.ticker.in_(pending[i:i + 500]))
+                known.update(row[0] for row in query.tuples())
+        except Exception as e:
+            print(f"Error reading ticker index: {e}")
+        for ticker in known:
+            result[ticker] = True
+
+        unknown = [t for t in pending if t not in known]
+        if unknown:
+            from src.external.market_data import lookup_prices
+            for ticker, (price, answered) in lookup_prices(unknown).items():
+                self._record_lookup(ticker, price, answered)
+                result[ticker] = True if price else (False if answered else None)
+        return result
+
+    def _record_lookup(self, ticker: str, price: Optional[float], answered: bool):
+        """
+        Indexes a symbol the provider priced, and negative-caches one it answered
+        without data (never one it failed to answer).
+        Indexa un símbolo con precio y guarda como inválido uno sin datos (nunca
+        uno cuya consulta falló).
+        """
+        if not price and not answered:
+            return
+        if self._lookup_index(ticker) is not None:
+            return
+        if price:
+            self.remember_valid(ticker, price)
+        else:
+            self.remember_invalid(ticker)
+
+    def remember_valid(self, ticker: str, price: float = None):
+        """
+        Adds a ticker to the local index of valid symbols.
+        Agrega un ticker al índice local de símbolos válidos.
+        """
+        with self._lock:
+            self._invalid.pop(ticker, None)
+        try:
+            KnownTicker.replace(ticker=ticker, last_price=price,
+                                validated_at=datetime.datetime.now()).execute()
+        except Exception as e:
+            print(f"Error saving known ticker {ticker}: {e}")
+
+    def remember_invalid(self, ticker: str):
+        """
+        Marks a ticker as invalid for `negative_ttl` seconds.
+        Marca un ticker como inválido durante `negative_ttl` segundos.
+        """
+        with self._lock:
+            self._invalid[ticker] = time.time() + self.negative_ttl
+
+    def _is_known_invalid(self, ticker: str) -> bool:
+        """
+        Checks the negative cache, dropping the entry once it expires.
+        Consulta la caché negativa, descartando la entrada al expirar.
+        """
+        with self._lock:
+            expires = self._invalid.get(ticker)
+            if expires is None:
+                return False
+            if time.time() > expires:
+                del self._invalid[ticker]
+                return False
+            return True
+
+    def _lookup_index(self, ticker: str):
+        """
+        Returns the index row of a ticker, or None if it was never validated.
+        Devuelve la fila del índice de un ticker, o None si nunca fue validado.
+        """
+        try:
+            self._ensure_index()
+            return KnownTicker.get_or_none(KnownTicker.ticker == ticker)
+        except Exception as e:
+            print(f"Error reading ticker index: {e}")
+            return None
+
+    def _ensure_index(self):
+        """
+        Creates the index table if needed and seeds it with the tickers already
+        used in the portfolio, transactions and wishlist.
+        Crea la tabla del índice si hace falta y la carga con los tickers ya usados
+        en el portafolio, las transacciones y la wishlist.
+        """
+        if self._index_ready:
+            return
+        KnownTicker.create_table(safe=True)
+        tickers = set()
+        for model in (PortfolioItem, Transaction, WishlistItem):
+            try:
+                tickers.update(row[0] for row in model.select(model.ticker).distinct().tuples())
+            except Exception:
+                pass  # Table not created yet
+        if tickers:
+            rows = [{"ticker": t, "validated_at": datetime.datetime.now()} for t in tickers]
+            with KnownTicker._meta.database.atomic():
+                for i in range(0, len(rows), 300):
+                    KnownTicker.insert_many(rows[i:i + 300]).on_conflict_ignore().execute()
+        self._index_ready = True
+
+
+# Shared instance used by the UI
+ticker_resolver = TickerResolver()
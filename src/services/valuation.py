@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Tuple
+
+VALUATION_COLUMNS = [
+    "Ticker", "Category", "Currency", "Quantity", "Avg Price", "Current Price", "Price Age",
+    "Target Price", "Total Value", "Gain/Loss $", "Gain/Loss %"
+]
+# Columns expressed in the holding's currency (converted by `convert_valuation`)
+MONEY_COLUMNS = ["Avg Price", "Current Price", "Target Price", "Total Value", "Gain/Loss $"]
+
+def holding_currencies(tickers) -> np.ndarray:
+    """
+    Tags each ticker with the currency it is quoted in: BYMA symbols (.BA) in ARS,
+    everything else in USD.
+    Etiqueta cada ticker con su moneda de cotización: símbolos de BYMA (.BA) en ARS,
+    el resto en USD.
+    """
+    return np.where(pd.Series(tickers, dtype=object).str.upper().str.endswith(".BA"), "ARS", "USD")
+
+def quotes_frame(quotes: Dict[str, Tuple[float, float]]) -> pd.DataFrame:
+    """
+    Builds a quotes frame from a ticker -> (price, age) mapping.
+    Construye un frame de cotizaciones a partir de un mapeo ticker -> (precio, antigüedad).
+
+    Returns:
+        pd.DataFrame: Indexed by ticker with columns price and age.
+    """
+    frame = pd.DataFrame.from_dict(quotes, orient="index", columns=["price", "age"], dtype=float)
+    frame.index.name = "ticker"
+    return frame
+
+def value_holdings(holdings: pd.DataFrame, quotes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Values every position at once: joins holdings against quotes and computes total
+    value, invested capital and gain/loss as column-wise NumPy expressions.
+    Valúa todas las posiciones de una vez: une tenencias con cotizaciones y calcula
+    valor total, capital invertido y ganancia/pérdida como expresiones NumPy por columna.
+
+    Tickers without a quote are valued at 0 (same as a failed lookup).
+
+    Args:
+        holdings (DataFrame): One row per position with ticker, category, quantity,
+            avg_price and target_price (the flat positions frame of `Portfolio`).
+        quotes (DataFrame): Output of `quotes_frame`.
+
+    Returns:
+        pd.DataFrame: One row per position with the VALUATION_COLUMNS.
+    """
+    if holdings.empty:
+        return pd.DataFrame()
+
+    joined = holdings.join(quotes, on="ticker")
+    qty = joined["quantity"].to_numpy(dtype=float)
+    avg_price = joined["avg_price"].to_numpy(dtype=float)
+    price = np.nan_to_num(joined["price"].to_numpy(dtype=float), nan=0.0)
+
+    total_value = qty * price
+    invested = qty * avg_price
+    # Positions without an average cost report 0% instead of dividing by zero
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain_pct = np.where(avg_price > 0, (price - avg_price) / avg_price * 100, 0.0)
+
+    return pd.DataFrame({
+        "Ticker": joined["ticker"].to_numpy(),
+        "Category": joined["category"].to_numpy(),
+        "Currency": holding_currencies(joined["ticker"].to_numpy()),
+        "Quantity": qty,
+        "Avg Price": avg_price,
+        "Current Price": price,
+        "Price Age": joined["age"].to_numpy(dtype=float),
+        "Target Price": joined["target_price"].to_numpy(),
+        "Total Value": total_value,
+        "Gain/Loss $": total_value - invested,
+        "Gain/Loss %": gain_pct,
+    }, columns=VALUATION_COLUMNS)
+
+def convert_valuation(valued: pd.DataFrame, currency: str, ars_per_usd: float) -> pd.DataFrame:
+    """
+    Converts a valuation frame to one reporting currency in a single vectorized
+    step (percentages are unchanged).
+    Convierte un frame de valuación a una moneda de reporte en un único paso
+    vectorizado (los porcentajes no cambian).
+
+    Args:
+        valued (DataFrame): Output of `value_holdings` (with its Currency column).
+        currency (str): "ARS" or "USD".
+        ars_per_usd (float): Exchange rate to use (see `src.external.fx`).
+
+    Returns:
+        pd.DataFrame: Copy with MONEY_COLUMNS in `currency`.
+    """
+    if currency not in ("ARS", "USD"):
+        raise ValueError(f"Unsupported currency: {currency}")
+    converted = valued.copy()
+    if converted.empty:
+        return converted
+
+    source = converted["Currency"].to_numpy()
+    # Rows in the other currency: ARS -> USD divides by the rate, USD -> ARS multiplies
+    other = 1.0 / ars_per_usd if currency == "USD" else ars_per_usd
+    factor = np.where(source == currency, 1.0, other)
+    money = converted[MONEY_COLUMNS].to_numpy(dtype=float)
+    converted[MONEY_COLUMNS] = money * factor[:, None]
+    converted["Currency"] = currency
+    return converted
+
+class ValuationSnapshot:
+    """
+    Immutable result of valuing the portfolio at one point in time, shared by every
+    tab and chart of a rerun instead of each one redoing the valuation.
+    Resultado inmutable de valuar el portafolio en un momento dado, compartido por
+    todas las pestañas y gráficos en lugar de que cada uno repita la valuación.
+
+    A snapshot is tied to the quote cache version and the portfolio version it was
+    built from; `is_current` tells whether a price refresh or a DB write happened since.
+    """
+    __slots__ = ("_holdings", "as_of", "quote_version", "portfolio_version")
+
+    def __init__(self, holdings: pd.DataFrame, as_of: float, quote_version: int, portfolio_version: int):
+        object.__setattr__(self, "_holdings", holdings)
+        object.__setattr__(self, "as_of", as_of)
+        object.__setattr__(self, "quote_version", quote_version)
+        object.__setattr__(self, "portfolio_version", portfolio_version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ValuationSnapshot is immutable")
+
+    @property
+    def holdings(self) -> pd.DataFrame:
+        """
+        The valued positions (VALUATION_COLUMNS). Returns a copy, so callers may
+        modify it freely without affecting other consumers.
+        Las posiciones valuadas. Devuelve una copia que se puede modificar libremente.
+        """
+        return self._holdings.copy()
+
+    def holdings_in(self, currency: str, ars_per_usd: float) -> pd.DataFrame:
+        """
+        The valued positions converted to one reporting currency (see `convert_valuation`).
+        Las posiciones valuadas convertidas a una moneda de reporte.
+        """
+        return convert_valuation(self._holdings, currency, ars_per_usd)
+
+    @property
+    def empty(self) -> bool:
+        """
+        True if the portfolio had no positions when the snapshot was built.
+        True si el portafolio no tenía posiciones al crear la instantánea.
+        """
+        return self._holdings.empty
+
+    def is_current(self, quote_version: int, portfolio_version: int) -> bool:
+        """
+        Returns True if no price refresh or portfolio write happened since it was built.
+        Devuelve True si no hubo refresco de precios ni escritura desde que se creó.
+        """
+        return self.quote_version == quote_version and self.portfolio_version == portfolio_version
@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime
 import time
+from src.external.quote_cache import quote_cache
 
 def initialize_refresh_state():
     """
@@ -11,10 +12,6 @@ def initialize_refresh_state():
         st.session_state.last_price_update = None
     if 'refresh_interval' not in st.session_state:
         st.session_state.refresh_interval = 60  # Default: 60 seconds
-    if 'price_cache' not in st.session_state:
-        st.session_state.price_cache = {}
-    if 'cache_timestamp' not in st.session_state:
-        st.session_state.cache_timestamp = {}
 
 def get_time_since_last_update() -> float:
     """
@@ -116,47 +113,105 @@ def get_interval_options() -> dict:
         "Cada 5 minutos": 300
     }
 
-def get_cached_price(ticker: str, ttl: int = 30) -> float:
+def invalidate_price_cache(max_age: float = None):
     """
-    Get cached price if available and not expired.
-    Obtiene el precio en caché si está disponible y no ha expirado.
+    Start a new quote cache generation so prices are refetched on their next read.
+    Inicia una nueva generación de la caché para que los precios se vuelvan a consultar.
     
     Args:
-        ticker (str): Stock ticker symbol
-        ttl (int): Time to live in seconds (default: 30)
+        max_age (float): Only invalidate if the current generation is older than this
+            many seconds (avoids every open session refetching on the same interval).
+    """
+    from src.external.market_data import invalidate_prices
+    invalidate_prices(max_age)
+
+def format_cache_stats() -> str:
+    """
+    Format the quote cache hit/miss counters for display.
+    Formatea los contadores de aciertos/fallos de la caché para mostrarlos.
     
     Returns:
-        float: Cached price or None if not available/expired
+        str: Formatted stats (e.g., "12 aciertos / 3 fallos (15 tickers)")
     """
-    if ticker not in st.session_state.price_cache:
-        return None
+    stats = quote_cache.stats()
+    return f"{stats['hits']} aciertos / {stats['misses']} fallos ({stats['size']} tickers)"
+
+def format_refresher_status(refresher) -> str:
+    """
+    Format the background price refresher status for display.
+    Formatea el estado del refresco de precios en segundo plano para mostrarlo.
     
-    if ticker not in st.session_state.cache_timestamp:
-        return None
+    Args:
+        refresher (PriceRefresher): The process-wide refresher.
     
-    # Check if cache is still valid
-    elapsed = time.time() - st.session_state.cache_timestamp[ticker]
-    if elapsed > ttl:
-        return None
+    Returns:
+        str: Formatted status (e.g., "10:32:45 (12 tickers, 0.8s)"), "Pendiente" or "Detenido".
+    """
+    if not refresher.is_running():
+        return "Detenido"
+    if refresher.last_run is None:
+        return "Pendiente"
     
-    return st.session_state.price_cache[ticker]
+    dt = datetime.fromtimestamp(refresher.last_run)
+    return f"{dt.strftime('%H:%M:%S')} ({refresher.last_count} tickers, {refresher.last_duration:.1f}s)"
 
-def cache_price(ticker: str, price: float):
+def format_backup_status(scheduler) -> str:
     """
-    Cache a price with current timestamp.
-    Almacena un precio en caché con el timestamp actual.
+    Format the last database backup for display.
+    Formatea el último respaldo de la base para mostrarlo.
     
     Args:
-        ticker (str): Stock ticker symbol
-        price (float): Price to cache
-    """
-    st.session_state.price_cache[ticker] = price
-    st.session_state.cache_timestamp[ticker] = time.time()
+        scheduler (BackupScheduler): The process-wide backup scheduler.
+    
+    Returns:
+        str: Formatted status (e.g., "17/10 03:00 (12.3 MB, 0.4s)"), the last error or "Sin respaldos".
+    """
+    if scheduler.last_error:
+        return f"Error: {scheduler.last_error}"
+    last = scheduler.last_backup_time()
+    if last is None:
+        return "Sin respaldos"
+    
+    text = datetime.fromtimestamp(last).strftime('%d/%m %H:%M')
+    report = scheduler.last_report
+    if report is not None:
+        text += f" ({report['size'] / 1e6:.1f} MB, {report['duration']:.1f}s)"
+    return text
 
-def clear_price_cache():
+def format_price_age(seconds: float) -> str:
     """
-    Clear all cached prices.
-    Limpia todos los precios en caché.
+    Format how old a quote is for display in the holdings table.
+    Formatea la antigüedad de una cotización para mostrarla en la tabla de tenencias.
+    
+    Args:
+        seconds (float): Age of the price in seconds (None/NaN if unknown).
+    
+    Returns:
+        str: Formatted age (e.g., "45s", "3m", "2h") or "-" if unknown.
     """
-    st.session_state.price_cache = {}
-    st.session_state.cache_timestamp = {}
+    if seconds is None or seconds != seconds:  # None or NaN
+        return "-"
+    
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
+def format_provider_health(health: dict) -> str:
+    """
+    Format the market data provider health for display.
+    Formatea el estado del proveedor de datos de mercado para mostrarlo.
+    
+    Args:
+        health (dict): Circuit breaker status from market_data.get_provider_health().
+    
+    Returns:
+        str: Formatted status (e.g., "🟢 OK" or "🔴 Sin conexión, reintento en 45s").
+    """
+    if health["state"] == "closed":
+        return "🟢 OK"
+    if health["state"] == "half_open" or health["retry_in"] <= 0:
+        return "🟡 Reintentando... (mostrando precios en caché)"
+    return (f"🔴 Sin conexión ({health['failures']} fallos), reintento en "
+            f"{int(health['retry_in'])}s (mostrando precios en caché)")
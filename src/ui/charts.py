@@ -1,13 +1,27 @@
 import plotly.express as px
 import pandas as pd
 import streamlit as st
-from src.external.market_data import get_current_price
+from src.external.fx import fx_rates, DEFAULT_RATE
+
+def reporting_holdings(snapshot):
+    """
+    The snapshot's positions in the reporting currency chosen in the sidebar
+    (original currencies if none is chosen or the exchange rate is unavailable).
+    """
+    currency = st.session_state.get("report_currency", "ARS")
+    if currency not in ("ARS", "USD"):
+        return snapshot.holdings
+    rate, _ = fx_rates.current(st.session_state.get("fx_rate", DEFAULT_RATE))
+    if not rate:
+        return snapshot.holdings
+    return snapshot.holdings_in(currency, rate)
 
 def get_portfolio_df(portfolio):
     """
-    Wrapper to get portfolio data using the centralized method.
+    Wrapper to get portfolio data from the shared valuation snapshot
+    (computed once per price refresh / DB write, not once per chart).
     """
-    return portfolio.get_holdings_with_valuations()
+    return reporting_holdings(portfolio.get_valuation_snapshot())
 
 def plot_portfolio_composition(portfolio):
     """
@@ -69,3 +83,41 @@ def plot_gain_loss_by_stock(portfolio):
                  
     fig.update_layout(showlegend=False)
     st.plotly_chart(fig)
+
+def plot_portfolio_value_history():
+    """
+    Plots the daily portfolio value against the invested capital, read from the
+    materialized series (only days missing since the last visit are computed).
+    ARS and USD holdings are converted at each day's rate to the reporting
+    currency, or plotted separately if there is none (or no rate history).
+    """
+    from src.services.performance import get_value_series, value_series_in
+    with st.spinner("Actualizando evolución del portafolio..."):
+        df = get_value_series()
+    if df.empty:
+        return
+
+    currency = st.session_state.get("report_currency", "ARS")
+    rates = pd.Series(dtype=float)
+    if currency in ("ARS", "USD") and (df["currency"] != currency).any():
+        rates = fx_rates.history(st.session_state.get("fx_rate", DEFAULT_RATE), df.index.min().date())
+
+    if currency in ("ARS", "USD") and (rates.size or (df["currency"] == currency).all()):
+        series = value_series_in(df, currency, rates)
+        complete = series["complete"].all()
+        series = series.rename(columns={"value": "Valor", "invested": "Invertido"})
+        title = f'Evolución del Portafolio ({currency})'
+    else:
+        complete = df["complete"].all()
+        series = df.pivot_table(index=df.index, columns="currency", values=["value", "invested"])
+        series.columns = [f"{'Valor' if field == 'value' else 'Invertido'} {code}" for field, code in series.columns]
+        title = 'Evolución del Portafolio (monedas originales)'
+
+    plot = series.drop(columns="complete", errors="ignore").rename_axis("date").reset_index()
+    fig = px.line(plot, x='date', y=[c for c in plot.columns if c != 'date'],
+                  title=title,
+                  labels={'date': 'Fecha', 'value': 'Monto', 'variable': ''})
+    st.plotly_chart(fig)
+    if not complete:
+        st.caption("Algunos días valúan tickers sin cierre al último precio operado; "
+                   "se recalculan cuando aparece el cierre.")
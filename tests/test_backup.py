@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.backup import (backup_database, restore_backup, list_backups, prune_backups,
+                                 check_integrity, BackupScheduler)
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp_dir.name, "finance.db")
+        self.backup_dir = os.path.join(self.tmp_dir.name, "backups")
+        conn = sqlite3.connect(self.source)
+        conn.execute("PRAGMA journal_mode=wal")
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO t (payload) VALUES (?)", [("x" * 200,) for _ in range(20000)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_backup_is_a_complete_single_file(self):
+        report = backup_database(self.backup_dir, source=self.source, pages=64, pause=0)
+        self.assertEqual(list_backups(self.backup_dir), [report["path"]])
+        self.assertGreater(report["steps"], 1)
+        self.assertEqual(report["size"], os.path.getsize(report["path"]))
+        self.assertEqual(check_integrity(report["path"]), [])
+        self.assertEqual(self.count(report["path"]), 20000)
+        self.assertFalse(os.path.exists(report["path"] + "-wal"))
+
+    def test_backup_while_writing_is_consistent(self):
+        stop = threading.Event()
+        def writer():
+            conn = sqlite3.connect(self.source, timeout=15)
+            while not stop.is_set():
+                with conn:
+                    conn.execute("INSERT INTO t (payload) VALUES ('y')")
+            conn.close()
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            report = backup_database(self.backup_dir, source=self.source, pages=16, pause=0.001)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(check_integrity(report["path"]), [])
+        self.assertEqual(report["restarts"], 0)  # One WAL snapshot for the whole copy
+        self.assertGreaterEqual(self.count(report["path"]), 20000)
+        self.assertGreater(self.count(self.source), 20000)
+
+    def test_retention_keeps_newest(self):
+        paths = [backup_database(self.backup_dir, source=self.source, keep=None)["path"] for _ in range(4)]
+        self.assertEqual(prune_backups(self.backup_dir, keep=2), paths[:2])
+        report = backup_database(self.backup_dir, source=self.source, keep=2)
+        self.assertEqual(report["removed"], [paths[2]])
+        self.assertEqual(list_backups(self.backup_dir), [paths[3], report["path"]])
+
+    def test_restore_verifies_and_keeps_previous(self):
+        backup = backup_database(self.backup_dir, source=self.source)["path"]
+        live = sqlite3.connect(self.source)
+        live.execute("DELETE FROM t WHERE id > 10")
+        live.commit()
+
+        report = restore_backup(backup, target=self.source, backup_dir=self.backup_dir)
+        # Open connections see the restored data
+        self.assertEqual(live.execute("SELECT COUNT(*) FROM t").fetchone()[0], 20000)
+        live.close()
+        self.assertEqual(self.count(report["previous"]), 10)
+
+        # Retention never reaches the pre-restore copy
+        self.assertEqual(list_backups(self.backup_dir), [backup])
+        backup_database(self.backup_dir, source=self.source, keep=1)
+        self.assertTrue(os.path.exists(report["previous"]))
+
+    def test_restore_rejects_corrupt_backup(self):
+        corrupt = os.path.join(self.tmp_dir.name, "corrupt.db")
+        with open(corrupt, "wb") as f:
+            f.write(b"not a database" * 1000)
+        self.assertTrue(check_integrity(corrupt))
+        with self.assertRaises(ValueError):
+            restore_backup(corrupt, target=self.source, backup_dir=self.backup_dir)
+        self.assertEqual(self.count(self.source), 20000)
+        self.assertEqual(list_backups(self.backup_dir), [])
+
+    def test_scheduler_backs_up_when_due(self):
+        scheduler = BackupScheduler(interval=3600, keep=3, backup_dir=self.backup_dir)
+        self.assertEqual(scheduler.seconds_until_due(), 0.0)
+        with patch("src.services.backup._database_path", return_value=self.source):
+            scheduler.start()
+            deadline = time.time() + 5
+            while not list_backups(self.backup_dir) and time.time() < deadline:
+                time.sleep(0.05)
+            scheduler.stop()
+        self.assertEqual(len(list_backups(self.backup_dir)), 1)
+        self.assertGreater(scheduler.seconds_until_due(), 3500)
+
+if __name__ == '__main__':
+    unittest.main()
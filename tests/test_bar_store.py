@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import datetime
+import pandas as pd
+from unittest.mock import patch
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external import bar_store
+from src.models.database import PriceBar, BarCoverage
+
+def make_history(start, end, close=100.0):
+    """Builds a synthetic daily history between two dates (inclusive)."""
+    index = pd.date_range(start, end, freq='B', name='Date')
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000
+    }, index=index)
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([PriceBar, BarCoverage])
+        self.ctx.__enter__()
+        self.test_db.create_tables([PriceBar, BarCoverage])
+        bar_store._tables_ready = True
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    @patch('src.external.bar_store._fetch_history')
+    def test_short_periods_are_served_locally(self, mock_fetch):
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end)
+
+        year = bar_store.get_bars("AAPL", "1y")
+        self.assertFalse(year.empty)
+        self.assertEqual(mock_fetch.call_count, 1)
+
+        # Shorter periods within the tail TTL don't touch the network
+        week = bar_store.get_bars("AAPL", "5d")
+        month = bar_store.get_bars("AAPL", "1mo")
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(len(week), 5)
+        self.assertLess(len(month), len(year))
+
+    @patch('src.external.bar_store._fetch_history')
+    def test_longer_period_fetches_only_the_head(self, mock_fetch):
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end)
+        bar_store.get_bars("AAPL", "1y")
+        first_start = BarCoverage.get(BarCoverage.ticker == "AAPL").start_date
+
+        bar_store.get_bars("AAPL", "5y")
+        head_call = mock_fetch.call_args_list[1]
+        self.assertEqual(head_call.args[2], first_start - datetime.timedelta(days=1))
+
+    @patch('src.external.bar_store._fetch_history')
+    def test_stale_tail_is_refreshed_with_overlap(self, mock_fetch):
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end)
+        bar_store.get_bars("AAPL", "1y")
+
+        coverage = BarCoverage.get(BarCoverage.ticker == "AAPL")
+        coverage.end_date = datetime.date.today() - datetime.timedelta(days=10)
+        coverage.save()
+
+        bar_store.get_bars("AAPL", "1y")
+        tail_call = mock_fetch.call_args_list[-1]
+        self.assertEqual(tail_call.args[1], coverage.end_date - datetime.timedelta(days=bar_store.OVERLAP_DAYS))
+
+    @patch('src.external.bar_store._fetch_history')
+    def test_split_triggers_full_reload(self, mock_fetch):
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end, close=100.0)
+        bar_store.get_bars("AAPL", "1y")
+
+        coverage = BarCoverage.get(BarCoverage.ticker == "AAPL")
+        coverage.fetched_at = datetime.datetime.now() - datetime.timedelta(days=1)
+        coverage.save()
+
+        # Upstream history now reports split-adjusted closes
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end, close=50.0)
+        bars = bar_store.get_bars("AAPL", "1y")
+        self.assertTrue((bars['Close'] == 50.0).all())
+
+    @patch('src.external.bar_store._fetch_history')
+    def test_guard_wraps_only_downloads(self, mock_fetch):
+        from src.external.circuit_breaker import CircuitBreaker
+        mock_fetch.side_effect = lambda t, start, end: make_history(start, end)
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=60)
+
+        bars = bar_store.get_bars("AAPL", "1y", guard=breaker.call)
+        self.assertFalse(bars.empty)
+        self.assertEqual(breaker.status()["state"], "closed")
+
+        # A local write failure surfaces but is not a provider failure
+        with patch('src.external.bar_store._save_bars', side_effect=RuntimeError("disk I/O error")):
+            with self.assertRaises(RuntimeError):
+                bar_store.get_bars("MSFT", "1y", guard=breaker.call)
+        self.assertEqual(breaker.status()["state"], "closed")
+
+if __name__ == '__main__':
+    unittest.main()
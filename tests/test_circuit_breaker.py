@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.external import market_data
+from src.external.quote_cache import quote_cache
+
+def failing():
+    raise ConnectionError("rate limited")
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_backs_off(self):
+        breaker = CircuitBreaker(failure_threshold=2, base_delay=10, max_delay=25)
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=100.0):
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    breaker.call(failing)
+            self.assertEqual(breaker.state, "open")
+            # Fails fast without calling the function
+            with self.assertRaises(CircuitOpenError):
+                breaker.call(lambda: self.fail("should not be called"))
+
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=111.0):
+            # Probe fails -> reopens for twice as long
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+            self.assertAlmostEqual(breaker.retry_in(), 20.0)
+
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=132.0):
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+            # Capped at max_delay
+            self.assertAlmostEqual(breaker.retry_in(), 25.0)
+
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=158.0):
+            self.assertEqual(breaker.call(lambda: 42), 42)
+            self.assertTrue(breaker.is_closed())
+            self.assertEqual(breaker.trips, 0)
+
+    def test_single_probe_while_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=10)
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=0.0):
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+        with patch('src.external.circuit_breaker.time.monotonic', return_value=11.0):
+            breaker.before_call()  # Probe slot taken
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_call()
+
+class TestMarketDataDegraded(unittest.TestCase):
+    def setUp(self):
+        quote_cache.clear()
+        market_data._flights.forget()
+        self.breaker = market_data._breaker
+        market_data._breaker = CircuitBreaker(failure_threshold=1, base_delay=60)
+
+    def tearDown(self):
+        market_data._breaker = self.breaker
+        quote_cache.clear()
+
+    @patch('src.external.providers.yf.download', side_effect=ConnectionError("down"))
+    def test_serves_cached_prices_while_open(self, mock_download):
+        quote_cache.set("AAPL", 150.0)
+        market_data.invalidate_prices()
+
+        quotes = market_data.get_current_prices_with_age(["AAPL"])
+
+        self.assertEqual(quotes["AAPL"][0], 150.0)
+        self.assertEqual(market_data.get_provider_health()["state"], "open")
+        # Next call doesn't touch the provider at all
+        market_data._flights.forget()
+        self.assertEqual(market_data.get_current_price("AAPL"), 150.0)
+        self.assertEqual(mock_download.call_count, 1)
+
+    def test_lookup_tells_outage_from_missing_symbol(self):
+        provider = MagicMock()
+        with patch('src.external.market_data.get_provider', return_value=provider):
+            provider.get_quote.return_value = None
+            self.assertEqual(market_data.lookup_price("NOPE"), (None, True))
+
+            provider.get_quote.side_effect = ConnectionError("down")
+            self.assertEqual(market_data.lookup_price("NEW"), (None, False))
+            # Breaker open: not even asked
+            self.assertEqual(market_data.lookup_price("OTHER"), (None, False))
+            self.assertEqual(provider.get_quote.call_count, 2)
+
+    def test_batch_lookup_tells_outage_from_missing_symbol(self):
+        provider = MagicMock()
+        provider.get_quotes.return_value = {"AAPL": 150.0}
+        provider.get_quote.side_effect = lambda t: 42.0 if t == "AL30.BA" else None
+        with patch('src.external.market_data.get_provider', return_value=provider):
+            found = market_data.lookup_prices(["AAPL", "AL30.BA", "NOPE"])
+            self.assertEqual(found, {"AAPL": (150.0, True), "AL30.BA": (42.0, True), "NOPE": (None, True)})
+            provider.get_quotes.assert_called_once_with(["AAPL", "AL30.BA", "NOPE"])
+
+            quote_cache.clear()
+            market_data._flights.forget()
+            provider.get_quotes.side_effect = ConnectionError("down")
+            self.assertEqual(market_data.lookup_prices(["AAPL", "NOPE"]),
+                             {"AAPL": (None, False), "NOPE": (None, False)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.database import Transaction, open_database
+
+class TestOpenDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.test_db = open_database(os.path.join(self.tmp, "finance.db"))
+        self.ctx = self.test_db.bind_ctx([Transaction])
+        self.ctx.__enter__()
+        self.test_db.create_tables([Transaction])
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+        self.test_db.close()
+        shutil.rmtree(self.tmp)
+
+    def add(self, ticker="AAA"):
+        return Transaction.create(date=datetime.datetime(2024, 1, 1), ticker=ticker, operation_type="Compra",
+                                  quantity=1, price=1.0, broker="B1", category="Acciones")
+
+    def test_pragmas(self):
+        self.assertEqual(self.test_db.pragma("journal_mode"), "wal")
+        self.assertEqual(self.test_db.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.test_db.pragma("cache_size"), -64 * 1024)
+        self.assertGreater(self.test_db.pragma("busy_timeout"), 0)
+
+    def test_each_thread_has_its_own_connection(self):
+        connections = []
+        def use():
+            connections.append(self.test_db.connection())
+            self.test_db.close()
+        thread = threading.Thread(target=use)
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], self.test_db.connection())
+
+    def test_readers_do_not_block_on_a_writer_and_writers_wait(self):
+        self.add()
+        in_transaction, release = threading.Event(), threading.Event()
+        results = {}
+
+        def first_writer():
+            with self.test_db.atomic():
+                self.add()
+                in_transaction.set()
+                release.wait(5)
+            self.test_db.close()
+
+        def second_writer():
+            with self.test_db.atomic():
+                results["seen_by_writer"] = Transaction.select().count()
+                self.add()
+            self.test_db.close()
+
+        writer = threading.Thread(target=first_writer)
+        writer.start()
+        self.assertTrue(in_transaction.wait(5))
+
+        # The reader sees the last committed state while the write is in progress
+        self.assertEqual(Transaction.select().count(), 1)
+
+        # A second write transaction waits for the lock instead of failing
+        waiting = threading.Thread(target=second_writer)
+        waiting.start()
+        waiting.join(0.2)
+        self.assertTrue(waiting.is_alive())
+        release.set()
+        writer.join()
+        waiting.join(5)
+        self.assertEqual(results["seen_by_writer"], 2)
+        self.assertEqual(Transaction.select().count(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.fundamentals_cache import FundamentalsCache
+from src.external import market_data
+from src.models.database import CachedFundamentals
+
+class TestFundamentalsCache(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([CachedFundamentals])
+        self.ctx.__enter__()
+        self.cache = FundamentalsCache(ttl=100)
+        market_data._flights.forget()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def test_persists_and_expires(self):
+        with patch('src.external.fundamentals_cache.time.time', return_value=1000.0):
+            self.cache.set("AAPL", {"sector": "Technology", "currency": "USD"})
+
+        # A fresh instance (restarted app) reads it from disk
+        reader = FundamentalsCache(ttl=100)
+        with patch('src.external.fundamentals_cache.time.time', return_value=1050.0):
+            self.assertEqual(reader.get("AAPL")["sector"], "Technology")
+        with patch('src.external.fundamentals_cache.time.time', return_value=1200.0):
+            self.assertIsNone(reader.get("AAPL"))
+            self.assertIsNotNone(reader.get("AAPL", ttl=float('inf')))
+
+    def test_fields_projection_only_fetches_missing(self):
+        self.cache.set("AAPL", {"sector": "Technology", "currency": "USD", "currentPrice": 150})
+
+        provider = market_data.get_provider()
+        with patch('src.external.market_data.fundamentals_cache', self.cache), \
+                patch.object(provider, 'get_info', return_value={"sector": "Energy"}) as mock_info:
+            fields = market_data.get_many_stock_fields(["AAPL", "YPF"], ["sector", "currency"])
+
+        self.assertEqual(fields["AAPL"], {"sector": "Technology", "currency": "USD"})
+        self.assertEqual(fields["YPF"], {"sector": "Energy", "currency": None})
+        mock_info.assert_called_once_with("YPF")
+        self.assertEqual(self.cache.get("YPF"), {"sector": "Energy"})
+
+if __name__ == '__main__':
+    unittest.main()
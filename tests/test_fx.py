@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import time
+import datetime
+import pandas as pd
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.fx import FxRates
+
+def bars(closes):
+    index = pd.date_range("2024-01-01", periods=len(closes), freq="D")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+HISTORY = {
+    "AL30.BA": bars([70000.0, 72000.0, 73000.0]),
+    "AL30D.BA": bars([70.0, None, 73.0]),
+    "ARS=X": bars([800.0, 810.0, 820.0]),
+}
+
+class TestFxRates(unittest.TestCase):
+    @patch('src.external.market_data.get_history_since')
+    def test_daily_series_is_cached(self, mock_history):
+        mock_history.side_effect = lambda ticker, start: HISTORY[ticker].dropna()
+        fx = FxRates()
+
+        mep = fx.history("mep", pd.Timestamp("2024-01-01").date())
+        # The dollar leg didn't trade on the 2nd: its last close is carried forward
+        self.assertEqual(mep.tolist(), [1000.0, 72000.0 / 70.0, 1000.0])
+        self.assertEqual(fx.history("official", pd.Timestamp("2024-01-01").date()).iloc[-1], 820.0)
+
+        calls = mock_history.call_count
+        fx.history("mep", pd.Timestamp("2024-01-02").date())
+        self.assertEqual(mock_history.call_count, calls)
+
+    @patch('src.external.market_data.get_history_since')
+    @patch('src.external.market_data.get_current_prices_with_age')
+    def test_current_rate_from_cached_quotes(self, mock_quotes, mock_history):
+        mock_quotes.return_value = {"GGAL.BA": (6000.0, 30.0), "GGAL": (50.0, 90.0)}
+        fx = FxRates()
+
+        self.assertEqual(fx.current("ccl"), (1200.0, 90.0))
+        mock_quotes.return_value = {"GGAL.BA": (6100.0, 0.0), "GGAL": (50.0, 0.0)}
+        fx.current("ccl")
+        fx.current("ccl")
+        self.assertEqual(fx.intraday("ccl").tolist(), [1200.0, 1220.0])
+        mock_history.assert_not_called()
+
+        # Without quotes the last daily close is used
+        mock_quotes.return_value = {"ARS=X": (None, None)}
+        mock_history.side_effect = lambda ticker, start: HISTORY[ticker]
+        value, age = fx.current("official")
+        self.assertEqual(value, 820.0)
+        self.assertGreater(age, 0)
+
+    @patch('src.external.market_data.get_history_since')
+    @patch('src.external.market_data.get_current_prices_with_age')
+    def test_daily_fallback_age_uses_local_days(self, mock_quotes, mock_history):
+        mock_quotes.return_value = {}
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        mock_history.return_value = pd.DataFrame({"Close": [900.0]}, index=pd.DatetimeIndex([yesterday]))
+
+        # Yesterday's close counts as of local midnight, on the quotes' epoch clock
+        value, age = FxRates().current("official")
+        midnight = datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp()
+        self.assertEqual(value, 900.0)
+        self.assertAlmostEqual(age, time.time() - midnight, delta=5)
+
+    def test_unknown_rate(self):
+        with self.assertRaises(ValueError):
+            FxRates().current("blue")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import io
+from unittest.mock import MagicMock
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from src.services.importer import read_transactions_csv, validate_transactions, import_transactions, _parse_number
+from src.services.portfolio import Portfolio
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+from src.services.lots import get_open_lots
+
+CSV = """Fecha;Ticker;Operacion;Cantidad;Precio;Broker
+02/01/2024;GGAL.BA;Compra;10;1.000,50;Eco
+03/01/2024;GGAL.BA;Compra;10;2000;Eco
+04/01/2024;ggal.ba;Venta;5;2500;Eco
+04/01/2024;AAPL;Buy;3;150;PPI
+"""
+
+def all_valid(tickers):
+    return {t: True for t in tickers}
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.models = [PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState]
+        self.ctx = self.test_db.bind_ctx(self.models)
+        self.ctx.__enter__()
+        self.test_db.create_tables(self.models)
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def test_validation_reports_bad_rows(self):
+        df = read_transactions_csv(io.StringIO(CSV + "31/02/2024;AAPL;Compra;1;10;PPI\n"
+                                                     "05/01/2024;XXXX;Compra;0;10;PPI\n"
+                                                     "05/01/2024;NOPE;Compra;1;10;PPI\n"))
+        validate = MagicMock(side_effect=lambda tickers: {t: t != "NOPE" for t in tickers})
+        rows, errors, unverified = validate_transactions(df, validate)
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows.loc[0, 'price'], 1000.5)
+        self.assertEqual(rows.loc[2, 'ticker'], "GGAL.BA")
+        self.assertEqual(rows.loc[3, 'operation_type'], "Compra")
+        self.assertEqual(errors['row'].tolist(), [5, 6, 7])
+        self.assertEqual(errors['error'].iloc[-1], "Ticker inexistente: NOPE")
+        self.assertEqual(unverified, [])
+        # Every distinct ticker validated in a single call
+        validate.assert_called_once()
+        self.assertEqual(sorted(validate.call_args[0][0]), ["AAPL", "GGAL.BA", "NOPE"])
+
+    def test_number_formats(self):
+        cases = {'1,234.56': 1234.56, '1.234,56': 1234.56, '1,000': 1000.0, '12,5': 12.5,
+                 '1.234.567': 1234567.0, '$ 150': 150.0}
+        for text, expected in cases.items():
+            self.assertEqual(_parse_number(pd.Series([text]), 'price').tolist(), [expected], text)
+        # The column decides: with a decimal comma elsewhere, 1,000 is one
+        self.assertEqual(_parse_number(pd.Series(['12,5', '1,000']), 'price').tolist(), [12.5, 1.0])
+        with self.assertRaises(ValueError):
+            _parse_number(pd.Series(['1,234.56', '12,5']), 'price')
+
+    def test_import_rebuilds_positions_once(self):
+        df = read_transactions_csv(io.StringIO(CSV))
+        report = import_transactions(df, all_valid)
+
+        self.assertEqual(report["imported"], 4)
+        self.assertEqual(Transaction.select().count(), 4)
+        ggal = PortfolioItem.get(PortfolioItem.ticker == "GGAL.BA")
+        self.assertEqual(ggal.quantity, 15)
+        self.assertAlmostEqual(ggal.avg_price, 1500.25)
+        self.assertEqual(Portfolio().holdings["Acciones"].loc["AAPL", "quantity"], 3)
+        # Tax lots of the affected pairs are synced as well
+        lots = get_open_lots(sync=False)
+        self.assertEqual(lots.loc[lots['ticker'] == "GGAL.BA", 'quantity'].sum(), 15)
+
+        # Re-importing the same statement adds nothing
+        report = import_transactions(df, all_valid)
+        self.assertEqual((report["imported"], report["duplicates"]), (0, 4))
+        self.assertEqual(Transaction.select().count(), 4)
+
+    def test_invalid_rows_block_the_import_unless_skipped(self):
+        df = read_transactions_csv(io.StringIO(CSV + "05/01/2024;AAPL;Regalo;1;10;PPI\n"))
+        report = import_transactions(df, all_valid)
+        self.assertEqual(report["imported"], 0)
+        self.assertEqual(len(report["errors"]), 1)
+        self.assertEqual(Transaction.select().count(), 0)
+
+        report = import_transactions(df, all_valid, skip_invalid=True)
+        self.assertEqual(report["imported"], 4)
+
+    def test_positions_without_ledger_are_kept(self):
+        # As created by the Excel migration: a holding with no transactions behind it
+        PortfolioItem.create(ticker="GGAL.BA", broker="IOL", quantity=100, avg_price=50.0,
+                             category="Acciones", source_sheet="Acciones")
+        df = read_transactions_csv(io.StringIO("Fecha;Ticker;Operacion;Cantidad;Precio;Broker\n"
+                                               "02/01/2024;GGAL.BA;Compra;10;60;IOL\n"))
+        import_transactions(df, all_valid)
+
+        item = PortfolioItem.get(PortfolioItem.ticker == "GGAL.BA")
+        self.assertEqual(item.quantity, 110)
+        self.assertAlmostEqual(item.avg_price, 5600.0 / 110)
+        self.assertEqual(item.source_sheet, "Acciones")
+
+        # Deleting the imported buy leaves the original holding
+        portfolio = Portfolio()
+        self.assertTrue(portfolio.delete_transaction(Transaction.get().id))
+        item = PortfolioItem.get(PortfolioItem.ticker == "GGAL.BA")
+        self.assertEqual((item.quantity, item.avg_price), (100, 50.0))
+
+    def test_unverifiable_tickers_do_not_block_the_import(self):
+        df = read_transactions_csv(io.StringIO(CSV))
+        # Provider down for AAPL: could not verify, which is not "does not exist"
+        report = import_transactions(df, lambda tickers: {t: None if t == "AAPL" else True for t in tickers})
+        self.assertTrue(report["errors"].empty)
+        self.assertEqual(report["imported"], 4)
+        self.assertEqual(report["unverified"], ["AAPL"])
+
+if __name__ == '__main__':
+    unittest.main()
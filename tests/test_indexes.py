@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import datetime
+from peewee import SqliteDatabase, IntegrityError
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.database import PortfolioItem, Transaction, merge_duplicate_positions, ensure_indexes
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([PortfolioItem, Transaction])
+        self.ctx.__enter__()
+        # Tables as an existing finance.db has them: no secondary indexes
+        for model in (PortfolioItem, Transaction):
+            model._schema.create_table()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def add(self, quantity, avg_price, broker="B1", target_price=None):
+        return PortfolioItem.create(ticker="AAA", quantity=quantity, avg_price=avg_price, broker=broker,
+                                    category="Acciones", source_sheet="Acciones", target_price=target_price)
+
+    def index_names(self, model):
+        return {index.name for index in self.test_db.get_indexes(model._meta.table_name)}
+
+    def test_duplicates_are_merged_before_indexing(self):
+        first = self.add(10, 100.0)
+        self.add(30, 200.0, target_price=250.0)
+        self.add(5, 50.0, broker="B2")
+
+        self.assertEqual(merge_duplicate_positions(dry_run=True), [("AAA", "B1", 2, 40.0, 175.0)])
+        self.assertEqual(PortfolioItem.select().count(), 3)
+
+        ensure_indexes()
+        merged = PortfolioItem.get((PortfolioItem.ticker == "AAA") & (PortfolioItem.broker == "B1"))
+        self.assertEqual((merged.id, merged.quantity, merged.avg_price, merged.target_price),
+                         (first.id, 40.0, 175.0, 250.0))
+        self.assertEqual(PortfolioItem.select().count(), 2)
+        self.assertIn("portfolioitem_ticker_broker", self.index_names(PortfolioItem))
+        self.assertIn("transaction_ticker_broker_date", self.index_names(Transaction))
+
+    def test_unique_position_per_ticker_and_broker(self):
+        ensure_indexes()
+        self.add(10, 100.0)
+        self.add(10, 100.0, broker="B2")
+        with self.assertRaises(IntegrityError):
+            self.add(10, 100.0)
+
+    def test_ledger_queries_use_the_index(self):
+        ensure_indexes()
+        Transaction.create(date=datetime.datetime(2024, 1, 1), ticker="AAA", operation_type="Compra",
+                           quantity=1, price=1.0, broker="B1", category="Acciones")
+        query = Transaction.select().where(Transaction.ticker == "AAA").order_by(Transaction.broker, Transaction.date)
+        sql, params = query.sql()
+        plan = " ".join(str(row[-1]) for row in self.test_db.execute_sql("EXPLAIN QUERY PLAN " + sql, params))
+        self.assertIn("transaction_ticker_broker_date", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import datetime
+import numpy as np
+import pandas as pd
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.ledger import replay_ledger, replay_position_loop, rebuild_positions, LEDGER_COLUMNS
+from src.services.portfolio import Portfolio
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+
+def random_ledger(rng, groups=50, rows_per_group=30):
+    rows = []
+    tx_id = 0
+    start = datetime.datetime(2020, 1, 1)
+    for g in range(groups):
+        held = 0.0
+        for k in range(rows_per_group):
+            tx_id += 1
+            if held > 0 and rng.random() < 0.4:
+                # Partial sells, full closes and the occasional oversell
+                qty = float(rng.choice([held * rng.uniform(0.1, 0.9), held, held + 5]))
+                op = "Venta"
+                held -= qty
+            else:
+                qty = float(rng.integers(1, 100))
+                op = "Compra"
+                held += qty
+            rows.append((tx_id, start + datetime.timedelta(days=k), f"T{g % 17}", f"B{g}", op,
+                         qty, float(rng.uniform(1, 500)), "Acciones"))
+    return pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+
+class TestReplayLedger(unittest.TestCase):
+    def test_matches_row_by_row_replay(self):
+        ledger = random_ledger(np.random.default_rng(7))
+        # Shuffled input: the engine sorts by date itself
+        result = replay_ledger(ledger.sample(frac=1, random_state=1)).set_index(['ticker', 'broker'])
+
+        for (ticker, broker), group in ledger.groupby(['ticker', 'broker']):
+            group = group.sort_values('date')
+            qty, cost = replay_position_loop(zip(group['operation_type'], group['quantity'], group['price']))
+            row = result.loc[(ticker, broker)]
+            if qty > 1e-9:
+                self.assertAlmostEqual(row['quantity'], qty, places=6)
+                self.assertAlmostEqual(row['avg_price'], cost / qty, places=6)
+            else:
+                self.assertEqual(row['quantity'], 0.0)
+
+class TestRebuildPositions(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+        self.ctx.__enter__()
+        self.test_db.create_tables([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+        self.portfolio = Portfolio()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def test_consistency_check_and_repair(self):
+        self.portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01")
+        self.portfolio.update_position("AAA", 10, 200.0, "B1", "2024-01-02")
+        self.portfolio.update_position("AAA", -5, 300.0, "B1", "2024-01-03")
+        self.assertTrue(rebuild_positions(dry_run=True)["mismatches"].empty)
+
+        # Corrupt the stored position; the checker reports it and the rebuild fixes it
+        PortfolioItem.update(quantity=1.0).execute()
+        report = self.portfolio.rebuild_positions(dry_run=True)
+        self.assertEqual(len(report["mismatches"]), 1)
+        self.assertEqual(self.portfolio.rebuild_positions()["updated"], 1)
+
+        item = PortfolioItem.get()
+        self.assertEqual(item.quantity, 15.0)
+        self.assertAlmostEqual(item.avg_price, 150.0)
+
+    def test_delete_last_transaction_closes_position(self):
+        self.portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01")
+        self.portfolio.delete_transaction(Transaction.get().id)
+
+        self.assertEqual(PortfolioItem.select().count(), 0)
+        self.assertEqual(self.portfolio.holdings, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import sys
+import os
+import datetime
+import numpy as np
+import pandas as pd
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.lots import match_lots, sync_lots, get_open_lots, get_realized, lot_report
+from src.services.ledger import replay_ledger, LEDGER_COLUMNS
+from src.services.portfolio import Portfolio
+from src.models.database import Transaction, TaxLot, RealizedLot, LotState, PortfolioItem, PortfolioValue
+
+D = datetime.datetime
+
+class TestMatchLots(unittest.TestCase):
+    def setUp(self):
+        self.transactions = [
+            (1, D(2024, 1, 1), "Compra", 10.0, 100.0),
+            (2, D(2024, 2, 1), "Compra", 10.0, 200.0),
+            (3, D(2024, 3, 1), "Venta", 15.0, 300.0),
+        ]
+
+    def test_fifo_consumes_oldest_lots(self):
+        lots, realized = match_lots(self.transactions, "FIFO")
+        self.assertEqual(lots, [[2, D(2024, 2, 1), 5.0, 200.0]])
+        self.assertEqual([(r[1], r[3], r[4]) for r in realized],
+                         [(D(2024, 1, 1), 10.0, 1000.0), (D(2024, 2, 1), 5.0, 1000.0)])
+        self.assertEqual(sum(r[5] - r[4] for r in realized), 4500.0 - 2000.0)
+
+    def test_lifo_consumes_newest_lots(self):
+        lots, realized = match_lots(self.transactions, "LIFO")
+        self.assertEqual(lots, [[1, D(2024, 1, 1), 5.0, 100.0]])
+        self.assertEqual(sum(r[4] for r in realized), 10 * 200.0 + 5 * 100.0)
+
+    def test_average_matches_ledger_average_price(self):
+        rng = np.random.default_rng(11)
+        rows, held = [], 0.0
+        for k in range(200):
+            if held > 0 and rng.random() < 0.4:
+                qty, op = float(rng.choice([held * rng.uniform(0.1, 0.9), held])), "Venta"
+                held -= qty
+            else:
+                qty, op = float(rng.integers(1, 100)), "Compra"
+                held += qty
+            rows.append((k + 1, D(2020, 1, 1) + datetime.timedelta(days=k), op, qty, float(rng.uniform(1, 500))))
+
+        lots, _ = match_lots(rows, "AVERAGE")
+        ledger = pd.DataFrame([(i, d, "T", "B", op, q, p, "Acciones") for i, d, op, q, p in rows],
+                              columns=LEDGER_COLUMNS)
+        position = replay_ledger(ledger).iloc[0]
+        if position['quantity'] > 0:
+            self.assertAlmostEqual(lots[0][2], position['quantity'])
+            self.assertAlmostEqual(lots[0][3], position['avg_price'])
+        else:
+            self.assertEqual(lots, [])
+
+    def test_resuming_equals_one_pass(self):
+        more = [(4, D(2024, 4, 1), "Compra", 4.0, 250.0), (5, D(2024, 5, 1), "Venta", 7.0, 280.0)]
+        lots, realized = match_lots(self.transactions, "FIFO")
+        lots, realized_more = match_lots(more, "FIFO", lots)
+        self.assertEqual((lots, realized + realized_more), match_lots(self.transactions + more, "FIFO"))
+
+class TestPersistedLots(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.models = [Transaction, TaxLot, RealizedLot, LotState, PortfolioItem, PortfolioValue]
+        self.ctx = self.test_db.bind_ctx(self.models)
+        self.ctx.__enter__()
+        self.test_db.create_tables(self.models)
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def add(self, date, operation_type, quantity, price, ticker="AAA"):
+        return Transaction.create(date=date, ticker=ticker, operation_type=operation_type, quantity=quantity,
+                                  price=price, broker="B1", category="Acciones")
+
+    def assert_same_as_full_replay(self):
+        lots = get_open_lots(sync=False).drop(columns='open_date')
+        realized = get_realized(sync=False)['gain'].sum()
+        for model in (TaxLot, RealizedLot, LotState):
+            model.delete().execute()
+        sync_lots()
+        pd.testing.assert_frame_equal(lots, get_open_lots(sync=False).drop(columns='open_date'))
+        self.assertAlmostEqual(realized, get_realized(sync=False)['gain'].sum())
+
+    def test_new_transactions_are_applied_incrementally(self):
+        self.add(D(2024, 1, 1), "Compra", 10, 100.0)
+        self.add(D(2024, 1, 2), "Compra", 10, 200.0, ticker="BBB")
+        self.assertEqual(sync_lots(), {"incremental": 0, "rebuilt": 2, "transactions": 2})
+        self.assertEqual(sync_lots()["transactions"], 0)
+
+        self.add(D(2024, 2, 1), "Venta", 4, 150.0)
+        self.assertEqual(sync_lots(), {"incremental": 1, "rebuilt": 0, "transactions": 1})
+        self.assertEqual(get_realized(sync=False)['gain'].tolist(), [200.0])
+        self.assert_same_as_full_replay()
+
+    def test_backdated_and_deleted_transactions_replay_the_pair(self):
+        self.add(D(2024, 1, 1), "Compra", 10, 100.0)
+        sell = self.add(D(2024, 3, 1), "Venta", 10, 150.0)
+        sync_lots()
+
+        # A buy dated before the sell changes which lot the sell consumed
+        self.add(D(2024, 2, 1), "Compra", 10, 120.0)
+        self.assertEqual(sync_lots(method="LIFO")["rebuilt"], 1)
+        self.assertEqual(sync_lots()["rebuilt"], 1)
+        self.assertEqual(get_open_lots(sync=False)['price'].tolist(), [120.0])
+        self.assert_same_as_full_replay()
+
+        sell.delete_instance()
+        self.assertEqual(sync_lots()["rebuilt"], 1)
+        self.assertEqual(get_open_lots(sync=False)['quantity'].tolist(), [10.0, 10.0])
+        self.assertTrue(get_realized(sync=False).empty)
+
+    def test_update_position_keeps_lots_in_sync(self):
+        portfolio = Portfolio()
+        portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01")
+        portfolio.update_position("AAA", -4, 150.0, "B1", "2024-01-02")
+        self.assertEqual(LotState.get().count, 2)
+        self.assertEqual(get_realized(sync=False)['gain'].tolist(), [200.0])
+        self.assertEqual(sync_lots()["transactions"], 0)
+
+    def test_rejected_or_failed_writes_leave_no_trace(self):
+        from unittest.mock import patch
+        portfolio = Portfolio()
+        PortfolioValue.create(date=datetime.date(2024, 1, 5), currency="USD", value=1.0, invested=1.0)
+
+        # Selling what isn't held is rejected before anything is written
+        with self.assertRaises(ValueError):
+            portfolio.update_position("ZZZ", -5, 10.0, "B1", "2024-01-01")
+        self.assertEqual(Transaction.select().count(), 0)
+        self.assertEqual(LotState.select().count(), 0)
+        self.assertEqual(PortfolioValue.select().count(), 1)
+
+        # A failure while syncing lots rolls back the ledger row and the position
+        with patch('src.services.portfolio.sync_lots', side_effect=RuntimeError("disk I/O error")):
+            portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01")
+        self.assertEqual(Transaction.select().count(), 0)
+        self.assertEqual(PortfolioItem.select().count(), 0)
+        self.assertEqual(portfolio.get_all_tickers(), [])
+        self.assertNotIn("AAA", portfolio._positions)
+
+    def test_report_splits_realized_and_unrealized(self):
+        self.add(D(2024, 1, 1), "Compra", 10, 100.0)
+        self.add(D(2024, 1, 2), "Compra", 10, 200.0)
+        self.add(D(2024, 1, 3), "Venta", 15, 300.0)
+
+        report = lot_report(get_open_lots(), get_realized(), {"AAA": 250.0}).iloc[0]
+        self.assertEqual(report['quantity'], 5.0)
+        self.assertEqual(report['realized'], 4500.0 - 2000.0)
+        self.assertEqual(report['unrealized'], 5 * (250.0 - 200.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import sys
+import os
+import pandas as pd
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external import market_data
+from src.external.quote_cache import quote_cache
+
+class TestGetCurrentPrices(unittest.TestCase):
+    def setUp(self):
+        market_data.clear_quotes()
+
+    def tearDown(self):
+        quote_cache.clear()
+
+    @patch('src.external.market_data._fetch_price')
+    @patch('src.external.providers.yf.download')
+    def test_batch_with_fallback(self, mock_download, mock_single):
+        columns = pd.MultiIndex.from_product([["AAPL", "MSFT"], ["Close"]])
+        mock_download.return_value = pd.DataFrame(
+            [[100.0, 200.0], [101.0, None]],
+            columns=columns
+        )
+        mock_single.return_value = 42.0
+
+        prices = market_data.get_current_prices(["AAPL", "MSFT", "AL30.BA", "AAPL"])
+
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(prices["AAPL"], 101.0)
+        self.assertEqual(prices["MSFT"], 200.0)
+        # Missing from the batch -> single ticker fallback
+        self.assertEqual(prices["AL30.BA"], 42.0)
+        mock_single.assert_called_once_with("AL30.BA")
+
+    @patch('src.external.providers.yf.download')
+    def test_cached_prices_skip_network(self, mock_download):
+        quote_cache.set("AAPL", 150.0)
+        prices = market_data.get_current_prices(["AAPL"])
+        self.assertEqual(prices, {"AAPL": 150.0})
+        mock_download.assert_not_called()
+
+    @patch('src.external.providers.yf.download')
+    def test_invalidation_refetches_once(self, mock_download):
+        columns = pd.MultiIndex.from_product([["AAPL"], ["Close"]])
+        mock_download.return_value = pd.DataFrame([[100.0]], columns=columns)
+        market_data.get_current_prices(["AAPL"])
+
+        mock_download.return_value = pd.DataFrame([[105.0]], columns=columns)
+        market_data.invalidate_prices()
+        self.assertEqual(market_data.get_current_prices(["AAPL"]), {"AAPL": 105.0})
+        self.assertEqual(market_data.get_current_prices(["AAPL"]), {"AAPL": 105.0})
+        self.assertEqual(mock_download.call_count, 2)
+
+    @patch('src.external.providers.yf.download')
+    def test_clear_quotes_refetches(self, mock_download):
+        columns = pd.MultiIndex.from_product([["AAPL"], ["Close"]])
+        mock_download.return_value = pd.DataFrame([[100.0]], columns=columns)
+        market_data.get_current_prices(["AAPL"])
+
+        # Clearing only the cache would hand back the coalesced result
+        mock_download.return_value = pd.DataFrame([[105.0]], columns=columns)
+        market_data.clear_quotes()
+        self.assertEqual(market_data.get_current_prices(["AAPL"]), {"AAPL": 105.0})
+        self.assertEqual(mock_download.call_count, 2)
+
+    @patch('src.external.market_data.refresh_prices')
+    def test_stale_price_served_and_revalidated(self, mock_refresh):
+        import time
+        quote_cache.set("AAPL", 150.0)
+        later = time.time() + quote_cache.ttl + 60
+
+        with patch('src.external.quote_cache.time.time', return_value=later):
+            quotes = market_data.get_current_prices_with_age(["AAPL"])
+
+        price, age = quotes["AAPL"]
+        self.assertEqual(price, 150.0)
+        self.assertGreater(age, quote_cache.ttl)
+        # Refreshed on the revalidation thread, not in the caller's thread
+        market_data._revalidator.submit(lambda: None).result(timeout=5)
+        for _ in range(50):
+            if mock_refresh.called:
+                break
+            time.sleep(0.01)
+        mock_refresh.assert_called_once_with(["AAPL"])
+
+    @patch('src.external.market_data._fetch_price', return_value=42.0)
+    @patch('src.external.providers.yf.download', return_value=pd.DataFrame())
+    def test_revalidation_fallback_does_not_starve_the_pool(self, mock_download, mock_single):
+        import time
+        market_data.configure_fetching(max_workers=1)
+        try:
+            quote_cache.set("AL30.BA", 40.0)
+            later = time.time() + quote_cache.ttl + 60
+            with patch('src.external.quote_cache.time.time', return_value=later):
+                market_data.get_current_prices_with_age(["AL30.BA"])
+            # The single-ticker fallback needs the only worker: it must be free
+            start = time.monotonic()
+            market_data._revalidator.submit(lambda: None).result(timeout=5)
+            self.assertLess(time.monotonic() - start, 2)
+            mock_single.assert_called_once_with("AL30.BA")
+        finally:
+            market_data.configure_fetching(max_workers=8)
+
+    @patch('src.external.market_data.refresh_prices')
+    def test_too_old_price_blocks(self, mock_refresh):
+        import time
+        quote_cache.set("AAPL", 150.0)
+        mock_refresh.return_value = {"AAPL": 160.0}
+        later = time.time() + market_data.MAX_STALE_AGE + 60
+
+        with patch('src.external.quote_cache.time.time', return_value=later):
+            quotes = market_data.get_current_prices_with_age(["AAPL"])
+
+        self.assertEqual(quotes["AAPL"], (160.0, 0.0))
+
+class TestFetchMany(unittest.TestCase):
+    def test_runs_concurrently(self):
+        import time
+        def slow(key):
+            time.sleep(0.2)
+            return key.lower()
+
+        start = time.monotonic()
+        results = market_data.fetch_many(slow, ["A", "B", "C", "D"])
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(results, {"A": "a", "B": "b", "C": "c", "D": "d"})
+        # Bounded by the slowest call, not the sum (0.8s)
+        self.assertLess(elapsed, 0.6)
+
+    def test_timeout_and_errors_map_to_none(self):
+        import time
+        def flaky(key):
+            if key == "ERR":
+                raise ValueError("boom")
+            if key == "SLOW":
+                time.sleep(1)
+            return 1.0
+
+        results = market_data.fetch_many(flaky, ["OK", "ERR", "SLOW"], timeout=0.3)
+        self.assertEqual(results["OK"], 1.0)
+        self.assertIsNone(results["ERR"])
+        self.assertIsNone(results["SLOW"])
+
+    def test_default_deadline_scales_with_batch(self):
+        from src.external.rate_limiter import TokenBucket
+        original = market_data._rate_limiter
+        market_data._rate_limiter = TokenBucket(rate=100, capacity=2)
+        try:
+            with patch.object(market_data, 'REQUEST_TIMEOUT', 0.1), \
+                 patch.object(market_data, 'REQUESTS_PER_SECOND', 100), \
+                 patch.object(market_data, 'BURST', 2):
+                keys = [str(i) for i in range(40)]
+                # A fixed 0.1s deadline would drop most of these (40 keys at 100 req/s)
+                results = market_data.fetch_many(lambda key: key, keys)
+        finally:
+            market_data._rate_limiter = original
+        self.assertEqual(results, {key: key for key in keys})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch, Mock
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models import migrations
+from src.models.migrations import migrate_schema, pending_migrations, current_version, MIGRATIONS
+from src.models.database import ALL_MODELS, PortfolioItem, WishlistItem, SchemaVersion
+
+LATEST = MIGRATIONS[-1][0]
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx(ALL_MODELS)
+        self.ctx.__enter__()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def create_legacy_db(self):
+        # Schema of the first versions, before the ad-hoc migration scripts
+        self.test_db.execute_sql('CREATE TABLE "portfolioitem" ("id" INTEGER NOT NULL PRIMARY KEY, '
+                                 '"ticker" VARCHAR(255) NOT NULL, "quantity" REAL NOT NULL, '
+                                 '"category" VARCHAR(255) NOT NULL, "source_sheet" VARCHAR(255) NOT NULL, '
+                                 '"updated_at" DATETIME NOT NULL)')
+        self.test_db.execute_sql('CREATE TABLE "wishlistitem" ("id" INTEGER NOT NULL PRIMARY KEY, '
+                                 '"ticker" VARCHAR(255) NOT NULL UNIQUE, "added_at" DATETIME NOT NULL)')
+        for quantity in (10, 30):
+            self.test_db.execute_sql('INSERT INTO "portfolioitem" ("ticker", "quantity", "category", '
+                                     '"source_sheet", "updated_at") VALUES (?, ?, ?, ?, ?)',
+                                     ("AAA", quantity, "Acciones", "Acciones", "2024-01-01 00:00:00"))
+
+    def columns(self, model):
+        return {column.name for column in self.test_db.get_columns(model._meta.table_name)}
+
+    def test_new_database_is_created_at_the_latest_version(self):
+        self.assertEqual(len(migrate_schema()), len(MIGRATIONS))
+        self.assertEqual(set(self.test_db.get_tables()), {model._meta.table_name for model in ALL_MODELS})
+        self.assertEqual(current_version(), LATEST)
+        self.assertEqual(migrate_schema(), [])
+
+    def test_legacy_database_is_upgraded_in_order(self):
+        self.create_legacy_db()
+        self.assertEqual(current_version(), 0)
+        self.assertEqual(migrate_schema(dry_run=True), pending_migrations())
+        self.assertNotIn("broker", self.columns(PortfolioItem))
+
+        applied = migrate_schema()
+        self.assertEqual([version for version, _ in applied], [version for version, _, _ in MIGRATIONS])
+        self.assertTrue({"broker", "avg_price", "target_price"} <= self.columns(PortfolioItem))
+        self.assertIn("target_price", self.columns(WishlistItem))
+        self.assertEqual(set(self.test_db.get_tables()), {model._meta.table_name for model in ALL_MODELS})
+
+        # Both rows became ticker AAA at broker 'Unknown': merged before the unique index
+        item = PortfolioItem.get()
+        self.assertEqual((item.broker, item.quantity), ("Unknown", 40.0))
+        self.assertIn("portfolioitem_ticker_broker",
+                      {index.name for index in self.test_db.get_indexes("portfolioitem")})
+        self.assertEqual(current_version(), LATEST)
+
+    def test_only_pending_migrations_run(self):
+        self.create_legacy_db()
+        migrate_schema()
+
+        steps = [(version, description, Mock()) for version, description, _ in MIGRATIONS]
+        new_step = Mock()
+        with patch.object(migrations, "MIGRATIONS", steps + [(LATEST + 1, "New column", new_step)]):
+            self.assertEqual(migrate_schema(dry_run=True), [(LATEST + 1, "New column")])
+            new_step.assert_not_called()
+            self.assertEqual(migrate_schema(), [(LATEST + 1, "New column")])
+            self.assertEqual(migrate_schema(), [])
+        new_step.assert_called_once()
+        for _, _, step in steps:
+            step.assert_not_called()
+        self.assertEqual(current_version(), LATEST + 1)
+
+    def test_failed_migration_changes_nothing(self):
+        self.create_legacy_db()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with patch.object(migrations, "MIGRATIONS", MIGRATIONS[:2] + [(3, "Broken", fail)]):
+            with self.assertRaises(RuntimeError):
+                migrate_schema()
+        self.assertNotIn("broker", self.columns(PortfolioItem))
+        self.assertFalse(SchemaVersion.table_exists())
+        self.assertEqual(len(migrate_schema()), len(MIGRATIONS))
+
+if __name__ == '__main__':
+    unittest.main()
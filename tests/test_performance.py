@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import datetime
+import pandas as pd
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.performance import update_value_series, get_value_series, value_series_in
+from src.services.portfolio import Portfolio
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+
+DAYS = pd.date_range("2024-01-01", "2024-01-10", freq="D")
+CLOSES = {
+    "AAA": pd.Series(range(100, 110), index=DAYS, dtype=float),
+    "BBB": pd.Series(50.0, index=DAYS),
+    "GGAL.BA": pd.Series(2000.0, index=DAYS),
+}
+
+def closes_loader(tickers, start):
+    return {t: CLOSES[t] for t in tickers if t in CLOSES}
+
+class TestValueSeries(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.models = [PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState]
+        self.ctx = self.test_db.bind_ctx(self.models)
+        self.ctx.__enter__()
+        self.test_db.create_tables(self.models)
+        self.portfolio = Portfolio()
+        self.today = datetime.date(2024, 1, 10)
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def test_daily_values_and_incremental_updates(self):
+        self.portfolio.update_position("AAA", 10, 95.0, "B1", "2024-01-02")
+        self.portfolio.update_position("BBB", 2, 50.0, "B1", "2024-01-05")
+
+        self.assertEqual(update_value_series(self.today, closes_loader), 9)
+        series = get_value_series(update=False)
+        self.assertEqual(series.loc["2024-01-02", "value"], 1010.0)  # 10 * 101
+        self.assertEqual(series.loc["2024-01-05", "value"], 1040.0 + 100.0)
+        self.assertEqual(series.loc["2024-01-10", "invested"], 1050.0)
+
+        # Nothing changed: only the last (possibly intraday) day is recomputed
+        self.assertEqual(update_value_series(self.today, closes_loader), 1)
+
+        # A transaction dated in the past invalidates the series from that day on
+        # (plus the last day still stored, the 5th)
+        self.portfolio.update_position("AAA", -5, 105.0, "B1", "2024-01-06")
+        self.assertEqual(update_value_series(self.today, closes_loader), 6)
+        series = get_value_series(update=False)
+        self.assertEqual(series.loc["2024-01-05", "value"], 1140.0)
+        self.assertEqual(series.loc["2024-01-06", "value"], 5 * 105.0 + 100.0)
+
+    def test_days_without_closes_are_flagged_and_recomputed(self):
+        self.portfolio.update_position("AAA", 10, 95.0, "B1", "2024-01-02")
+        self.portfolio.update_position("NEW", 2, 40.0, "B1", "2024-01-05")
+
+        self.assertEqual(update_value_series(self.today, closes_loader), 9)
+        series = get_value_series(update=False)
+        # No bars for NEW yet: estimated at its last trade, not final
+        self.assertEqual(series.loc["2024-01-05", "value"], 1040.0 + 80.0)
+        self.assertTrue(series.loc["2024-01-04", "complete"])
+        self.assertFalse(series.loc["2024-01-05", "complete"])
+
+        # Incomplete days are recomputed on every update until the closes show up
+        self.assertEqual(update_value_series(self.today, closes_loader), 6)
+        with_new = lambda tickers, start: {**closes_loader(tickers, start),
+                                           "NEW": pd.Series(45.0, index=DAYS)}
+        self.assertEqual(update_value_series(self.today, with_new), 6)
+        series = get_value_series(update=False)
+        self.assertEqual(series.loc["2024-01-05", "value"], 1040.0 + 90.0)
+        self.assertTrue(series["complete"].all())
+        self.assertEqual(update_value_series(self.today, with_new), 1)
+
+    def test_currencies_are_kept_apart_and_converted_daily(self):
+        self.portfolio.update_position("AAA", 10, 95.0, "B1", "2024-01-02")
+        self.portfolio.update_position("GGAL.BA", 3, 1900.0, "B1", "2024-01-03")
+        update_value_series(self.today, closes_loader)
+
+        series = get_value_series(update=False)
+        day = series.loc["2024-01-03"].set_index("currency")
+        self.assertEqual(day.loc["USD", "value"], 1020.0)
+        self.assertEqual(day.loc["ARS", "value"], 6000.0)
+        self.assertEqual(day.loc["ARS", "invested"], 5700.0)
+        self.assertEqual(series.loc[series.index == "2024-01-02", "currency"].tolist(), ["USD"])
+
+        # Rate known from the 3rd, carried forward over the missing 4th
+        rates = pd.Series([1000.0, 1200.0], index=pd.to_datetime(["2024-01-03", "2024-01-05"]))
+        usd = value_series_in(series, "USD", rates)
+        self.assertEqual(usd.loc["2024-01-03", "value"], 1020.0 + 6.0)
+        self.assertEqual(usd.loc["2024-01-04", "value"], 1030.0 + 6.0)
+        self.assertEqual(usd.loc["2024-01-05", "value"], 1040.0 + 5.0)
+        # Only USD held on the 2nd: nothing to convert
+        self.assertEqual(usd.loc["2024-01-02", "value"], 1010.0)
+        ars = value_series_in(series, "ARS", rates.loc["2024-01-05":])
+        # No rate yet for the 3rd and 4th: left out rather than mixed
+        self.assertNotIn(pd.Timestamp("2024-01-03"), ars.index)
+        self.assertEqual(ars.loc["2024-01-05", "invested"], 950.0 * 1200.0 + 5700.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.portfolio import Portfolio
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+
+class TestIncrementalHoldings(unittest.TestCase):
+    def setUp(self):
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+        self.ctx.__enter__()
+        self.test_db.create_tables([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+        self.portfolio = Portfolio()
+
+    def tearDown(self):
+        self.ctx.__exit__(None, None, None)
+
+    def assert_matches_db(self):
+        # The in-memory index must match what a full reload would build
+        reloaded = Portfolio()
+        self.assertEqual(sorted(self.portfolio.holdings), sorted(reloaded.holdings))
+        for category, df in reloaded.holdings.items():
+            mine = self.portfolio.holdings[category].sort_index()
+            self.assertTrue(mine.equals(df.sort_index()), category)
+
+    def test_writes_update_index_without_reload(self):
+        with patch.object(Portfolio, 'load_data') as mock_reload:
+            self.portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01", "Acciones")
+            self.portfolio.update_position("AAA", 10, 200.0, "B1", "2024-01-02", "Acciones")
+            self.portfolio.update_position("AAA", 5, 50.0, "B2", "2024-01-03", "Acciones")
+            self.portfolio.update_position("BBB", 3, 10.0, "B1", "2024-01-03", "Cedear")
+            self.portfolio.update_target("AAA", 300.0)
+            mock_reload.assert_not_called()
+
+        self.assertEqual(self.portfolio.holdings["Acciones"].loc["AAA", "quantity"].tolist(), [20.0, 5.0])
+        self.assertEqual(self.portfolio.holdings["Acciones"]["target_price"].tolist(), [300.0, 300.0])
+        self.assert_matches_db()
+
+    def test_removals_drop_empty_categories(self):
+        self.portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01", "Acciones")
+        self.portfolio.update_position("BBB", 3, 10.0, "B1", "2024-01-01", "Cedear")
+        tx_id = Transaction.get(Transaction.ticker == "BBB").id
+
+        self.portfolio.update_position("AAA", -10, 120.0, "B1", "2024-01-02", "Acciones")
+        self.portfolio.delete_transaction(tx_id)
+
+        self.assertEqual(self.portfolio.holdings, {})
+        self.assert_matches_db()
+
+    def test_summary_aggregated_in_sql(self):
+        self.portfolio.update_position("AAA", 10, 100.0, "B1", "2024-01-01", "Acciones")
+        self.portfolio.update_position("BBB", 2, 50.0, "B1", "2024-01-01", "Acciones")
+        self.portfolio.update_position("CCC", 4, 25.0, "B2", "2024-01-01", "Cedear")
+
+        self.assertEqual(self.portfolio.get_portfolio_summary(), {"Acciones": 1100.0, "Cedear": 100.0})
+
+if __name__ == '__main__':
+    unittest.main()
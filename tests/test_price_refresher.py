@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.database import PortfolioItem, WishlistItem, CachedQuote
+from src.external.providers import ReplayProvider, get_provider, set_provider
+from src.external.quote_cache import quote_cache
+from src.external import market_data
+from src.services.price_refresher import PriceRefresher
+
+class TestPriceRefresher(unittest.TestCase):
+    def setUp(self):
+        # File database: the background thread opens its own connection
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.test_db = SqliteDatabase(os.path.join(self.tmp_dir.name, "test.db"))
+        self.ctx = self.test_db.bind_ctx([PortfolioItem, WishlistItem, CachedQuote])
+        self.ctx.__enter__()
+        self.test_db.create_tables([PortfolioItem, WishlistItem, CachedQuote])
+
+        PortfolioItem.create(ticker="AAPL", quantity=1, category="Acciones", source_sheet="Manual")
+        WishlistItem.create(ticker="GGAL.BA")
+
+        self.previous_provider = get_provider()
+        provider = ReplayProvider(synthetic=False)
+        provider._quotes = {"AAPL": 150.0, "GGAL.BA": 5000.0}
+        set_provider(provider)
+        quote_cache.clear()
+        market_data._flights.forget()
+
+    def tearDown(self):
+        set_provider(self.previous_provider)
+        quote_cache.clear()
+        self.ctx.__exit__(None, None, None)
+        self.test_db.close()
+        self.tmp_dir.cleanup()
+
+    def test_refresh_now_fills_shared_cache(self):
+        refresher = PriceRefresher(interval=60)
+        self.assertEqual(sorted(refresher.tracked_tickers()), ["AAPL", "GGAL.BA"])
+        self.assertEqual(refresher.refresh_now(), 2)
+
+        # Renders now read the cache without touching the provider
+        set_provider(ReplayProvider(synthetic=False))
+        self.assertEqual(market_data.get_current_prices(["AAPL", "GGAL.BA"]),
+                         {"AAPL": 150.0, "GGAL.BA": 5000.0})
+
+    def test_background_thread_runs_and_stretches_ttl(self):
+        refresher = PriceRefresher(interval=60)
+        base_ttl = quote_cache.ttl
+        refresher.start()
+        try:
+            deadline = time.time() + 5
+            while refresher.last_run is None and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertIsNotNone(refresher.last_run)
+            self.assertGreaterEqual(quote_cache.ttl, 120)
+            refresher.set_interval(300)
+            self.assertEqual(quote_cache.ttl, 600)
+        finally:
+            refresher.stop()
+        self.assertFalse(refresher.is_running())
+        # The stretched TTL only lasts while the thread runs
+        self.assertEqual(quote_cache.ttl, base_ttl)
+        refresher.set_interval(120)
+        self.assertEqual(quote_cache.ttl, base_ttl)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import json
+import datetime
+import tempfile
+import pandas as pd
+from unittest.mock import patch, MagicMock, PropertyMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.providers import ReplayProvider, YFinanceProvider
+
+class TestReplayProvider(unittest.TestCase):
+    def test_synthetic_data_is_deterministic(self):
+        end = datetime.date(2025, 6, 30)
+        a = ReplayProvider(end_date=end)
+        b = ReplayProvider(end_date=end)
+
+        self.assertEqual(a.get_quote("AAPL"), b.get_quote("AAPL"))
+        self.assertNotEqual(a.get_quote("AAPL"), a.get_quote("MSFT"))
+
+        history = a.get_history("AAPL", datetime.date(2025, 6, 1), end)
+        self.assertEqual(list(history.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        self.assertTrue((history.index >= "2025-06-01").all())
+        self.assertAlmostEqual(history['Close'].iloc[-1], a.get_quote("AAPL"))
+
+    def test_recorded_data_takes_precedence(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            os.makedirs(os.path.join(data_dir, "bars"))
+            with open(os.path.join(data_dir, "quotes.json"), 'w') as f:
+                json.dump({"GGAL.BA": 5000.0}, f)
+            with open(os.path.join(data_dir, "info.json"), 'w') as f:
+                json.dump({"GGAL.BA": {"sector": "Financial Services"}}, f)
+            with open(os.path.join(data_dir, "bars", "GGAL.BA.csv"), 'w') as f:
+                f.write("Date,Open,High,Low,Close,Volume\n2025-01-02,10,11,9,10.5,100\n")
+
+            provider = ReplayProvider(data_dir, synthetic=False)
+            self.assertEqual(provider.get_quote("GGAL.BA"), 5000.0)
+            self.assertEqual(provider.get_info("GGAL.BA")["sector"], "Financial Services")
+            self.assertEqual(provider.get_history("GGAL.BA")['Close'].iloc[0], 10.5)
+            # Unknown tickers have no data when synthetic mode is off
+            self.assertIsNone(provider.get_quote("NOPE"))
+            self.assertEqual(provider.get_info("NOPE"), {})
+
+class TestYFinanceQuotePath(unittest.TestCase):
+    @patch('src.external.providers.yf.Ticker')
+    def test_fast_path_avoids_info(self, mock_ticker):
+        ticker_obj = MagicMock()
+        ticker_obj.history.return_value = pd.DataFrame({'Close': [10.0, 11.0]})
+        ticker_obj.get_history_metadata.return_value = {'regularMarketPrice': 11.5}
+        info = PropertyMock(side_effect=AssertionError(".info should not be used"))
+        type(ticker_obj).info = info
+        mock_ticker.return_value = ticker_obj
+
+        self.assertEqual(YFinanceProvider().get_quote("AAPL"), 11.5)
+        info.assert_not_called()
+
+    @patch('src.external.providers.yf.Ticker')
+    def test_falls_back_to_info(self, mock_ticker):
+        ticker_obj = MagicMock()
+        ticker_obj.history.return_value = pd.DataFrame()
+        ticker_obj.info = {'regularMarketPrice': 99.0}
+        mock_ticker.return_value = ticker_obj
+
+        self.assertEqual(YFinanceProvider().get_quote("AL30.BA"), 99.0)
+
+if __name__ == '__main__':
+    unittest.main()
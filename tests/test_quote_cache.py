@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.quote_cache import QuoteCache
+from src.models.database import CachedQuote
+
+class TestQuoteCache(unittest.TestCase):
+    def test_hit_and_miss_counters(self):
+        cache = QuoteCache(ttl=30)
+        self.assertIsNone(cache.get("AAPL"))
+        cache.set("AAPL", 150.0)
+        self.assertEqual(cache.get("AAPL"), 150.0)
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = QuoteCache(ttl=30)
+        with patch('src.external.quote_cache.time.time', return_value=1000.0):
+            cache.set("AAPL", 150.0)
+        with patch('src.external.quote_cache.time.time', return_value=1031.0):
+            self.assertIsNone(cache.get("AAPL"))
+
+    def test_lru_eviction(self):
+        cache = QuoteCache(maxsize=2)
+        cache.set("A", 1.0)
+        cache.set("B", 2.0)
+        cache.get("A")  # A becomes most recently used
+        cache.set("C", 3.0)
+
+        self.assertIsNone(cache.get("B"))
+        self.assertEqual(cache.get("A"), 1.0)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_invalidate_starts_new_generation(self):
+        cache = QuoteCache(ttl=30)
+        with patch('src.external.quote_cache.time.time', return_value=1000.0):
+            cache.set("AAPL", 150.0)
+        with patch('src.external.quote_cache.time.time', return_value=1001.0):
+            self.assertEqual(cache.invalidate(), 1)
+            self.assertIsNone(cache.get("AAPL"))
+            # Entry is kept, only considered expired
+            self.assertEqual(cache.stats()['size'], 1)
+            # A second request within max_age does not start another generation
+            self.assertEqual(cache.invalidate(max_age=60), 1)
+        with patch('src.external.quote_cache.time.time', return_value=1002.0):
+            cache.set("AAPL", 151.0)
+            self.assertEqual(cache.get("AAPL"), 151.0)
+
+    def test_peek_returns_expired_entries_until_invalidated(self):
+        cache = QuoteCache(ttl=30)
+        with patch('src.external.quote_cache.time.time', return_value=1000.0):
+            cache.set("AAPL", 150.0)
+        with patch('src.external.quote_cache.time.time', return_value=1100.0):
+            self.assertIsNone(cache.get("AAPL"))
+            self.assertEqual(cache.peek("AAPL"), (150.0, 100.0))
+            cache.invalidate()
+            self.assertIsNone(cache.peek("AAPL"))
+
+    def test_persistent_cache_is_shared(self):
+        test_db = SqliteDatabase(':memory:')
+        with test_db.bind_ctx([CachedQuote]):
+            writer = QuoteCache()
+            writer.configure(persistent=True)
+            writer.set("GGAL.BA", 5000.0)
+
+            # A fresh instance (another process) reads it from disk
+            reader = QuoteCache(persistent=True)
+            self.assertEqual(reader.get("GGAL.BA"), 5000.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.external.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flights.do("AAPL", fetch))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.shared, 4)
+
+    def test_window_reuses_recent_result(self):
+        flights = SingleFlight(window=60)
+        counter = iter(range(10))
+        self.assertEqual(flights.do("k", lambda: next(counter)), 0)
+        self.assertEqual(flights.do("k", lambda: next(counter)), 0)
+
+        flights.forget()
+        self.assertEqual(flights.do("k", lambda: next(counter)), 1)
+
+    def test_without_window_sequential_calls_run_again(self):
+        flights = SingleFlight()
+        counter = iter(range(10))
+        flights.do("k", lambda: next(counter))
+        self.assertEqual(flights.do("k", lambda: next(counter)), 1)
+
+    def test_errors_are_propagated(self):
+        flights = SingleFlight()
+        def boom():
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            flights.do("k", boom)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+from peewee import SqliteDatabase
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.database import KnownTicker, PortfolioItem, WishlistItem, Transaction
+from src.external.quote_cache import quote_cache
+from src.services.ticker_resolver import TickerResolver
+
+class TestTickerResolver(unittest.TestCase):
+    def setUp(self):
+        models = [KnownTicker, PortfolioItem, WishlistItem, Transaction]
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx(models)
+        self.ctx.__enter__()
+        self.test_db.create_tables(models)
+        quote_cache.clear()
+
+    def tearDown(self):
+        quote_cache.clear()
+        self.ctx.__exit__(None, None, None)
+
+    @patch('src.external.market_data.lookup_price')
+    def test_invalid_ticker_fails_fast(self, mock_lookup):
+        mock_lookup.return_value = (None, True)
+        resolver = TickerResolver(negative_ttl=600)
+
+        self.assertFalse(resolver.is_valid("GGAL"))
+        self.assertFalse(resolver.is_valid("GGAL"))
+        self.assertIsNone(resolver.resolve("ggal "))
+        mock_lookup.assert_called_once_with("GGAL")
+
+    @patch('src.external.market_data.lookup_price')
+    def test_provider_failure_is_not_negative_cached(self, mock_lookup):
+        # Error, timeout or open breaker: the provider never said the symbol doesn't exist
+        mock_lookup.return_value = (None, False)
+        resolver = TickerResolver(negative_ttl=600)
+        self.assertFalse(resolver.is_valid("NEW"))
+
+        mock_lookup.return_value = (10.0, True)
+        self.assertTrue(resolver.is_valid("NEW"))
+        self.assertEqual(mock_lookup.call_count, 2)
+
+    @patch('src.external.market_data.lookup_price')
+    def test_valid_ticker_is_indexed(self, mock_lookup):
+        mock_lookup.return_value = (5000.0, True)
+        resolver = TickerResolver()
+        self.assertEqual(resolver.resolve("GGAL.BA"), 5000.0)
+
+        # Another process/instance validates from the index without the network
+        mock_lookup.reset_mock()
+        other = TickerResolver()
+        self.assertTrue(other.is_valid("GGAL.BA"))
+        mock_lookup.assert_not_called()
+
+    @patch('src.external.market_data.lookup_price')
+    def test_price_never_comes_from_the_index(self, mock_lookup):
+        KnownTicker.create(ticker="GGAL.BA", last_price=1.0)
+        mock_lookup.return_value = (None, False)
+        resolver = TickerResolver()
+        self.assertIsNone(resolver.resolve("GGAL.BA"))
+        self.assertTrue(resolver.is_valid("GGAL.BA"))
+
+        mock_lookup.return_value = (5000.0, True)
+        self.assertEqual(resolver.resolve("GGAL.BA"), 5000.0)
+
+    @patch('src.external.market_data.get_current_price')
+    def test_portfolio_tickers_seed_the_index(self, mock_price):
+        PortfolioItem.create(ticker="AAPL", quantity=1, category="Acciones", source_sheet="Manual")
+        self.assertTrue(TickerResolver().is_valid("AAPL"))
+        mock_price.assert_not_called()
+
+    @patch('src.external.market_data.lookup_prices')
+    def test_validate_many_only_resolves_unknown(self, mock_prices):
+        PortfolioItem.create(ticker="AAPL", quantity=1, category="Acciones", source_sheet="Manual")
+        mock_prices.return_value = {"MSFT": (10.0, True), "NOPE": (None, True), "LATER": (None, False)}
+
+        resolver = TickerResolver()
+        result = resolver.validate_many(["AAPL", "msft", "NOPE", "AAPL", "LATER"])
+        self.assertEqual(result, {"AAPL": True, "MSFT": True, "NOPE": False, "LATER": None})
+        # One batch for the unknown ones
+        mock_prices.assert_called_once_with(["MSFT", "NOPE", "LATER"])
+        # Only the provider's "no data" answer is negative-cached
+        self.assertTrue(resolver._is_known_invalid("NOPE"))
+        self.assertFalse(resolver._is_known_invalid("LATER"))
+        self.assertIsNotNone(resolver._lookup_index("MSFT"))
+
+if __name__ == '__main__':
+    unittest.main()
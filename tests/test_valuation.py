@@ -2,29 +2,43 @@ import unittest
 import sys
 import os
 import pandas as pd
-from unittest.mock import patch
+from peewee import SqliteDatabase
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.services.portfolio import Portfolio
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+from src.external.providers import ReplayProvider, get_provider, set_provider
+from src.external.quote_cache import quote_cache
+from src.external import market_data
 
 class TestValuation(unittest.TestCase):
     def setUp(self):
-        self.portfolio = Portfolio()
+        # Isolated in-memory database and offline market data
+        self.test_db = SqliteDatabase(':memory:')
+        self.ctx = self.test_db.bind_ctx([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+        self.ctx.__enter__()
+        self.test_db.create_tables([PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState])
+
+        self.previous_provider = get_provider()
         self.ticker = "TEST_VAL"
         self.broker = "TEST_BROKER"
-        self.portfolio.delete_ticker(self.ticker)
+        provider = ReplayProvider(synthetic=False)
+        provider._quotes = {self.ticker: 150.0}
+        set_provider(provider)
+        quote_cache.clear()
+        market_data._flights.forget()
+
+        self.portfolio = Portfolio()
 
     def tearDown(self):
-        self.portfolio.delete_ticker(self.ticker)
+        set_provider(self.previous_provider)
+        quote_cache.clear()
+        self.ctx.__exit__(None, None, None)
 
-    @patch('src.market_data.get_current_price')
-    def test_holdings_valuation(self, mock_get_price):
-        # Mock current price to be higher than buy price
-        mock_get_price.return_value = 150.0
-        
-        # Buy 10 @ 100
+    def test_holdings_valuation(self):
+        # Buy 10 @ 100 (replayed current price is 150)
         self.portfolio.update_position(self.ticker, 10, 100.0, self.broker, "2024-01-01")
         
         df = self.portfolio.get_holdings_with_valuations()
@@ -39,5 +53,73 @@ class TestValuation(unittest.TestCase):
         self.assertEqual(row['Gain/Loss $'], 500.0) # 1500 - 1000
         self.assertEqual(row['Gain/Loss %'], 50.0) # (150-100)/100 * 100
 
+    def test_snapshot_reused_until_prices_or_holdings_change(self):
+        self.portfolio.update_position(self.ticker, 10, 100.0, self.broker, "2024-01-01")
+
+        # First valuation fetches the quote (a cache write), the next one picks it up
+        self.portfolio.get_valuation_snapshot()
+        first = self.portfolio.get_valuation_snapshot()
+        self.assertIs(self.portfolio.get_valuation_snapshot(), first)
+        # Consumers get copies; mutating one doesn't leak into the snapshot
+        copy = first.holdings
+        copy["Total Value"] = 0.0
+        self.assertEqual(first.holdings["Total Value"].sum(), 1500.0)
+        with self.assertRaises(AttributeError):
+            first.as_of = 0
+
+        # Price refresh -> new snapshot
+        quote_cache.set(self.ticker, 160.0)
+        second = self.portfolio.get_valuation_snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.holdings["Total Value"].sum(), 1600.0)
+
+        # DB write -> new snapshot
+        self.portfolio.update_position(self.ticker, 5, 160.0, self.broker, "2024-01-02")
+        self.assertEqual(self.portfolio.get_valuation_snapshot().holdings["Total Value"].sum(), 2400.0)
+
+class TestValueHoldings(unittest.TestCase):
+    def test_vectorized_valuation(self):
+        from src.services.valuation import quotes_frame, value_holdings
+
+        holdings = pd.DataFrame({"ticker": ["AAA", "BBB", "AAA"],
+                                 "category": ["Acciones", "Acciones", "Cedear"],
+                                 "quantity": [10.0, 5.0, 2.0], "avg_price": [100.0, 0.0, 50.0],
+                                 "target_price": [None, 20.0, None]})
+        quotes = quotes_frame({"AAA": (120.0, 5.0), "BBB": (None, None)})
+
+        df = value_holdings(holdings, quotes).set_index(["Ticker", "Category"])
+
+        self.assertEqual(df.loc[("AAA", "Acciones"), "Total Value"], 1200.0)
+        self.assertEqual(df.loc[("AAA", "Acciones"), "Gain/Loss %"], 20.0)
+        self.assertEqual(df.loc[("AAA", "Cedear"), "Gain/Loss $"], 140.0)
+        self.assertEqual(df.loc[("AAA", "Cedear"), "Price Age"], 5.0)
+        # No quote -> valued at 0; no average cost -> 0%
+        self.assertEqual(df.loc[("BBB", "Acciones"), "Total Value"], 0.0)
+        self.assertEqual(df.loc[("BBB", "Acciones"), "Gain/Loss %"], 0.0)
+
+    def test_conversion_to_reporting_currency(self):
+        from src.services.valuation import quotes_frame, value_holdings, convert_valuation
+
+        holdings = pd.DataFrame({"ticker": ["GGAL.BA", "AAPL"], "category": ["Acciones", "Acciones"],
+                                 "quantity": [10.0, 2.0], "avg_price": [1000.0, 100.0],
+                                 "target_price": [None, 150.0]})
+        valued = value_holdings(holdings, quotes_frame({"GGAL.BA": (2000.0, 0.0),
+                                                        "AAPL": (120.0, 0.0)}))
+        self.assertEqual(valued["Currency"].tolist(), ["ARS", "USD"])
+
+        usd = convert_valuation(valued, "USD", 1000.0).set_index("Ticker")
+        self.assertEqual(usd.loc["GGAL.BA", "Total Value"], 20.0)
+        self.assertEqual(usd.loc["AAPL", "Total Value"], 240.0)
+        self.assertEqual(usd.loc["GGAL.BA", "Gain/Loss %"], 100.0)
+        ars = convert_valuation(valued, "ARS", 1000.0).set_index("Ticker")
+        self.assertEqual(ars.loc["AAPL", "Target Price"], 150000.0)
+        self.assertEqual(ars["Total Value"].sum(), 20000.0 + 240000.0)
+        self.assertEqual(set(ars["Currency"]), {"ARS"})
+
+        from src.services.valuation import ValuationSnapshot
+        snapshot = ValuationSnapshot(valued, 0.0, 0, 0)
+        self.assertEqual(snapshot.holdings_in("USD", 1000.0)["Total Value"].sum(), 20.0 + 240.0)
+        self.assertEqual(snapshot.holdings["Currency"].tolist(), ["ARS", "USD"])
+
 if __name__ == '__main__':
     unittest.main()
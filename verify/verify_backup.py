@@ -0,0 +1,96 @@
+"""
+Benchmark of the online backup while the app keeps writing.
+Benchmark del respaldo en línea mientras la app sigue escribiendo.
+
+Builds a large database on a temporary file (synthetic 1M-transaction ledger by
+default, with its indexes), then backs it up while a writer thread records
+transactions as update_position does, and reports backup duration, size, steps,
+restarts and the writer's throughput and worst commit latency. The same writer
+load runs without a backup as a baseline. Finally restores the backup and times
+the integrity check.
+
+Usage:
+    python verify/verify_backup.py [transactions]
+"""
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.models.database import PortfolioItem, Transaction, open_database, insert_rows
+from src.services.backup import backup_database, restore_backup, check_integrity
+from verify_indexes import synthetic_ledger, COLUMNS
+
+def writer_load(database, stop: threading.Event, latencies: list):
+    """
+    Records transactions in short write transactions until `stop` is set.
+    """
+    rng = np.random.default_rng(4)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        with database.atomic():
+            Transaction.create(date=datetime.datetime.now(), ticker=f"T{int(rng.integers(2500)):04d}",
+                               operation_type="Compra", quantity=1.0, price=10.0, broker="B0", category="Acciones")
+        latencies.append(time.perf_counter() - t0)
+        time.sleep(0.002)
+    database.close()
+
+def with_writer(database, work):
+    stop, latencies = threading.Event(), []
+    thread = threading.Thread(target=writer_load, args=(database, stop, latencies))
+    thread.start()
+    t0 = time.perf_counter()
+    try:
+        result = work()
+    finally:
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        thread.join()
+    latencies = np.array(latencies) * 1000
+    return result, elapsed, len(latencies) / elapsed, latencies.max(), np.percentile(latencies, 99)
+
+def run(transactions: int = 1000000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "finance.db")
+        backup_dir = os.path.join(tmp, "backups")
+        database = open_database(path)
+        with database.bind_ctx([PortfolioItem, Transaction]):
+            database.create_tables([PortfolioItem, Transaction])
+            rows, _ = synthetic_ledger(transactions)
+            with database.atomic():
+                insert_rows(Transaction, COLUMNS, rows)
+            database.close()
+            print(f"Database: {os.path.getsize(path) / 1e6:.1f} MB ({transactions} transactions)")
+
+            _, elapsed, rate, worst, p99 = with_writer(database, lambda: time.sleep(2))
+            print(f"{'no backup (baseline)':34s} {'':>8s}  writes {rate:6.0f}/s  p99 {p99:6.2f} ms  max {worst:7.2f} ms")
+
+            t0 = time.perf_counter()
+            shutil.copyfile(path, os.path.join(tmp, "copy.db"))
+            print(f"{'plain file copy (unsafe)':34s} {time.perf_counter() - t0:7.2f}s")
+
+            for name, pages in (("online backup, 1024 pages/step", 1024), ("online backup, one step", -1)):
+                report, elapsed, rate, worst, p99 = with_writer(
+                    database, lambda: backup_database(backup_dir, source=path, keep=None, pages=pages))
+                print(f"{name:34s} {report['duration']:7.2f}s  writes {rate:6.0f}/s  p99 {p99:6.2f} ms  "
+                      f"max {worst:7.2f} ms  | {report['size'] / 1e6:.1f} MB, {report['steps']} steps, "
+                      f"{report['restarts']} restarts")
+
+            t0 = time.perf_counter()
+            problems = check_integrity(report["path"])
+            print(f"{'integrity check of the backup':34s} {time.perf_counter() - t0:7.2f}s  "
+                  f"{'ok' if not problems else problems[0]}")
+            restored = restore_backup(report["path"], target=path, backup_dir=backup_dir)
+            print(f"{'restore (incl. both checks)':34s} {restored['duration']:7.2f}s")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
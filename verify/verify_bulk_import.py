@@ -0,0 +1,87 @@
+"""
+Benchmark of the bulk CSV import against entering the same rows one by one.
+Benchmark de la importación masiva desde CSV contra cargar las mismas filas una por una.
+
+Writes a synthetic broker statement, imports it with `import_transactions` into a
+temporary SQLite file and times `Portfolio.update_position` (what the UI form does)
+on a sample of the same rows to extrapolate the per-row cost.
+
+Usage:
+    python verify/verify_bulk_import.py [rows]
+"""
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from peewee import SqliteDatabase
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState
+from src.services.importer import read_transactions_csv, import_transactions
+from src.services.portfolio import Portfolio
+
+def synthetic_csv(rows: int, positions: int = 300) -> str:
+    """
+    Builds a CSV statement of buys and partial sells over `positions` ticker/broker pairs.
+    Genera un resumen CSV de compras y ventas parciales sobre `positions` pares ticker/broker.
+    """
+    rng = np.random.default_rng(5)
+    held = np.zeros(positions)
+    start = datetime.date(2015, 1, 1)
+    lines = ["date,ticker,operation_type,quantity,price,broker"]
+    for i in range(rows):
+        p = int(rng.integers(positions))
+        if held[p] > 10 and rng.random() < 0.3:
+            qty, op = float(np.floor(held[p] / 2)), "Venta"
+            held[p] -= qty
+        else:
+            qty, op = float(rng.integers(1, 200)), "Compra"
+            held[p] += qty
+        day = start + datetime.timedelta(days=i * 3000 // rows)
+        lines.append(f"{day.isoformat()},SYN{p % 100:03d},{op},{qty},{rng.uniform(1, 500):.2f},Broker{p // 100}")
+    return "\n".join(lines) + "\n"
+
+def all_valid(tickers):
+    return {t: True for t in tickers}
+
+def run(rows: int = 20000, sample: int = 300):
+    text = synthetic_csv(rows)
+    models = [PortfolioItem, Transaction, PortfolioValue, TaxLot, RealizedLot, LotState]
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with bench_db.bind_ctx(models):
+            bench_db.create_tables(models)
+            t0 = time.perf_counter()
+            report = import_transactions(read_transactions_csv(io.StringIO(text)), all_valid)
+            bulk = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            again = import_transactions(read_transactions_csv(io.StringIO(text)), all_valid)
+            reimport = time.perf_counter() - t0
+            assert report["imported"] == rows and again["imported"] == 0
+
+        one_by_one_db = SqliteDatabase(os.path.join(tmp, "loop.db"))
+        with one_by_one_db.bind_ctx(models):
+            one_by_one_db.create_tables(models)
+            df = read_transactions_csv(io.StringIO(text)).head(sample)
+            portfolio = Portfolio()
+            t0 = time.perf_counter()
+            for r in df.itertuples(index=False):
+                qty = float(r.quantity) if r.operation_type == "Compra" else -float(r.quantity)
+                portfolio.update_position(r.ticker, qty, float(r.price), r.broker,
+                                          datetime.datetime.fromisoformat(r.date), "Acciones")
+            per_row = (time.perf_counter() - t0) / sample
+
+    print(f"Rows: {rows} ({len(report['positions'])} positions)")
+    print(f"Bulk import (validate + insert + rebuild): {bulk * 1000:8.1f} ms")
+    print(f"Re-import (all duplicates):                {reimport * 1000:8.1f} ms")
+    print(f"One by one (update_position):              {per_row * 1000:8.2f} ms/row "
+          f"-> ~{per_row * rows:.1f} s for {rows} rows")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
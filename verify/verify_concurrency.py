@@ -0,0 +1,112 @@
+"""
+Benchmark of concurrent readers and writers on the app database settings.
+Benchmark de lectores y escritores concurrentes con la configuración de la base.
+
+Runs the same mixed load (reader threads aggregating the portfolio while writer
+threads record transactions the way update_position does: read the position, insert,
+update) against a plain SqliteDatabase and against `open_database` (WAL, tuned
+pragmas, BEGIN IMMEDIATE, busy timeout), reporting throughput, reader latency and
+"database is locked" errors.
+
+Usage:
+    python verify/verify_concurrency.py [seconds]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from peewee import SqliteDatabase, OperationalError, fn
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem, Transaction, open_database, insert_rows
+
+READERS = 6
+WRITERS = 2
+COLUMNS = ["date", "ticker", "operation_type", "quantity", "price", "broker", "category"]
+
+def seed(positions: int = 500, transactions: int = 100000):
+    rng = np.random.default_rng(2)
+    start = datetime.datetime(2015, 1, 1)
+    insert_rows(Transaction, COLUMNS,
+                [(str(start + datetime.timedelta(minutes=i)), f"T{int(p):03d}", "Compra", 1.0, 10.0, "B1", "Acciones")
+                 for i, p in enumerate(rng.integers(positions, size=transactions))])
+    now = str(datetime.datetime.now())
+    insert_rows(PortfolioItem, ["ticker", "broker", "quantity", "avg_price", "category", "source_sheet", "updated_at"],
+                [(f"T{p:03d}", "B1", 10.0, 10.0, "Acciones", "Acciones", now) for p in range(positions)])
+
+def run_load(database, seconds: float):
+    stop = time.perf_counter() + seconds
+    latencies, writes, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader():
+        mine = []
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                list(PortfolioItem
+                     .select(PortfolioItem.category, fn.SUM(PortfolioItem.quantity * PortfolioItem.avg_price))
+                     .group_by(PortfolioItem.category).tuples())
+                Transaction.select(fn.COUNT(Transaction.id)).where(Transaction.ticker == "T001").scalar()
+                mine.append(time.perf_counter() - t0)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+        database.close()
+        with lock:
+            latencies.extend(mine)
+
+    def writer(seed_value):
+        rng = np.random.default_rng(seed_value)
+        while time.perf_counter() < stop:
+            ticker = f"T{int(rng.integers(500)):03d}"
+            try:
+                with database.atomic():
+                    item = PortfolioItem.get((PortfolioItem.ticker == ticker) & (PortfolioItem.broker == "B1"))
+                    Transaction.create(date=datetime.datetime.now(), ticker=ticker, operation_type="Compra",
+                                       quantity=1.0, price=10.0, broker="B1", category="Acciones")
+                    item.quantity += 1
+                    item.save()
+                with lock:
+                    writes[0] += 1
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+        database.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer, args=(k,)) for k in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.array(latencies) * 1000
+    return len(latencies), writes[0], errors[0], np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def run(seconds: float = 5.0):
+    models = [PortfolioItem, Transaction]
+    print(f"{READERS} readers, {WRITERS} writers, {seconds:g} s each")
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = [
+            ("default (rollback journal, deferred)", SqliteDatabase),
+            ("open_database (WAL, IMMEDIATE)", open_database),
+        ]
+        for name, factory in configs:
+            database = factory(os.path.join(tmp, f"{len(name)}.db"))
+            with database.bind_ctx(models):
+                database.create_tables(models)
+                with database.atomic():
+                    seed()
+                database.close()
+                reads, writes, errors, p50, p99 = run_load(database, seconds)
+            print(f"{name:38s} reads {reads:7d}  writes {writes:6d}  locked errors {errors:5d}  "
+                  f"read p50 {p50:7.2f} ms  p99 {p99:8.2f} ms")
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
@@ -0,0 +1,115 @@
+"""
+Benchmark of the PortfolioItem and Transaction indexes on a large ledger.
+Benchmark de los índices de PortfolioItem y Transaction sobre un libro grande.
+
+Fills a temporary SQLite file with a synthetic ledger (1M transactions by default),
+then runs the hot queries (position lookup on every write, per-position ledger
+reads, lot-sync counts, ticker deletes) before and after `ensure_indexes`,
+printing each EXPLAIN QUERY PLAN and the average latency.
+
+Usage:
+    python verify/verify_indexes.py [transactions]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from peewee import SqliteDatabase, fn
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem, Transaction, insert_rows, ensure_indexes
+from src.services.ledger import load_ledger
+from src.services.lots import _ledger_counts
+
+COLUMNS = ["date", "ticker", "operation_type", "quantity", "price", "broker", "category"]
+
+def synthetic_ledger(transactions: int, tickers: int = 2500, brokers: int = 4):
+    """
+    Random buys/sells over tickers x brokers pairs, as Transaction rows (vectorized).
+    Compras/ventas aleatorias sobre pares ticker x broker, como filas de Transaction.
+    """
+    rng = np.random.default_rng(7)
+    start = datetime.datetime(2010, 1, 1)
+    seconds = np.sort(rng.integers(0, 15 * 365 * 86400, transactions))
+    dates = [str(start + datetime.timedelta(seconds=int(s))) for s in seconds]
+    ticker = rng.integers(tickers, size=transactions)
+    broker = rng.integers(brokers, size=transactions)
+    sell = rng.random(transactions) < 0.3
+    quantity = rng.integers(1, 100, transactions).astype(float)
+    price = rng.uniform(1, 500, transactions).round(2)
+    rows = [(d, f"T{t:04d}", "Venta" if s else "Compra", q, p, f"B{b}", "Acciones")
+            for d, t, s, q, p, b in zip(dates, ticker.tolist(), sell.tolist(), quantity.tolist(),
+                                        price.tolist(), broker.tolist())]
+    positions = [(f"T{t:04d}", f"B{b}") for t in range(tickers) for b in range(brokers)]
+    return rows, positions
+
+def timed(fn_, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn_()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+def run(transactions: int = 1000000):
+    models = [PortfolioItem, Transaction]
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with bench_db.bind_ctx(models):
+            # Tables as an existing finance.db has them: no secondary indexes
+            for model in models:
+                model._schema.create_table()
+            rows, positions = synthetic_ledger(transactions)
+            now = str(datetime.datetime.now())
+            with bench_db.atomic():
+                insert_rows(Transaction, COLUMNS, rows)
+                insert_rows(PortfolioItem, ["ticker", "broker", "quantity", "avg_price", "category",
+                                            "source_sheet", "updated_at"],
+                            [(t, b, 10.0, 100.0, "Acciones", "Acciones", now) for t, b in positions])
+            print(f"Transactions: {transactions}, positions: {len(positions)}")
+
+            rng = np.random.default_rng(1)
+            sample = [positions[i] for i in rng.integers(len(positions), size=50)]
+            ticker, broker = sample[0]
+            cases = [
+                ("position lookup (update_position)", 200,
+                 PortfolioItem.select().where((PortfolioItem.ticker == ticker) & (PortfolioItem.broker == broker)),
+                 lambda: [PortfolioItem.get_or_none((PortfolioItem.ticker == t) & (PortfolioItem.broker == b))
+                          for t, b in sample[:4]]),
+                ("ledger of one position (rebuild)", 5,
+                 Transaction.select().where(Transaction.ticker.in_([ticker])),
+                 lambda: load_ledger([sample[1]])),
+                ("lot-sync counts of one position", 5,
+                 Transaction.select(Transaction.ticker, Transaction.broker, fn.COUNT(Transaction.id))
+                 .where(Transaction.ticker.in_([ticker])).group_by(Transaction.ticker, Transaction.broker),
+                 lambda: _ledger_counts([sample[2]])),
+                ("first trade of a ticker (delete_ticker)", 5,
+                 Transaction.select(fn.MIN(Transaction.date)).where(Transaction.ticker == ticker),
+                 lambda: Transaction.select(fn.MIN(Transaction.date))
+                 .where(Transaction.ticker == sample[3][0]).scalar()),
+            ]
+
+            def report(title):
+                print(f"\n--- {title} ---")
+                results = {}
+                for name, repeat, query, call in cases:
+                    plan = bench_db.execute_sql("EXPLAIN QUERY PLAN " + query.sql()[0], query.sql()[1]).fetchall()
+                    results[name] = timed(call, repeat)
+                    print(f"{name:40s} {results[name]:9.2f} ms  | " + "; ".join(str(p[-1]) for p in plan))
+                return results
+
+            before = report("Without indexes")
+            t0 = time.perf_counter()
+            ensure_indexes()
+            print(f"\nensure_indexes on {transactions} rows: {time.perf_counter() - t0:.2f} s")
+            after = report("With indexes")
+
+            print("\n--- Speedup ---")
+            for name in before:
+                print(f"{name:40s} {before[name] / after[name]:9.1f}x")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
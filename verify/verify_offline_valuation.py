@@ -0,0 +1,73 @@
+"""
+Offline benchmark of the valuation and charting data paths.
+Benchmark offline de los caminos de valuación y datos de gráficos.
+
+Runs against an in-memory database and the deterministic ReplayProvider, so it
+needs no network and produces the same numbers on every run.
+
+Usage:
+    python verify/verify_offline_valuation.py [positions]
+"""
+import os
+import sys
+import time
+from peewee import SqliteDatabase
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem, Transaction, PriceBar, BarCoverage
+from src.external.providers import ReplayProvider, set_provider
+from src.external.market_data import get_historical_data, clear_quotes
+from src.services.portfolio import Portfolio
+
+def run(positions: int = 60):
+    """
+    Creates `positions` synthetic holdings and times valuation and history reads.
+    Crea `positions` tenencias sintéticas y mide la valuación y lectura de historial.
+    """
+    models = [PortfolioItem, Transaction, PriceBar, BarCoverage]
+    test_db = SqliteDatabase(':memory:')
+    with test_db.bind_ctx(models):
+        test_db.create_tables(models)
+        set_provider(ReplayProvider())
+
+        rows = [
+            {"ticker": f"SYN{i:05d}", "quantity": 10 + i % 7, "category": ["Acciones", "Cedear", "Bonos"][i % 3],
+             "source_sheet": "Bench", "broker": "Bench", "avg_price": 50.0 + i % 100}
+            for i in range(positions)
+        ]
+        with test_db.atomic():
+            for i in range(0, len(rows), 500):
+                PortfolioItem.insert_many(rows[i:i + 500]).execute()
+
+        t0 = time.perf_counter()
+        portfolio = Portfolio()
+        t1 = time.perf_counter()
+        df = portfolio.get_holdings_with_valuations()
+        t2 = time.perf_counter()
+        clear_quotes()
+        portfolio.get_holdings_with_valuations()
+        t3 = time.perf_counter()
+
+        print(f"Positions: {positions}")
+        print(f"Load portfolio:           {(t1 - t0) * 1000:8.1f} ms")
+        print(f"Valuation (cold cache):   {(t2 - t1) * 1000:8.1f} ms")
+        print(f"Valuation (cleared):      {(t3 - t2) * 1000:8.1f} ms")
+        print(f"Total value:              {df['Total Value'].sum():,.2f}")
+
+        sample = [r["ticker"] for r in rows[:10]]
+        t4 = time.perf_counter()
+        for ticker in sample:
+            get_historical_data(ticker, "5y")
+        t5 = time.perf_counter()
+        for ticker in sample:
+            for period in ["5d", "1mo", "1y", "5y"]:
+                get_historical_data(ticker, period)
+        t6 = time.perf_counter()
+        print(f"History 5y (first sync, {len(sample)} tickers): {(t5 - t4) * 1000:8.1f} ms")
+        print(f"History 4 periods (store, {len(sample)} tickers): {(t6 - t5) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
@@ -0,0 +1,102 @@
+"""
+Benchmark of portfolio loading and summary: model instances vs SQL tuples/aggregates.
+Benchmark de carga y resumen del portafolio: instancias de modelo vs tuplas/agregados SQL.
+
+Fills a temporary SQLite file with synthetic positions and reports wall time and
+peak Python memory (tracemalloc) for each approach. Holdings frames are built
+lazily, so the "+ per-category holdings" line is a full reload plus first access.
+
+Usage:
+    python verify/verify_portfolio_load.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from peewee import SqliteDatabase
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem
+from src.services.portfolio import Portfolio
+
+CATEGORIES = ["Acciones", "Cedear", "Bonos", "ONs", "Cripto", "FCI", "Letras"]
+
+def legacy_load():
+    """
+    The previous load_data: model instances row by row, then one filter per category.
+    El load_data anterior: instancias de modelo fila por fila y un filtro por categoría.
+    """
+    holdings = {}
+    data = []
+    for item in PortfolioItem.select():
+        data.append({
+            "ticker": item.ticker,
+            "quantity": item.quantity,
+            "category": item.category,
+            "source_sheet": item.source_sheet,
+            "avg_price": item.avg_price,
+            "target_price": item.target_price
+        })
+    if data:
+        df = pd.DataFrame(data)
+        for category in df['category'].unique():
+            holdings[category] = df[df['category'] == category].set_index('ticker')[['quantity', 'avg_price', 'target_price']]
+    return holdings
+
+def legacy_summary():
+    """
+    The previous get_portfolio_summary: every row summed in Python.
+    El get_portfolio_summary anterior: todas las filas sumadas en Python.
+    """
+    summary = {}
+    for item in PortfolioItem.select():
+        summary[item.category] = summary.get(item.category, 0.0) + item.quantity * item.avg_price
+    return summary
+
+def measure(label: str, func):
+    """
+    Runs `func` twice: once for wall time, once under tracemalloc for peak memory
+    (tracing slows Python down, so it would distort the timing).
+    Ejecuta `func` dos veces: una para medir tiempo y otra para el pico de memoria.
+    """
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {elapsed * 1000:8.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB")
+    return result
+
+def run(rows: int = 50000):
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with bench_db.bind_ctx([PortfolioItem]):
+            bench_db.create_tables([PortfolioItem])
+            data = [
+                {"ticker": f"SYN{i:05d}", "quantity": 1 + i % 50, "category": CATEGORIES[i % len(CATEGORIES)],
+                 "source_sheet": "Bench", "broker": f"Broker{i % 3}", "avg_price": 10.0 + i % 500,
+                 "target_price": None if i % 4 else 99.0}
+                for i in range(rows)
+            ]
+            with bench_db.atomic():
+                for i in range(0, len(data), 500):
+                    PortfolioItem.insert_many(data[i:i + 500]).execute()
+
+            print(f"Rows: {rows}")
+            measure("Load (model instances)", legacy_load)
+            portfolio = measure("Load (tuples -> DataFrame)", Portfolio)
+            measure("  + per-category holdings", lambda: portfolio.load_data() or portfolio.holdings)
+            old = measure("Summary (Python loop)", legacy_summary)
+            new = measure("Summary (SQL SUM ... GROUP BY)", portfolio.get_portfolio_summary)
+            assert all(abs(old[c] - new[c]) < 1e-6 * max(1.0, abs(old[c])) for c in old)
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,92 @@
+"""
+Benchmark of the vectorized position rebuild against the row-by-row replay.
+Benchmark de la reconstrucción vectorizada de posiciones contra el replay fila por fila.
+
+Generates a synthetic ledger, replays it both ways, checks they agree and then
+runs a full rebuild (read ledger + rewrite PortfolioItem) on a temporary SQLite file.
+
+Usage:
+    python verify/verify_position_rebuild.py [transactions]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from peewee import SqliteDatabase
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.models.database import PortfolioItem, Transaction
+from src.services.ledger import load_ledger, replay_ledger, replay_position_loop, rebuild_positions
+
+def synthetic_rows(transactions: int, positions: int = 2000):
+    """
+    Builds Transaction rows spread over `positions` ticker/broker pairs (~3% oversold).
+    Genera filas de Transaction repartidas en `positions` pares ticker/broker.
+    """
+    rng = np.random.default_rng(3)
+    held = np.zeros(positions)
+    start = datetime.datetime(2015, 1, 1)
+    rows = []
+    for i in range(transactions):
+        p = int(rng.integers(positions))
+        if held[p] > 0 and rng.random() < 0.35:
+            qty = held[p] + 1 if rng.random() < 0.03 else float(np.ceil(held[p] * rng.uniform(0.1, 1.0)))
+            op = "Venta"
+            held[p] -= qty
+        else:
+            qty = float(rng.integers(1, 200))
+            op = "Compra"
+            held[p] += qty
+        rows.append({"date": start + datetime.timedelta(minutes=i), "ticker": f"SYN{p % 700:04d}",
+                     "broker": f"Broker{p // 700}", "operation_type": op, "quantity": qty,
+                     "price": float(rng.uniform(1, 500)), "category": "Acciones"})
+    return rows
+
+def run(transactions: int = 100000):
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with bench_db.bind_ctx([PortfolioItem, Transaction]):
+            bench_db.create_tables([PortfolioItem, Transaction])
+            rows = synthetic_rows(transactions)
+            with bench_db.atomic():
+                for i in range(0, len(rows), 300):
+                    Transaction.insert_many(rows[i:i + 300]).execute()
+
+            t0 = time.perf_counter()
+            ledger = load_ledger()
+            t1 = time.perf_counter()
+            vectorized = replay_ledger(ledger).set_index(['ticker', 'broker'])
+            t2 = time.perf_counter()
+            legacy = {}
+            for key, group in ledger.sort_values(['date', 'id']).groupby(['ticker', 'broker']):
+                legacy[key] = replay_position_loop(zip(group['operation_type'], group['quantity'], group['price']))
+            t3 = time.perf_counter()
+
+            for key, (qty, cost) in legacy.items():
+                row = vectorized.loc[key]
+                if qty > 1e-9:
+                    assert np.isclose(row['quantity'], qty) and np.isclose(row['avg_price'], cost / qty), key
+                else:
+                    assert row['quantity'] == 0.0, key
+
+            t4 = time.perf_counter()
+            report = rebuild_positions()
+            t5 = time.perf_counter()
+            check = rebuild_positions(dry_run=True)
+            t6 = time.perf_counter()
+
+            print(f"Transactions: {transactions} ({len(legacy)} positions)")
+            print(f"Load ledger (tuples):       {(t1 - t0) * 1000:8.1f} ms")
+            print(f"Replay (vectorized):        {(t2 - t1) * 1000:8.1f} ms")
+            print(f"Replay (row by row):        {(t3 - t2) * 1000:8.1f} ms")
+            print(f"Full rebuild + write:       {(t5 - t4) * 1000:8.1f} ms  "
+                  f"(created {report['created']}, updated {report['updated']}, deleted {report['deleted']})")
+            print(f"Consistency check:          {(t6 - t5) * 1000:8.1f} ms  ({len(check['mismatches'])} mismatches)")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
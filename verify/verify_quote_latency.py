@@ -0,0 +1,84 @@
+"""
+Benchmark of per-quote latency and bytes transferred: .info vs the fast chart path.
+Benchmark de latencia y bytes transferidos por cotización: .info vs el camino rápido.
+
+Requires network access to Yahoo Finance.
+
+Usage:
+    python verify/verify_quote_latency.py [TICKER ...]
+"""
+import os
+import sys
+import time
+import statistics
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.external.providers import YFinanceProvider
+
+DEFAULT_TICKERS = ["AAPL", "MSFT", "KO", "GGAL.BA", "YPFD.BA", "ALUA.BA", "BTC-USD", "SPY"]
+
+_bytes_received = 0
+
+def _install_byte_counter():
+    """
+    Wraps the HTTP session classes used by yfinance to count response bytes.
+    Envuelve las clases de sesión HTTP usadas por yfinance para contar bytes recibidos.
+    """
+    session_classes = []
+    try:
+        from curl_cffi import requests as curl_requests
+        session_classes.append(curl_requests.Session)
+    except ImportError:
+        pass
+    try:
+        import requests
+        session_classes.append(requests.Session)
+    except ImportError:
+        pass
+
+    for cls in session_classes:
+        original = cls.request
+
+        def counting_request(self, *args, _original=original, **kwargs):
+            global _bytes_received
+            response = _original(self, *args, **kwargs)
+            _bytes_received += len(response.content or b"")
+            return response
+
+        cls.request = counting_request
+
+def measure(label: str, fetch, tickers):
+    """
+    Times `fetch(ticker)` for each ticker and reports latency and bytes per quote.
+    Mide `fetch(ticker)` para cada ticker e informa latencia y bytes por cotización.
+    """
+    global _bytes_received
+    latencies, sizes = [], []
+    for ticker in tickers:
+        _bytes_received = 0
+        start = time.perf_counter()
+        try:
+            price = fetch(ticker)
+        except Exception as e:
+            price = f"error: {e}"
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(_bytes_received)
+        print(f"  {label:<6} {ticker:<10} {latencies[-1]:8.1f} ms {sizes[-1] / 1024:8.1f} KB  price={price}")
+
+    print(f"{label}: median {statistics.median(latencies):.1f} ms, "
+          f"mean {statistics.mean(latencies):.1f} ms, "
+          f"mean {statistics.mean(sizes) / 1024:.1f} KB per quote\n")
+
+if __name__ == "__main__":
+    tickers = sys.argv[1:] or DEFAULT_TICKERS
+    _install_byte_counter()
+    provider = YFinanceProvider()
+
+    # Warm up cookies/crumb so the first measured request isn't penalized
+    provider.get_info_quote(tickers[0])
+
+    measure("info", provider.get_info_quote, tickers)
+    measure("fast", provider.get_fast_quote, tickers)
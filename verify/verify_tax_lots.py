@@ -0,0 +1,73 @@
+"""
+Benchmark of the tax-lot engine: full build vs incremental sync.
+Benchmark del motor de lotes: construcción completa contra sincronización incremental.
+
+Builds the FIFO, LIFO and AVERAGE lots of a synthetic ledger on a temporary SQLite
+file, then appends a few transactions (as the UI does) and times the incremental
+sync against replaying the whole history again.
+
+Usage:
+    python verify/verify_tax_lots.py [transactions]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+from peewee import SqliteDatabase
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.models.database import Transaction, TaxLot, RealizedLot, LotState
+from src.services.lots import METHODS, sync_lots, get_open_lots, get_realized
+from verify_position_rebuild import synthetic_rows
+
+def run(transactions: int = 100000):
+    models = [Transaction, TaxLot, RealizedLot, LotState]
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        with bench_db.bind_ctx(models):
+            bench_db.create_tables(models)
+            rows = synthetic_rows(transactions)
+            with bench_db.atomic():
+                for i in range(0, len(rows), 300):
+                    Transaction.insert_many(rows[i:i + 300]).execute()
+
+            print(f"Transactions: {transactions}")
+            for method in METHODS:
+                t0 = time.perf_counter()
+                full = sync_lots(method)
+                t1 = time.perf_counter()
+                print(f"{method:8s} full build:          {(t1 - t0) * 1000:8.1f} ms  "
+                      f"({full['rebuilt']} pairs, {len(get_open_lots(method, sync=False))} open lots, "
+                      f"{len(get_realized(method, sync=False))} realized)")
+
+            last = rows[-1]["date"]
+            for extra in (1, 100):
+                new = [dict(rows[i], date=last + datetime.timedelta(minutes=k + 1))
+                       for k, i in enumerate(range(0, extra * 997, 997))]
+                Transaction.insert_many(new).execute()
+                last = new[-1]["date"]
+                t0 = time.perf_counter()
+                report = sync_lots("FIFO")
+                t1 = time.perf_counter()
+                print(f"FIFO     +{extra:<3d} transactions:    {(t1 - t0) * 1000:8.1f} ms  "
+                      f"({report['incremental']} pairs incremental, {report['rebuilt']} replayed)")
+
+            t0 = time.perf_counter()
+            sync_lots("FIFO")
+            t1 = time.perf_counter()
+            print(f"FIFO     no changes:          {(t1 - t0) * 1000:8.1f} ms")
+
+            for model in (TaxLot, RealizedLot, LotState):
+                model.delete().where(model.method == "FIFO").execute()
+            t0 = time.perf_counter()
+            sync_lots("FIFO")
+            t1 = time.perf_counter()
+            print(f"FIFO     full replay again:   {(t1 - t0) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,104 @@
+"""
+Benchmark of the vectorized valuation engine against the previous row-by-row loop.
+Benchmark del motor de valuación vectorizado contra el bucle fila por fila anterior.
+
+Quotes are precomputed so only the valuation step is timed (no network, no DB).
+
+Usage:
+    python verify/verify_valuation_engine.py [positions]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.valuation import quotes_frame, value_holdings
+
+CATEGORIES = ["Acciones", "Cedear", "Bonos", "ONs", "Cripto"]
+
+def build_inputs(positions: int):
+    """
+    Creates `positions` synthetic positions (flat frame and Portfolio.holdings layout)
+    and their quotes.
+    Crea `positions` posiciones sintéticas (frame plano y formato de Portfolio.holdings)
+    y sus cotizaciones.
+    """
+    rng = np.random.default_rng(42)
+    tickers = np.array([f"SYN{i:05d}" for i in range(positions)])
+    categories = np.array(CATEGORIES)[np.arange(positions) % len(CATEGORIES)]
+    df = pd.DataFrame({
+        "ticker": tickers,
+        "category": categories,
+        "quantity": rng.integers(1, 500, positions).astype(float),
+        "avg_price": rng.uniform(0, 300, positions),
+        "target_price": np.where(rng.random(positions) < 0.3, rng.uniform(10, 400, positions), np.nan),
+    })
+    holdings = {c: df[df["category"] == c].set_index("ticker")[["quantity", "avg_price", "target_price"]]
+                for c in CATEGORIES}
+    # ~2% of tickers without a quote
+    quotes = {t: ((float(p), 12.0) if rng.random() > 0.02 else (None, None))
+              for t, p in zip(tickers, rng.uniform(1, 400, positions))}
+    return df, holdings, quotes
+
+def legacy_valuation(holdings, quotes) -> pd.DataFrame:
+    """
+    The previous implementation: nested iterrows() building a list of dicts.
+    La implementación anterior: iterrows() anidados armando una lista de dicts.
+    """
+    all_data = []
+    for category, df_holdings in holdings.items():
+        for ticker, row in df_holdings.iterrows():
+            qty = row['quantity']
+            avg_price = row['avg_price']
+            current_price, price_age = quotes.get(ticker, (None, None))
+            if current_price is None:
+                current_price = 0.0
+            total_value = qty * current_price
+            invested_capital = qty * avg_price
+            all_data.append({
+                "Ticker": ticker,
+                "Category": category,
+                "Quantity": qty,
+                "Avg Price": avg_price,
+                "Current Price": current_price,
+                "Price Age": price_age,
+                "Target Price": row.get('target_price', 0.0),
+                "Total Value": total_value,
+                "Gain/Loss $": total_value - invested_capital,
+                "Gain/Loss %": ((current_price - avg_price) / avg_price * 100) if avg_price > 0 else 0.0
+            })
+    return pd.DataFrame(all_data)
+
+def run(positions: int = 10000, repeats: int = 3):
+    positions_df, holdings, quotes = build_inputs(positions)
+
+    legacy_times, vector_times = [], []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        legacy = legacy_valuation(holdings, quotes)
+        t1 = time.perf_counter()
+        vectorized = value_holdings(positions_df, quotes_frame(quotes))
+        t2 = time.perf_counter()
+        legacy_times.append(t1 - t0)
+        vector_times.append(t2 - t1)
+
+    # Both must agree on every numeric column (legacy rows come grouped by category)
+    legacy = legacy.sort_values("Ticker", ignore_index=True)
+    vectorized = vectorized.sort_values("Ticker", ignore_index=True)
+    for column in ["Quantity", "Avg Price", "Current Price", "Total Value", "Gain/Loss $", "Gain/Loss %"]:
+        np.testing.assert_allclose(legacy[column].to_numpy(dtype=float),
+                                   vectorized[column].to_numpy(dtype=float))
+
+    legacy_best, vector_best = min(legacy_times), min(vector_times)
+    print(f"Positions: {positions}")
+    print(f"Row-by-row loop:   {legacy_best * 1000:8.1f} ms")
+    print(f"Vectorized engine: {vector_best * 1000:8.1f} ms")
+    print(f"Speed-up:          {legacy_best / vector_best:8.1f}x")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)